@@ -1,24 +1,52 @@
 """Support for smartlife devices."""
+import time
 from typing import NamedTuple, Any
 
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import Event, HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers import device_registry as dr, entity_registry as er
-from homeassistant.components.light import DOMAIN as LIGHT_DOMAIN
-from homeassistant.components.switch import DOMAIN as SWITCH_DOMAIN
+from homeassistant.helpers.entity_platform import async_get_platforms
 from homeassistant.helpers.dispatcher import dispatcher_send
-from homeassistant.const import __version__
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP, __version__
 from homeassistant.loader import async_get_integration
 
 from .const import (
     DOMAIN,
     LOGGER,
     CONF_CLIENT_ID,
-    PLATFORMS,
-    DPCode,
-    SMART_LIFE_HA_SIGNAL_UPDATE_ENTITY,
+    CONF_COMMAND_WINDOW,
+    CONF_DEBUG_TRACE,
+    CONF_FORCE_DEVICES,
+    CONF_LOCAL_CONTROL,
+    CONF_OPTIMISTIC_TIMEOUT,
+    CONF_SKIP_REDUNDANT,
+    CONF_STATISTICS_WINDOW,
+    CONF_TRACE_DEVICES,
+    CONF_TRACE_SAMPLE_RATE,
+    CONF_UPDATE_WINDOW,
+    DEFAULT_COMMAND_WINDOW,
+    DEFAULT_DEBUG_TRACE,
+    DEFAULT_LOCAL_CONTROL,
+    DEFAULT_OPTIMISTIC_TIMEOUT,
+    DEFAULT_SKIP_REDUNDANT,
+    DEFAULT_STATISTICS_WINDOW,
+    DEFAULT_TRACE_SAMPLE_RATE,
+    DEFAULT_UPDATE_WINDOW,
     SMART_LIFE_DISCOVERY_NEW
 )
+from .base import remove_device_schema
+from .bootstrap import Bootstrap
+from .command import CommandBuffer
+from .discovery import DiscoveryEngine
+from .dispatcher import SOURCE_INTERNAL, UpdateDispatcher
+from .local import LocalTransport
+from .metrics import Metrics
+from .migration import async_migrate_entry as async_migrate_config_entry
+from .optimistic import OptimisticState
+from .snapshot import DeviceSnapshot, async_reconcile_device_map
+from .trace import TraceRecorder, async_register_services, async_unregister_services
+from .tracing import DebugTracer, set_tracer
+from .window import StatisticsWindows
 
 from tuya_sharing import Manager, SharingDeviceListener, CustomerDevice, SharingTokenListener
 from tuya_sharing import logger
@@ -31,6 +59,16 @@ class HomeAssistantSmartLifeData(NamedTuple):
 
     manager: Manager
     listener: SharingDeviceListener
+    dispatcher: UpdateDispatcher
+    commands: CommandBuffer
+    optimistic: OptimisticState
+    local: LocalTransport
+    snapshot: DeviceSnapshot
+    bootstrap: Bootstrap
+    metrics: Metrics
+    discovery: DiscoveryEngine
+    statistics: StatisticsWindows
+    tracer: DebugTracer
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -48,16 +86,115 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             token_listener
         )
 
-        listener = DeviceListener(hass, smart_life_manager)
+        metrics = Metrics()
+        tracer = DebugTracer()
+        set_tracer(smart_life_manager, tracer)
+        dispatcher = UpdateDispatcher(hass, metrics=metrics)
+        optimistic = OptimisticState(hass, dispatcher, metrics=metrics)
+        commands = CommandBuffer(
+            hass, smart_life_manager, metrics=metrics, tracer=tracer
+        )
+        listener = DeviceListener(
+            hass, smart_life_manager, dispatcher, optimistic, commands, tracer
+        )
         smart_life_manager.add_device_listener(listener)
         hass.data[DOMAIN][entry.entry_id] = HomeAssistantSmartLifeData(
             manager=smart_life_manager,
-            listener=listener
+            listener=listener,
+            dispatcher=dispatcher,
+            commands=commands,
+            optimistic=optimistic,
+            local=LocalTransport(
+                hass, smart_life_manager, dispatcher, tracer=tracer
+            ),
+            snapshot=DeviceSnapshot(hass, entry.entry_id),
+            bootstrap=Bootstrap(hass),
+            metrics=metrics,
+            discovery=DiscoveryEngine(hass, entry, smart_life_manager),
+            statistics=StatisticsWindows(DEFAULT_STATISTICS_WINDOW * 60),
+            tracer=tracer,
         )
-    else:
-        hass_data: HomeAssistantSmartLifeData = hass.data[DOMAIN][entry.entry_id]
-        smart_life_manager = hass_data.manager
+    hass_data: HomeAssistantSmartLifeData = hass.data[DOMAIN][entry.entry_id]
+    smart_life_manager = hass_data.manager
+    bootstrap = hass_data.bootstrap
+
+    hass_data.commands.async_start()
+    async_apply_options(hass, entry)
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
+
+    # Bootstrap phases:
+    #   report_version  fire-and-forget
+    #   query_scenes    concurrently, awaited by the scene platform
+    #   devices         snapshot, or cloud when there is no snapshot yet
+    #   platforms       as soon as the device list is known
+    #   refresh_mq      once the entities are created
+    #   refresh_devices in the background, when started from a snapshot
+    entry.async_create_background_task(
+        hass,
+        bootstrap.async_run("report_version", async_report_version(hass, entry)),
+        f"{DOMAIN} {entry.entry_id} report version",
+    )
+    bootstrap.async_add_executor_job("query_scenes", smart_life_manager.query_scenes)
+
+    # Get devices from the last snapshot, or from the cloud when there is
+    # no snapshot yet. A snapshot is refreshed in the background once the
+    # platforms are set up.
+    if not smart_life_manager.device_map:
+        smart_life_manager.device_map.update(
+            await bootstrap.async_run("load_snapshot", hass_data.snapshot.async_load())
+        )
+    refresh_devices = bool(smart_life_manager.device_map)
+    if not refresh_devices:
+        await bootstrap.async_run(
+            "update_device_cache",
+            hass.async_add_executor_job(smart_life_manager.update_device_cache),
+        )
+        hass_data.snapshot.async_schedule_save(smart_life_manager.device_map)
+
+    async def async_save_snapshot(_: Event) -> None:
+        """Save the last known device status when Home Assistant stops."""
+        await hass_data.snapshot.async_save(smart_life_manager.device_map)
+
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_save_snapshot)
+    )
+
+    # Remove, create and rename the registered devices of the entry
+    async_reconcile_device_registry(hass, entry, smart_life_manager)
+
+    # Only the platforms handling the categories of the devices are loaded,
+    # others are loaded once a device of their category is added. The
+    # platforms register with the discovery engine, which then creates the
+    # entities of all devices in a single pass.
+    await bootstrap.async_run(
+        "platforms",
+        hass_data.discovery.async_load_platforms(
+            smart_life_manager.device_map.values()
+        ),
+    )
+    hass_data.discovery.async_discover([*smart_life_manager.device_map])
+    entry.async_on_unload(hass_data.discovery.async_setup())
 
+    # The SDK only subscribes to the devices marked set up by their entities,
+    # so device updates are subscribed to once the entities are created.
+    refresh_mq = bootstrap.async_add_executor_job(
+        "refresh_mq", smart_life_manager.refresh_mq
+    )
+    async_register_services(hass)
+    await refresh_mq
+
+    if refresh_devices:
+        entry.async_create_background_task(
+            hass,
+            bootstrap.async_run("refresh_devices", async_refresh_devices(hass, entry)),
+            f"{DOMAIN} {entry.entry_id} refresh devices",
+        )
+    return True
+
+
+async def async_report_version(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Report the Home Assistant and integration versions."""
+    hass_data: HomeAssistantSmartLifeData = hass.data[DOMAIN][entry.entry_id]
     integration = await async_get_integration(hass, DOMAIN)
     manifest = integration.manifest
     smart_life_version = manifest["version"]
@@ -66,124 +203,194 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     for item in sdk_version:
         if "device-sharing-sdk" in item:
             sharing_sdk = item.split("==")[1]
-    await hass.async_add_executor_job(smart_life_manager.report_version, __version__, smart_life_version, sharing_sdk)
+    try:
+        await hass.async_add_executor_job(
+            hass_data.manager.report_version,
+            __version__,
+            smart_life_version,
+            sharing_sdk,
+        )
+    except Exception as err:  # pylint: disable=broad-except
+        LOGGER.debug("Failed to report version: %s", err)
+
+
+def _fetch_device_map(manager: Manager) -> dict[str, CustomerDevice]:
+    """Fetch the homes and their devices, like `Manager.update_device_cache`.
+
+    Unlike the SDK, the devices are returned in a new map instead of
+    clearing and refilling the live device map.
+    """
+    homes = manager.home_repository.query_homes()
+    manager.user_homes = homes
+    return {
+        device.id: device
+        for home in homes
+        for device in manager.device_repository.query_devices_by_home(home.id)
+    }
 
-    # Get devices & clean up device entities
-    await hass.async_add_executor_job(smart_life_manager.update_device_cache)
-    await cleanup_device_registry(hass, smart_life_manager)
 
-    # Migrate old unique_ids to the new format
-    async_migrate_entities_unique_ids(hass, entry, smart_life_manager)
+async def async_refresh_devices(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Refresh the device list from the cloud and reconcile the changes."""
+    hass_data: HomeAssistantSmartLifeData = hass.data[DOMAIN][entry.entry_id]
+    manager = hass_data.manager
+
+    # The devices are fetched into a separate map, the live map keeps
+    # receiving updates and new devices until the maps are reconciled.
+    device_map = manager.device_map
+    known = set(device_map)
+    started = time.monotonic()
+    try:
+        fresh = await hass.async_add_executor_job(_fetch_device_map, manager)
+    except Exception as err:  # pylint: disable=broad-except
+        LOGGER.warning("Failed to refresh devices, using the snapshot: %s", err)
+        return
+
+    added, removed, replaced = async_reconcile_device_map(
+        device_map,
+        fresh,
+        added_since=device_map.keys() - known,
+        updated_since=hass_data.dispatcher.async_updated_since(started),
+    )
+    LOGGER.debug(
+        "Refreshed devices: added=%s removed=%s replaced=%s", added, removed, replaced
+    )
 
-    device_registry = dr.async_get(hass)
-    for device in smart_life_manager.device_map.values():
-        device_registry.async_get_or_create(
-            config_entry_id=entry.entry_id,
-            identifiers={(DOMAIN, device.id)},
-            manufacturer="smartlife",
-            name=device.name,
-            model=f"{device.product_name} (unsupported)",
+    for device_id in removed:
+        hass_data.listener.async_remove_device(device_id)
+    # Devices with a changed schema only get new entities, their registry
+    # entries are kept
+    for device_id in replaced:
+        hass_data.listener.async_forget_device(device_id)
+        await hass_data.listener.async_remove_entities(device_id)
+    async_reconcile_device_registry(hass, entry, manager)
+
+    # Entities of kept devices may have drifted from the snapshot status
+    for device_id, device in device_map.items():
+        if device_id not in added and device_id not in replaced:
+            hass_data.dispatcher.update_device(device, SOURCE_INTERNAL)
+
+    # Create the entities of new devices before subscribing again, the SDK
+    # only subscribes to devices marked set up by their entities
+    if new_ids := [*added, *replaced]:
+        await hass_data.discovery.async_load_platforms(
+            [device_map[device_id] for device_id in new_ids]
         )
+        hass_data.discovery.async_discover(new_ids)
+    # Subscribe again, also with the homes fetched with the devices, which
+    # are not known when starting from a snapshot
+    await hass.async_add_executor_job(manager.refresh_mq)
 
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    await hass.async_add_executor_job(smart_life_manager.refresh_mq)
-    return True
+    hass_data.snapshot.async_schedule_save(device_map)
 
 
-async def cleanup_device_registry(
-        hass: HomeAssistant, device_manager: Manager
-) -> None:
-    """Remove deleted device registry entry if there are no remaining entities."""
-    device_registry = dr.async_get(hass)
-    for dev_id, device_entry in list(device_registry.devices.items()):
-        for item in device_entry.identifiers:
-            if item[0] == DOMAIN and item[1] not in device_manager.device_map:
-                device_registry.async_remove_device(dev_id)
-                break
+@callback
+def async_apply_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply the config entry options to the running integration."""
+    hass_data: HomeAssistantSmartLifeData = hass.data[DOMAIN][entry.entry_id]
+    hass_data.dispatcher.window = entry.options.get(
+        CONF_UPDATE_WINDOW, DEFAULT_UPDATE_WINDOW
+    )
+    hass_data.commands.window = entry.options.get(
+        CONF_COMMAND_WINDOW, DEFAULT_COMMAND_WINDOW
+    )
+    hass_data.commands.skip_redundant = entry.options.get(
+        CONF_SKIP_REDUNDANT, DEFAULT_SKIP_REDUNDANT
+    )
+    hass_data.commands.force_devices = set(entry.options.get(CONF_FORCE_DEVICES, []))
+    hass_data.optimistic.timeout = entry.options.get(
+        CONF_OPTIMISTIC_TIMEOUT, DEFAULT_OPTIMISTIC_TIMEOUT
+    )
+
+    # Local control listens for device broadcasts, the cloud stays in use
+    # for devices that are not connected locally.
+    if entry.options.get(CONF_LOCAL_CONTROL, DEFAULT_LOCAL_CONTROL):
+        hass_data.commands.local = hass_data.local
+        if not hass_data.local.running:
+            hass.async_create_task(hass_data.local.async_start())
+    else:
+        hass_data.commands.local = None
+        hass_data.local.async_stop()
+
+    hass_data.tracer.configure(
+        entry.options.get(CONF_DEBUG_TRACE, DEFAULT_DEBUG_TRACE),
+        entry.options.get(CONF_TRACE_DEVICES, []),
+        entry.options.get(CONF_TRACE_SAMPLE_RATE, DEFAULT_TRACE_SAMPLE_RATE),
+    )
+    hass_data.statistics.set_window(
+        entry.options.get(CONF_STATISTICS_WINDOW, DEFAULT_STATISTICS_WINDOW) * 60
+    )
+
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Handle config entry updates."""
+    async_apply_options(hass, entry)
 
 
 @callback
-def async_migrate_entities_unique_ids(
+def async_reconcile_device_registry(
         hass: HomeAssistant, config_entry: ConfigEntry, device_manager: Manager
 ) -> None:
-    """Migrate unique_ids in the entity registry to the new format."""
-    entity_registry = er.async_get(hass)
-    registry_entries = er.async_entries_for_config_entry(
-        entity_registry, config_entry.entry_id
-    )
-    light_entries = {
-        entry.unique_id: entry
-        for entry in registry_entries
-        if entry.domain == LIGHT_DOMAIN
-    }
-    switch_entries = {
-        entry.unique_id: entry
-        for entry in registry_entries
-        if entry.domain == SWITCH_DOMAIN
-    }
+    """Reconcile the registered devices of a config entry with the device map.
 
-    for device in device_manager.device_map.values():
-        # Old lights where in `smartlife.{device_id}` format, now the DPCode is added.
-        #
-        # If the device is a previously supported light category and still has
-        # the old format for the unique ID, migrate it to the new format.
-        #
-        # Previously only devices providing the SWITCH_LED DPCode were supported,
-        # thus this can be added to those existing IDs.
-        #
-        # `smartlife.{device_id}` -> `smartlife.{device_id}{SWITCH_LED}`
-        if (
-                device.category in ("dc", "dd", "dj", "fs", "fwl", "jsq", "xdd", "xxj")
-                and (entry := light_entries.get(f"smartlife.{device.id}"))
-                and f"smartlife.{device.id}{DPCode.SWITCH_LED}" not in light_entries
-        ):
-            entity_registry.async_update_entity(
-                entry.entity_id, new_unique_id=f"smartlife.{device.id}{DPCode.SWITCH_LED}"
-            )
+    Only the devices of this config entry are looked up, through the config
+    entry index of the registry. Removed devices are detached from the
+    config entry, new devices are created and renamed devices are updated,
+    the registry saves all changes at once.
+    """
+    device_registry = dr.async_get(hass)
+    registered: dict[str, dr.DeviceEntry] = {}
+    for device_entry in dr.async_entries_for_config_entry(
+            device_registry, config_entry.entry_id
+    ):
+        for domain, identifier in device_entry.identifiers:
+            if domain == DOMAIN:
+                registered[identifier] = device_entry
+                break
+
+    # The hub device of the config entry holds its metrics
+    registered.pop(config_entry.entry_id, None)
+
+    device_map = device_manager.device_map
+    for device_id in registered.keys() - device_map.keys():
+        device_registry.async_update_device(
+            registered[device_id].id, remove_config_entry_id=config_entry.entry_id
+        )
+
+    for device_id in device_map.keys() - registered.keys():
+        device = device_map[device_id]
+        device_registry.async_get_or_create(
+            config_entry_id=config_entry.entry_id,
+            identifiers={(DOMAIN, device.id)},
+            manufacturer="smartlife",
+            name=device.name,
+            model=f"{device.product_name} (unsupported)",
+        )
+
+    for device_id in device_map.keys() & registered.keys():
+        device_entry = registered[device_id]
+        if device_entry.name != (name := device_map[device_id].name):
+            device_registry.async_update_device(device_entry.id, name=name)
 
-        # Old switches has different formats for the unique ID, but is mappable.
-        #
-        # If the device is a previously supported switch category and still has
-        # the old format for the unique ID, migrate it to the new format.
-        #
-        # `smartlife.{device_id}` -> `smartlife.{device_id}{SWITCH}`
-        # `smartlife.{device_id}_1` -> `smartlife.{device_id}{SWITCH_1}`
-        # ...
-        # `smartlife.{device_id}_6` -> `smartlife.{device_id}{SWITCH_6}`
-        # `smartlife.{device_id}_usb1` -> `smartlife.{device_id}{SWITCH_USB1}`
-        # ...
-        # `smartlife.{device_id}_usb6` -> `smartlife.{device_id}{SWITCH_USB6}`
-        #
-        # In all other cases, the unique ID is not changed.
-        if device.category in ("bh", "cwysj", "cz", "dlq", "kg", "kj", "pc", "xxj"):
-            for postfix, dpcode in (
-                    ("", DPCode.SWITCH),
-                    ("_1", DPCode.SWITCH_1),
-                    ("_2", DPCode.SWITCH_2),
-                    ("_3", DPCode.SWITCH_3),
-                    ("_4", DPCode.SWITCH_4),
-                    ("_5", DPCode.SWITCH_5),
-                    ("_6", DPCode.SWITCH_6),
-                    ("_usb1", DPCode.SWITCH_USB1),
-                    ("_usb2", DPCode.SWITCH_USB2),
-                    ("_usb3", DPCode.SWITCH_USB3),
-                    ("_usb4", DPCode.SWITCH_USB4),
-                    ("_usb5", DPCode.SWITCH_USB5),
-                    ("_usb6", DPCode.SWITCH_USB6),
-            ):
-                if (
-                        entry := switch_entries.get(f"smartlife.{device.id}{postfix}")
-                ) and f"smartlife.{device.id}{dpcode}" not in switch_entries:
-                    entity_registry.async_update_entity(
-                        entry.entity_id, new_unique_id=f"smartlife.{device.id}{dpcode}"
-                    )
+
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Migrate an old config entry."""
+    return await async_migrate_config_entry(hass, entry)
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unloading the smartlife platforms."""
 
     LOGGER.debug("unload entry id = %s", entry.entry_id)
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    hass_data: HomeAssistantSmartLifeData = hass.data[DOMAIN][entry.entry_id]
+    hass_data.dispatcher.async_stop()
+    hass_data.commands.async_stop()
+    hass_data.local.async_stop()
+    if (recorder := hass_data.listener.recorder) is not None:
+        hass_data.listener.recorder = None
+        await recorder.async_stop()
+    platforms = set(hass_data.discovery.platforms)
+    hass_data.discovery.async_reset()
+    return await hass.config_entries.async_unload_platforms(entry, platforms)
 
 
 async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
@@ -195,9 +402,11 @@ async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
         hass_data.manager.mq.stop()
     hass_data.manager.remove_device_listener(hass_data.listener)
     await hass.async_add_executor_job(hass_data.manager.unload)
+    await hass_data.snapshot.async_remove()
     hass.data[DOMAIN].pop(entry.entry_id)
     if not hass.data[DOMAIN]:
         hass.data.pop(DOMAIN)
+        async_unregister_services(hass)
     pass
 
 
@@ -208,19 +417,29 @@ class DeviceListener(SharingDeviceListener):
             self,
             hass: HomeAssistant,
             manager: Manager,
+            dispatcher: UpdateDispatcher,
+            optimistic: OptimisticState,
+            commands: CommandBuffer,
+            tracer: DebugTracer,
     ) -> None:
         """Init DeviceListener."""
         self.hass = hass
         self.manager = manager
+        self.dispatcher = dispatcher
+        self.optimistic = optimistic
+        self.commands = commands
+        self.tracer = tracer
+        self.recorder: TraceRecorder | None = None
 
     def update_device(self, device: CustomerDevice) -> None:
         """Update device status."""
-        LOGGER.debug(
-            "Received update for device %s: %s",
-            device.id,
-            self.manager.device_map[device.id].status,
-        )
-        dispatcher_send(self.hass, f"{SMART_LIFE_HA_SIGNAL_UPDATE_ENTITY}_{device.id}")
+        if self.tracer.enabled and self.tracer.is_tracing(device.id):
+            self.tracer.trace(
+                "update", device.id, online=device.online, status=dict(device.status)
+            )
+        if self.recorder is not None:
+            self.recorder.record(device)
+        self.dispatcher.update_device(device)
 
     def add_device(self, device: CustomerDevice) -> None:
         """Add device added listener."""
@@ -237,6 +456,7 @@ class DeviceListener(SharingDeviceListener):
     def async_remove_device(self, device_id: str) -> None:
         """Remove device from Home Assistant."""
         LOGGER.debug("Remove device: %s", device_id)
+        self.async_forget_device(device_id)
         device_registry = dr.async_get(self.hass)
         device_entry = device_registry.async_get_device(
             identifiers={(DOMAIN, device_id)}
@@ -244,6 +464,37 @@ class DeviceListener(SharingDeviceListener):
         if device_entry is not None:
             device_registry.async_remove_device(device_entry.id)
 
+    @callback
+    def async_forget_device(self, device_id: str) -> None:
+        """Drop the update, optimistic, command and schema state of a device."""
+        self.dispatcher.async_remove_device(device_id)
+        self.optimistic.async_remove_device(device_id)
+        self.commands.async_remove_device(device_id)
+        remove_device_schema(device_id)
+
+    async def async_remove_entities(self, device_id: str) -> None:
+        """Remove the entities of a device, keeping their registry entries.
+
+        The registry entries, with the names, areas and disabled flags set by
+        the user, are picked up again by the entities created next.
+        """
+        device_entry = dr.async_get(self.hass).async_get_device(
+            identifiers={(DOMAIN, device_id)}
+        )
+        if device_entry is None:
+            return
+        entity_ids = {
+            registry_entry.entity_id
+            for registry_entry in er.async_entries_for_device(
+                er.async_get(self.hass),
+                device_entry.id,
+                include_disabled_entities=True,
+            )
+        }
+        for platform in async_get_platforms(self.hass, DOMAIN):
+            for entity_id in entity_ids & platform.entities.keys():
+                await platform.async_remove_entity(entity_id)
+
 
 class TokenListener(SharingTokenListener):
     def __init__(
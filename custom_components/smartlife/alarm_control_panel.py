@@ -15,14 +15,15 @@ from homeassistant.const import (
     STATE_ALARM_ARMED_HOME,
     STATE_ALARM_DISARMED,
     STATE_ALARM_TRIGGERED,
+    Platform,
 )
-from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import HomeAssistantSmartLifeData
 from .base import SmartLifeEntity
-from .const import DOMAIN, SMART_LIFE_DISCOVERY_NEW, DPCode, DPType
+from .command import CommandPriority
+from .const import DOMAIN, DPCode, DPType
 
 
 class Mode(StrEnum):
@@ -62,26 +63,11 @@ async def async_setup_entry(
     """Set up Smart Life alarm dynamically through Smart Life discovery."""
     hass_data: HomeAssistantSmartLifeData = hass.data[DOMAIN][entry.entry_id]
 
-    @callback
-    def async_discover_device(device_ids: list[str]) -> None:
-        """Discover and add a discovered Smart Life siren."""
-        entities: list[SmartLifeAlarmEntity] = []
-        for device_id in device_ids:
-            device = hass_data.manager.device_map[device_id]
-            if descriptions := ALARM.get(device.category):
-                for description in descriptions:
-                    if description.key in device.status:
-                        entities.append(
-                            SmartLifeAlarmEntity(
-                                device, hass_data.manager, description
-                            )
-                        )
-        async_add_entities(entities)
-
-    async_discover_device([*hass_data.manager.device_map])
-
-    entry.async_on_unload(
-        async_dispatcher_connect(hass, SMART_LIFE_DISCOVERY_NEW, async_discover_device)
+    hass_data.discovery.async_register_descriptions(
+        Platform.ALARM_CONTROL_PANEL,
+        async_add_entities,
+        ALARM,
+        SmartLifeAlarmEntity,
     )
 
 
@@ -89,6 +75,7 @@ class SmartLifeAlarmEntity(SmartLifeEntity, AlarmControlPanelEntity):
     """Smart Life Alarm Entity."""
 
     _attr_icon = "mdi:security"
+    _command_priority = CommandPriority.SECURITY
 
     def __init__(
         self,
@@ -121,20 +108,30 @@ class SmartLifeAlarmEntity(SmartLifeEntity, AlarmControlPanelEntity):
             return None
         return STATE_MAPPING.get(status)
 
-    def alarm_disarm(self, code: str | None = None) -> None:
+    async def async_alarm_disarm(self, code: str | None = None) -> None:
         """Send Disarm command."""
-        self._send_command(
-            [{"code": self.entity_description.key, "value": Mode.DISARMED}]
+        await self._async_send_command(
+            [{"code": self.entity_description.key, "value": Mode.DISARMED}],
+            force=True,
         )
 
-    def alarm_arm_home(self, code: str | None = None) -> None:
+    async def async_alarm_arm_home(self, code: str | None = None) -> None:
         """Send Home command."""
-        self._send_command([{"code": self.entity_description.key, "value": Mode.HOME}])
+        await self._async_send_command(
+            [{"code": self.entity_description.key, "value": Mode.HOME}],
+            force=True,
+        )
 
-    def alarm_arm_away(self, code: str | None = None) -> None:
+    async def async_alarm_arm_away(self, code: str | None = None) -> None:
         """Send Arm command."""
-        self._send_command([{"code": self.entity_description.key, "value": Mode.ARM}])
+        await self._async_send_command(
+            [{"code": self.entity_description.key, "value": Mode.ARM}],
+            force=True,
+        )
 
-    def alarm_trigger(self, code: str | None = None) -> None:
+    async def async_alarm_trigger(self, code: str | None = None) -> None:
         """Send SOS command."""
-        self._send_command([{"code": self.entity_description.key, "value": Mode.SOS}])
+        await self._async_send_command(
+            [{"code": self.entity_description.key, "value": Mode.SOS}],
+            force=True,
+        )
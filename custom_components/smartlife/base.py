@@ -2,20 +2,27 @@
 from __future__ import annotations
 
 import base64
-from dataclasses import dataclass
+from collections.abc import Callable, Hashable, Sequence
+from dataclasses import dataclass, fields
 import json
 import struct
-from typing import Any, Literal, overload
+from typing import Any, Literal, TypeVar, overload
 
 from tuya_sharing import Manager, CustomerDevice
 from typing_extensions import Self
 
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
-from homeassistant.helpers.entity import DeviceInfo, Entity
+from homeassistant.core import callback
+from homeassistant.helpers.entity import DeviceInfo, Entity, EntityCategory
 
-from .const import DOMAIN, LOGGER, SMART_LIFE_HA_SIGNAL_UPDATE_ENTITY, DPCode, DPType
+from .command import CommandBuffer, CommandPriority
+from .const import DOMAIN, LOGGER, DPCode, DPType
+from .metrics import COUNTERS
+from .tracing import get_tracer
+from .optimistic import OptimisticState
 from .util import remap_value
 
+_T = TypeVar("_T")
+
 
 @dataclass
 class IntegerTypeData:
@@ -75,6 +82,7 @@ class IntegerTypeData:
     @classmethod
     def from_json(cls, dpcode: DPCode, data: str) -> IntegerTypeData | None:
         """Load JSON string and return a IntegerTypeData object."""
+        COUNTERS.json_parse += 1
         if not (parsed := json.loads(data)):
             return None
 
@@ -99,6 +107,7 @@ class EnumTypeData:
     @classmethod
     def from_json(cls, dpcode: DPCode, data: str) -> EnumTypeData | None:
         """Load JSON string and return a EnumTypeData object."""
+        COUNTERS.json_parse += 1
         if not (parsed := json.loads(data)):
             return None
         return cls(dpcode, **parsed)
@@ -115,25 +124,278 @@ class ElectricityTypeData:
     @classmethod
     def from_json(cls, data: str) -> Self:
         """Load JSON string and return a ElectricityTypeData object."""
+        COUNTERS.json_parse += 1
         return cls(**json.loads(data.lower()))
 
     @classmethod
     def from_raw(cls, data: str) -> Self:
         """Decode base64 string and return a ElectricityTypeData object."""
-        raw = base64.b64decode(data)
-        voltage = struct.unpack(">H", raw[0:2])[0] / 10.0
-        electriccurrent = struct.unpack(">L", b"\x00" + raw[2:5])[0] / 1000.0
-        power = struct.unpack(">L", b"\x00" + raw[5:8])[0] / 1000.0
-        return cls(
-            electriccurrent=str(electriccurrent), power=str(power), voltage=str(voltage)
+        return cls.from_raw_batch((data,))[0]
+
+    @classmethod
+    def from_raw_batch(cls, data: Sequence[str]) -> list[Self]:
+        """Decode base64 strings of several phases with a single unpack.
+
+        A phase is a 16 bit voltage (0.1 V) followed by a 24 bit current
+        (mA) and a 24 bit power (W / 1000), big endian. The 24 bit values
+        are unpacked as a high byte and a low 16 bit word.
+        """
+        raw = [base64.b64decode(item) for item in data]
+        if any(len(item) < _PHASE_SIZE for item in raw):
+            raise struct.error(f"phase data requires {_PHASE_SIZE} bytes")
+        values = struct.unpack_from(
+            f">{_PHASE_FORMAT * len(raw)}",
+            b"".join(item[:_PHASE_SIZE] for item in raw),
+        )
+        COUNTERS.electricity_decode += len(raw)
+        return [
+            cls(
+                electriccurrent=str((values[i + 1] << 16 | values[i + 2]) / 1000.0),
+                power=str((values[i + 3] << 16 | values[i + 4]) / 1000.0),
+                voltage=str(values[i] / 10.0),
+            )
+            for i in range(0, len(values), len(_PHASE_FORMAT))
+        ]
+
+
+_PHASE_FORMAT = "HBHBH"
+_PHASE_SIZE = struct.calcsize(f">{_PHASE_FORMAT}")
+
+# Decoded electricity values of each device, by DPCode:
+# (data type, raw value, decoded value)
+_DEVICE_ELECTRICITY: dict[
+    str, dict[str, tuple[DPType, Any, ElectricityTypeData]]
+] = {}
+
+
+def get_electricity_data(
+        device: CustomerDevice, dpcode: str, dptype: DPType
+) -> ElectricityTypeData:
+    """Return the decoded JSON or raw electricity value of a DPCode.
+
+    Values are decoded once per raw value and shared by all entities of the
+    device reading a subkey of them. When a raw value changed, the changed
+    raw values of the other phases seen before are decoded along with it.
+    """
+    values = _DEVICE_ELECTRICITY.setdefault(device.id, {})
+    value = device.status[dpcode]
+    if (cached := values.get(dpcode)) is not None and cached[1] == value:
+        COUNTERS.electricity_cached += 1
+        return cached[2]
+
+    if dptype is DPType.JSON:
+        COUNTERS.electricity_decode += 1
+        values[dpcode] = (dptype, value, ElectricityTypeData.from_json(value))
+        return values[dpcode][2]
+
+    stale = {dpcode: value}
+    for code, (code_type, raw, _) in values.items():
+        if (
+                code_type is DPType.RAW
+                and code != dpcode
+                and isinstance(current := device.status.get(code), str)
+                and current != raw
+        ):
+            stale[code] = current
+    try:
+        decoded = ElectricityTypeData.from_raw_batch(list(stale.values()))
+    except (ValueError, struct.error):
+        # Don't let an invalid value of another phase fail this one
+        if len(stale) == 1:
+            raise
+        stale = {dpcode: value}
+        decoded = ElectricityTypeData.from_raw_batch((value,))
+    for (code, raw), data in zip(stale.items(), decoded):
+        values[code] = (DPType.RAW, raw, data)
+    return values[dpcode][2]
+
+
+class DeviceSchema:
+    """Pre-parsed function and status range schema of a device.
+
+    DPCode lookups and their parsed type data are resolved once and memoized,
+    until the functions or status ranges of the device are replaced. Devices
+    of the same product with an identical schema share a single instance,
+    including everything memoized on it.
+    """
+
+    def __init__(self, device: CustomerDevice) -> None:
+        """Init DeviceSchema."""
+        self.product_id = device.product_id
+        self.function = device.function
+        self.status_range = device.status_range
+        self.devices = 0
+        self._memo: dict[Hashable, Any] = {}
+        self._dpcodes: dict[
+            tuple[DPCode, DPType | None, bool],
+            DPCode | EnumTypeData | IntegerTypeData | None,
+        ] = {}
+        self._dptypes: dict[tuple[DPCode, bool], DPType | None] = {}
+        self._values: dict[DPCode, Any] = {}
+
+    def is_current(self, device: CustomerDevice) -> bool:
+        """Return if the schema still matches the device."""
+        return (
+            self.function is device.function
+            and self.status_range is device.status_range
         )
 
+    def find_dpcode(
+            self, dpcode: DPCode, dptype: DPType | None, prefer_function: bool
+    ) -> DPCode | EnumTypeData | IntegerTypeData | None:
+        """Find a DPCode in the functions or status ranges."""
+        key = (dpcode, dptype, prefer_function)
+        try:
+            return self._dpcodes[key]
+        except KeyError:
+            pass
+
+        COUNTERS.find_dpcode_resolved += 1
+        result: DPCode | EnumTypeData | IntegerTypeData | None = None
+        for items in self._order(prefer_function):
+            if dpcode not in items:
+                continue
+            if dptype == DPType.ENUM and items[dpcode].type == DPType.ENUM:
+                values = items[dpcode].values
+                if not (enum_type := EnumTypeData.from_json(dpcode, values)):
+                    continue
+                result = enum_type
+                break
+
+            if dptype == DPType.INTEGER and items[dpcode].type == DPType.INTEGER:
+                if not (
+                        integer_type := IntegerTypeData.from_json(
+                            dpcode, items[dpcode].values
+                        )
+                ):
+                    continue
+                result = integer_type
+                break
+
+            if dptype not in (DPType.ENUM, DPType.INTEGER):
+                result = dpcode
+                break
+
+        self._dpcodes[key] = result
+        return result
+
+    def get_dptype(self, dpcode: DPCode, prefer_function: bool) -> DPType | None:
+        """Find the data type of a DPCode."""
+        key = (dpcode, prefer_function)
+        if key not in self._dptypes:
+            self._dptypes[key] = next(
+                (
+                    DPType(items[dpcode].type)
+                    for items in self._order(prefer_function)
+                    if dpcode in items
+                ),
+                None,
+            )
+        return self._dptypes[key]
+
+    def get_values(self, dpcode: DPCode) -> Any:
+        """Return the parsed values of a DPCode, preferring its function."""
+        if dpcode not in self._values:
+            if dpcode in self.function:
+                values = self.function[dpcode].values
+            else:
+                values = self.status_range[dpcode].values
+            COUNTERS.json_parse += 1
+            self._values[dpcode] = json.loads(values)
+        return self._values[dpcode]
+
+    def memoize(self, key: Hashable, factory: Callable[[], _T]) -> _T:
+        """Return a value derived from this schema, computing it only once."""
+        try:
+            return self._memo[key]
+        except KeyError:
+            value = self._memo[key] = factory()
+            return value
+
+    def _order(self, prefer_function: bool) -> tuple[dict[str, Any], dict[str, Any]]:
+        """Return the lookup order of functions and status ranges."""
+        if prefer_function:
+            return self.function, self.status_range
+        return self.status_range, self.function
+
+
+_DEVICE_SCHEMAS: dict[str, DeviceSchema] = {}
+_PRODUCT_SCHEMAS: dict[tuple[str, Hashable], DeviceSchema] = {}
+
+
+def get_device_schema(device: CustomerDevice) -> DeviceSchema:
+    """Return the schema of a device, rebuilding it when it changed.
+
+    Schemas are interned per product and schema fingerprint. An interned
+    device is pointed at the functions and status ranges of the shared
+    schema, so identical devices don't each keep their own copy.
+    """
+    schema = _DEVICE_SCHEMAS.get(device.id)
+    if schema is not None and schema.is_current(device):
+        return schema
+
+    if schema is not None:
+        _release_schema(schema)
+
+    key = (device.product_id, _schema_fingerprint(device))
+    if (schema := _PRODUCT_SCHEMAS.get(key)) is None:
+        LOGGER.debug("Build DPCode schema for product %s", device.product_id)
+        schema = _PRODUCT_SCHEMAS[key] = DeviceSchema(device)
+    else:
+        device.function = schema.function
+        device.status_range = schema.status_range
+
+    schema.devices += 1
+    _DEVICE_SCHEMAS[device.id] = schema
+    return schema
+
+
+def remove_device_schema(device_id: str) -> None:
+    """Drop the schema and decoded values of a removed device."""
+    _DEVICE_ELECTRICITY.pop(device_id, None)
+    if (schema := _DEVICE_SCHEMAS.pop(device_id, None)) is not None:
+        _release_schema(schema)
+
+
+def schema_stats() -> dict[str, int]:
+    """Return the number of devices and interned product schemas."""
+    return {"devices": len(_DEVICE_SCHEMAS), "product_schemas": len(_PRODUCT_SCHEMAS)}
+
+
+def _release_schema(schema: DeviceSchema) -> None:
+    """Release a device reference to a schema, dropping it when unused."""
+    schema.devices -= 1
+    if schema.devices <= 0:
+        for key, product_schema in list(_PRODUCT_SCHEMAS.items()):
+            if product_schema is schema:
+                del _PRODUCT_SCHEMAS[key]
+
+
+def _schema_fingerprint(device: CustomerDevice) -> Hashable:
+    """Return a fingerprint of everything the schema of a device depends on."""
+    return (
+        tuple(
+            sorted(
+                (code, item.type, str(item.values))
+                for code, item in device.function.items()
+            )
+        ),
+        tuple(
+            sorted(
+                (code, item.type, str(item.values))
+                for code, item in device.status_range.items()
+            )
+        ),
+        frozenset(device.status),
+    )
+
 
 class SmartLifeEntity(Entity):
     """SmartLife base device."""
 
     _attr_has_entity_name = True
     _attr_should_poll = False
+    _command_priority = CommandPriority.DEFAULT
 
     def __init__(self, device: CustomerDevice, device_manager: Manager) -> None:
         """Init SmartLifeHaEntity."""
@@ -141,6 +403,10 @@ class SmartLifeEntity(Entity):
         device.set_up = True
         self.device = device
         self.device_manager = device_manager
+        self._found_dpcodes: set[str] = set()
+        self._tracer = get_tracer(device_manager)
+        self._commands: CommandBuffer | None = None
+        self._optimistic: OptimisticState | None = None
 
     @property
     def device_info(self) -> DeviceInfo:
@@ -194,6 +460,7 @@ class SmartLifeEntity(Entity):
             dptype: DPType | None = None,
     ) -> DPCode | EnumTypeData | IntegerTypeData | None:
         """Find a matching DP code available on for this device."""
+        COUNTERS.find_dpcode += 1
         if dpcodes is None:
             return None
 
@@ -202,48 +469,31 @@ class SmartLifeEntity(Entity):
         elif not isinstance(dpcodes, tuple):
             dpcodes = (dpcodes,)
 
-        order = ["status_range", "function"]
-        if prefer_function:
-            order = ["function", "status_range"]
-
-        # When we are not looking for a specific datatype, we can append status for
-        # searching
-        if not dptype:
-            order.append("status")
-
+        schema = get_device_schema(self.device)
         for dpcode in dpcodes:
-            for key in order:
-                if dpcode not in getattr(self.device, key):
-                    continue
-                if (
-                        dptype == DPType.ENUM
-                        and getattr(self.device, key)[dpcode].type == DPType.ENUM
-                ):
-                    if not (
-                            enum_type := EnumTypeData.from_json(
-                                dpcode, getattr(self.device, key)[dpcode].values
-                            )
-                    ):
-                        continue
-                    return enum_type
-
-                LOGGER.debug("dpcode get device=%s dpcode=%s key=%s", self.device, dpcode, key)
-
-                if (
-                        dptype == DPType.INTEGER
-                        and getattr(self.device, key)[dpcode].type == DPType.INTEGER
-                ):
-                    if not (
-                            integer_type := IntegerTypeData.from_json(
-                                dpcode, getattr(self.device, key)[dpcode].values
-                            )
-                    ):
-                        continue
-                    return integer_type
-
-                if dptype not in (DPType.ENUM, DPType.INTEGER):
-                    return dpcode
-
+            result = schema.find_dpcode(dpcode, dptype, prefer_function)
+
+            # When we are not looking for a specific datatype, we can fall back
+            # to the status for searching
+            if result is None and not dptype and dpcode in self.device.status:
+                result = dpcode
+
+            if result is not None:
+                self._found_dpcodes.add(dpcode)
+                if self._tracer.enabled and self._tracer.is_tracing(self.device.id):
+                    self._tracer.trace(
+                        "find_dpcode",
+                        self.device.id,
+                        dpcode=dpcode,
+                        dptype=dptype,
+                        result=result,
+                    )
+                return result
+
+        if self._tracer.enabled and self._tracer.is_tracing(self.device.id):
+            self._tracer.trace(
+                "find_dpcode", self.device.id, dpcodes=dpcodes, dptype=dptype
+            )
         return None
 
     def get_dptype(
@@ -253,26 +503,98 @@ class SmartLifeEntity(Entity):
         if dpcode is None:
             return None
 
-        order = ["status_range", "function"]
-        if prefer_function:
-            order = ["function", "status_range"]
-        for key in order:
-            if dpcode in getattr(self.device, key):
-                return DPType(getattr(self.device, key)[dpcode].type)
-
-        return None
+        return get_device_schema(self.device).get_dptype(dpcode, prefer_function)
+
+    def state_dpcodes(self) -> set[str] | None:
+        """Return the DPCodes the state of this entity is derived from.
+
+        By default these are the DPCodes referenced by the entity description
+        and the DPCodes resolved through `find_dpcode`. Entities reading other
+        DPCodes should extend this set, or return None to be updated on any
+        change of the device.
+        """
+        dpcodes = set(self._found_dpcodes)
+        if (description := getattr(self, "entity_description", None)) is None:
+            return dpcodes
+
+        dpcodes.add(description.key)
+        for description_field in fields(description):
+            value = getattr(description, description_field.name)
+            if isinstance(value, DPCode):
+                dpcodes.add(value)
+            elif isinstance(value, tuple):
+                dpcodes.update(item for item in value if isinstance(item, DPCode))
+        return dpcodes
 
     async def async_added_to_hass(self) -> None:
         """Call when entity is added to hass."""
+        hass_data = self.hass.data[DOMAIN][self.platform.config_entry.entry_id]
+        self._commands = hass_data.commands
+        self._optimistic = hass_data.optimistic
         self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass,
-                f"{SMART_LIFE_HA_SIGNAL_UPDATE_ENTITY}_{self.device.id}",
-                self.async_write_ha_state,
+            hass_data.dispatcher.async_connect(
+                self.device.id, self._async_handle_update, self.state_dpcodes()
             )
         )
 
+    @callback
+    def _async_handle_update(self) -> None:
+        """Handle a change of the DPCodes, or availability, of this entity."""
+        self.async_write_ha_state()
+
+    async def _async_send_command(
+            self, commands: list[dict[str, Any]], force: bool = False
+    ) -> None:
+        """Send command to the device, without occupying an executor thread.
+
+        Commands whose value already matches the device status are dropped,
+        unless forced. Action DPCodes, like cover controls or vacuum power_go,
+        only hold the last command sent and not the device state, so their
+        commands must be forced. The sent values are applied optimistically,
+        and rolled back when sending the command fails.
+        """
+        if self._commands is None or self._optimistic is None:
+            await self.hass.async_add_executor_job(self._send_command, commands)
+            return
+
+        if not force:
+            commands = self._commands.async_filter_redundant(self.device, commands)
+            if not commands:
+                return
+
+        sent_at = self._optimistic.async_apply(self.device, commands)
+        try:
+            await self._commands.async_send_commands(
+                self.device.id, commands, self._get_command_priority()
+            )
+        except Exception:
+            if sent_at is not None:
+                self._optimistic.async_rollback(
+                    self.device, [command["code"] for command in commands], sent_at
+                )
+            raise
+
+    def _get_command_priority(self) -> CommandPriority:
+        """Return the priority of the commands of this entity."""
+        if (
+                self._command_priority is CommandPriority.DEFAULT
+                and self.entity_category is EntityCategory.CONFIG
+        ):
+            return CommandPriority.CONFIG
+        return self._command_priority
+
     def _send_command(self, commands: list[dict[str, Any]]) -> None:
-        """Send command to the device."""
-        LOGGER.debug("Sending commands for device %s: %s", self.device.id, commands)
-        self.device_manager.send_commands(self.device.id, commands)
+        """Send command to the device.
+
+        Commands are merged with commands sent to the same device by other
+        entities within the command window, and sent as one batch. Blocks
+        until the batch has been sent.
+        """
+        if self._commands is None:
+            LOGGER.debug("Sending commands for device %s: %s", self.device.id, commands)
+            self.device_manager.send_commands(self.device.id, commands)
+            return
+
+        self._commands.send_commands(
+            self.device.id, commands, self._get_command_priority()
+        ).result()
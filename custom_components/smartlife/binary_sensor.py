@@ -11,14 +11,13 @@ from homeassistant.components.binary_sensor import (
     BinarySensorEntityDescription,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import EntityCategory
-from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.const import EntityCategory, Platform
+from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import HomeAssistantSmartLifeData
 from .base import SmartLifeEntity
-from .const import DOMAIN, SMART_LIFE_DISCOVERY_NEW, DPCode
+from .const import DOMAIN, DPCode
 
 
 @dataclass
@@ -350,34 +349,25 @@ BINARY_SENSORS: dict[str, tuple[SmartLifeBinarySensorEntityDescription, ...]] =
 }
 
 
+def _is_supported(
+    device: CustomerDevice, description: SmartLifeBinarySensorEntityDescription
+) -> bool:
+    """Return if a device reports the DPCode of a binary sensor."""
+    return (description.dpcode or description.key) in device.status
+
+
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
     """Set up smartlife binary sensor dynamically through smartlife discovery."""
     hass_data: HomeAssistantSmartLifeData = hass.data[DOMAIN][entry.entry_id]
 
-    @callback
-    def async_discover_device(device_ids: list[str]) -> None:
-        """Discover and add a discovered smartlife binary sensor."""
-        entities: list[SmartLifeBinarySensorEntity] = []
-        for device_id in device_ids:
-            device = hass_data.manager.device_map[device_id]
-            if descriptions := BINARY_SENSORS.get(device.category):
-                for description in descriptions:
-                    dpcode = description.dpcode or description.key
-                    if dpcode in device.status:
-                        entities.append(
-                            SmartLifeBinarySensorEntity(
-                                device, hass_data.manager, description
-                            )
-                        )
-
-        async_add_entities(entities)
-
-    async_discover_device([*hass_data.manager.device_map])
-
-    entry.async_on_unload(
-        async_dispatcher_connect(hass, SMART_LIFE_DISCOVERY_NEW, async_discover_device)
+    hass_data.discovery.async_register_descriptions(
+        Platform.BINARY_SENSOR,
+        async_add_entities,
+        BINARY_SENSORS,
+        SmartLifeBinarySensorEntity,
+        _is_supported,
     )
 
 
@@ -0,0 +1,59 @@
+"""Bootstrap phase tracking for Smart Life config entries."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import time
+from typing import Any, TypeVar
+
+from homeassistant.core import HomeAssistant, callback
+
+_T = TypeVar("_T")
+
+
+class Bootstrap:
+    """Run the bootstrap phases of a config entry and record their duration.
+
+    Independent phases are started as tasks so they run concurrently, phases
+    depending on them await their result by name.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Init Bootstrap."""
+        self.hass = hass
+        self.timings: dict[str, float] = {}
+        self._tasks: dict[str, asyncio.Task[Any]] = {}
+
+    @callback
+    def async_add_executor_job(
+            self, phase: str, target: Callable[..., _T], *args: Any
+    ) -> asyncio.Task[_T]:
+        """Start a blocking phase in the executor."""
+        return self.async_create_task(
+            phase, self.hass.async_add_executor_job(target, *args)
+        )
+
+    @callback
+    def async_create_task(
+            self, phase: str, target: Awaitable[_T]
+    ) -> asyncio.Task[_T]:
+        """Start a phase as task."""
+        task = self.hass.async_create_task(self.async_run(phase, target))
+        self._tasks[phase] = task
+        return task
+
+    async def async_run(self, phase: str, target: Awaitable[_T]) -> _T:
+        """Run a phase and record how long it took."""
+        start = time.monotonic()
+        try:
+            return await target
+        finally:
+            self.timings[phase] = round(time.monotonic() - start, 3)
+
+    async def async_result(self, phase: str) -> Any:
+        """Wait for a started phase and return its result."""
+        return await self._tasks[phase]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the duration of the bootstrap phases in seconds."""
+        return dict(self.timings)
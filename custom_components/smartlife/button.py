@@ -5,14 +5,13 @@ from tuya_sharing import Manager, CustomerDevice
 
 from homeassistant.components.button import ButtonEntity, ButtonEntityDescription
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import EntityCategory
-from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.const import EntityCategory, Platform
+from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import HomeAssistantSmartLifeData
 from .base import SmartLifeEntity
-from .const import DOMAIN, SMART_LIFE_DISCOVERY_NEW, DPCode
+from .const import DOMAIN, DPCode
 
 # All descriptions can be found here.
 # https://developer.tuya.com/en/docs/iot/standarddescription?id=K9i5ql6waswzq
@@ -69,27 +68,11 @@ async def async_setup_entry(
     """Set up smartlife buttons dynamically through smartlife discovery."""
     hass_data: HomeAssistantSmartLifeData = hass.data[DOMAIN][entry.entry_id]
 
-    @callback
-    def async_discover_device(device_ids: list[str]) -> None:
-        """Discover and add a discovered smartlife buttons."""
-        entities: list[SmartLifeButtonEntity] = []
-        for device_id in device_ids:
-            device = hass_data.manager.device_map[device_id]
-            if descriptions := BUTTONS.get(device.category):
-                for description in descriptions:
-                    if description.key in device.status:
-                        entities.append(
-                            SmartLifeButtonEntity(
-                                device, hass_data.manager, description
-                            )
-                        )
-
-        async_add_entities(entities)
-
-    async_discover_device([*hass_data.manager.device_map])
-
-    entry.async_on_unload(
-        async_dispatcher_connect(hass, SMART_LIFE_DISCOVERY_NEW, async_discover_device)
+    hass_data.discovery.async_register_descriptions(
+        Platform.BUTTON,
+        async_add_entities,
+        BUTTONS,
+        SmartLifeButtonEntity,
     )
 
 
@@ -107,6 +90,9 @@ class SmartLifeButtonEntity(SmartLifeEntity, ButtonEntity):
         self.entity_description = description
         self._attr_unique_id = f"{super().unique_id}{description.key}"
 
-    def press(self) -> None:
+    async def async_press(self) -> None:
         """Press the button."""
-        self._send_command([{"code": self.entity_description.key, "value": True}])
+        # A button is pressed every time, regardless of its reported state
+        await self._async_send_command(
+            [{"code": self.entity_description.key, "value": True}], force=True
+        )
@@ -6,13 +6,13 @@ from tuya_sharing import Manager, CustomerDevice
 from homeassistant.components import ffmpeg
 from homeassistant.components.camera import Camera as CameraEntity, CameraEntityFeature
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import HomeAssistantSmartLifeData
 from .base import SmartLifeEntity
-from .const import DOMAIN, SMART_LIFE_DISCOVERY_NEW, DPCode
+from .const import DOMAIN, DPCode
 
 # All descriptions can be found here:
 # https://developer.tuya.com/en/docs/iot/standarddescription?id=K9i5ql6waswzq
@@ -29,21 +29,11 @@ async def async_setup_entry(
     """Set up smartlife cameras dynamically through smartlife discovery."""
     hass_data: HomeAssistantSmartLifeData = hass.data[DOMAIN][entry.entry_id]
 
-    @callback
-    def async_discover_device(device_ids: list[str]) -> None:
-        """Discover and add a discovered smartlife camera."""
-        entities: list[SmartLifeCameraEntity] = []
-        for device_id in device_ids:
-            device = hass_data.manager.device_map[device_id]
-            if device.category in CAMERAS:
-                entities.append(SmartLifeCameraEntity(device, hass_data.manager))
-
-        async_add_entities(entities)
-
-    async_discover_device([*hass_data.manager.device_map])
-
-    entry.async_on_unload(
-        async_dispatcher_connect(hass, SMART_LIFE_DISCOVERY_NEW, async_discover_device)
+    hass_data.discovery.async_register_categories(
+        Platform.CAMERA,
+        async_add_entities,
+        CAMERAS,
+        SmartLifeCameraEntity,
     )
 
 
@@ -63,6 +53,10 @@ class SmartLifeCameraEntity(SmartLifeEntity, CameraEntity):
         CameraEntity.__init__(self)
         self._attr_model = device.product_name
 
+    def state_dpcodes(self) -> set[str] | None:
+        """Return the DPCodes the state of this entity is derived from."""
+        return super().state_dpcodes() | {DPCode.MOTION_SWITCH, DPCode.RECORD_SWITCH}
+
     @property
     def is_recording(self) -> bool:
         """Return true if the device is recording."""
@@ -95,10 +89,10 @@ class SmartLifeCameraEntity(SmartLifeEntity, CameraEntity):
             height=height,
         )
 
-    def enable_motion_detection(self) -> None:
+    async def async_enable_motion_detection(self) -> None:
         """Enable motion detection in the camera."""
-        self._send_command([{"code": DPCode.MOTION_SWITCH, "value": True}])
+        await self._async_send_command([{"code": DPCode.MOTION_SWITCH, "value": True}])
 
-    def disable_motion_detection(self) -> None:
+    async def async_disable_motion_detection(self) -> None:
         """Disable motion detection in camera."""
-        self._send_command([{"code": DPCode.MOTION_SWITCH, "value": False}])
+        await self._async_send_command([{"code": DPCode.MOTION_SWITCH, "value": False}])
@@ -0,0 +1,206 @@
+"""Device categories handled by the platforms.
+
+Generated by tools/platform_categories.py from the description tables of
+the platforms, do not edit.
+"""
+from __future__ import annotations
+
+from homeassistant.const import Platform
+
+# Platforms loaded for every config entry
+ALWAYS_LOADED: frozenset[Platform] = frozenset(
+    {
+        Platform.SCENE,
+        Platform.SENSOR,
+    }
+)
+
+# Platforms handling the devices of a category
+CATEGORY_PLATFORMS: dict[str, frozenset[Platform]] = {
+    "bh": frozenset({Platform.NUMBER, Platform.SENSOR, Platform.SWITCH}),
+    "ckmkzq": frozenset({Platform.COVER}),
+    "cl": frozenset(
+        {
+            Platform.COVER,
+            Platform.SELECT,
+            Platform.SENSOR,
+            Platform.SWITCH,
+        }
+    ),
+    "clkg": frozenset({Platform.COVER, Platform.LIGHT}),
+    "cn": frozenset({Platform.SWITCH}),
+    "co2bj": frozenset({Platform.BINARY_SENSOR, Platform.SENSOR}),
+    "cobj": frozenset({Platform.BINARY_SENSOR, Platform.SENSOR}),
+    "cs": frozenset(
+        {
+            Platform.FAN,
+            Platform.HUMIDIFIER,
+            Platform.SELECT,
+            Platform.SENSOR,
+        }
+    ),
+    "cwwsq": frozenset(
+        {
+            Platform.BINARY_SENSOR,
+            Platform.NUMBER,
+            Platform.SENSOR,
+            Platform.SWITCH,
+        }
+    ),
+    "cwysj": frozenset({Platform.SWITCH}),
+    "cz": frozenset(
+        {
+            Platform.LIGHT,
+            Platform.SELECT,
+            Platform.SENSOR,
+            Platform.SWITCH,
+        }
+    ),
+    "dc": frozenset({Platform.LIGHT}),
+    "dd": frozenset({Platform.LIGHT}),
+    "dgnbj": frozenset(
+        {
+            Platform.BINARY_SENSOR,
+            Platform.NUMBER,
+            Platform.SELECT,
+            Platform.SENSOR,
+            Platform.SIREN,
+        }
+    ),
+    "dj": frozenset({Platform.LIGHT, Platform.SWITCH}),
+    "dlq": frozenset({Platform.SENSOR, Platform.SWITCH}),
+    "fs": frozenset(
+        {
+            Platform.FAN,
+            Platform.LIGHT,
+            Platform.NUMBER,
+            Platform.SELECT,
+            Platform.SENSOR,
+            Platform.SWITCH,
+        }
+    ),
+    "fsd": frozenset({Platform.FAN, Platform.LIGHT}),
+    "fskg": frozenset({Platform.FAN}),
+    "fwd": frozenset({Platform.LIGHT}),
+    "gyd": frozenset({Platform.LIGHT}),
+    "hjjcy": frozenset({Platform.SENSOR}),
+    "hps": frozenset({Platform.BINARY_SENSOR, Platform.NUMBER}),
+    "hxd": frozenset({Platform.BUTTON, Platform.LIGHT, Platform.SWITCH}),
+    "jdcljqr": frozenset({Platform.COVER}),
+    "jqbj": frozenset({Platform.BINARY_SENSOR, Platform.SENSOR}),
+    "jsq": frozenset(
+        {
+            Platform.HUMIDIFIER,
+            Platform.LIGHT,
+            Platform.NUMBER,
+            Platform.SELECT,
+            Platform.SENSOR,
+            Platform.SWITCH,
+        }
+    ),
+    "jwbj": frozenset({Platform.BINARY_SENSOR, Platform.SENSOR}),
+    "kfj": frozenset({Platform.NUMBER, Platform.SELECT}),
+    "kg": frozenset(
+        {
+            Platform.LIGHT,
+            Platform.SELECT,
+            Platform.SENSOR,
+            Platform.SWITCH,
+        }
+    ),
+    "kj": frozenset({Platform.FAN, Platform.SELECT, Platform.SENSOR, Platform.SWITCH}),
+    "kt": frozenset({Platform.CLIMATE, Platform.LIGHT, Platform.SWITCH}),
+    "ldcg": frozenset({Platform.BINARY_SENSOR, Platform.SENSOR}),
+    "mal": frozenset({Platform.ALARM_CONTROL_PANEL}),
+    "mbd": frozenset({Platform.LIGHT}),
+    "mc": frozenset({Platform.BINARY_SENSOR, Platform.SENSOR}),
+    "mcs": frozenset({Platform.BINARY_SENSOR, Platform.SENSOR}),
+    "mk": frozenset({Platform.BINARY_SENSOR}),
+    "mzj": frozenset({Platform.NUMBER, Platform.SENSOR, Platform.SWITCH}),
+    "pc": frozenset(
+        {
+            Platform.LIGHT,
+            Platform.SELECT,
+            Platform.SENSOR,
+            Platform.SWITCH,
+        }
+    ),
+    "pir": frozenset({Platform.BINARY_SENSOR, Platform.SENSOR}),
+    "pm2.5": frozenset({Platform.BINARY_SENSOR, Platform.SENSOR}),
+    "qjdcz": frozenset({Platform.LIGHT, Platform.SWITCH}),
+    "qn": frozenset(
+        {
+            Platform.CLIMATE,
+            Platform.LIGHT,
+            Platform.SELECT,
+            Platform.SENSOR,
+            Platform.SWITCH,
+        }
+    ),
+    "rqbj": frozenset({Platform.BINARY_SENSOR, Platform.SENSOR}),
+    "rs": frozenset({Platform.CLIMATE}),
+    "sd": frozenset(
+        {
+            Platform.BUTTON,
+            Platform.NUMBER,
+            Platform.SELECT,
+            Platform.SENSOR,
+            Platform.SWITCH,
+            Platform.VACUUM,
+        }
+    ),
+    "sgbj": frozenset(
+        {
+            Platform.NUMBER,
+            Platform.SELECT,
+            Platform.SIREN,
+            Platform.SWITCH,
+        }
+    ),
+    "sj": frozenset({Platform.BINARY_SENSOR, Platform.SENSOR}),
+    "sos": frozenset({Platform.BINARY_SENSOR, Platform.SENSOR}),
+    "sp": frozenset(
+        {
+            Platform.CAMERA,
+            Platform.LIGHT,
+            Platform.NUMBER,
+            Platform.SELECT,
+            Platform.SENSOR,
+            Platform.SIREN,
+            Platform.SWITCH,
+        }
+    ),
+    "szjqr": frozenset(
+        {
+            Platform.NUMBER,
+            Platform.SELECT,
+            Platform.SENSOR,
+            Platform.SWITCH,
+        }
+    ),
+    "tdq": frozenset({Platform.SELECT, Platform.SENSOR, Platform.SWITCH}),
+    "tgkg": frozenset({Platform.LIGHT, Platform.NUMBER, Platform.SELECT}),
+    "tgq": frozenset({Platform.LIGHT, Platform.NUMBER, Platform.SELECT}),
+    "tyndj": frozenset({Platform.LIGHT, Platform.SENSOR, Platform.SWITCH}),
+    "voc": frozenset({Platform.BINARY_SENSOR, Platform.SENSOR}),
+    "wk": frozenset({Platform.CLIMATE}),
+    "wkcz": frozenset({Platform.SENSOR, Platform.SWITCH}),
+    "wkf": frozenset(
+        {
+            Platform.BINARY_SENSOR,
+            Platform.CLIMATE,
+            Platform.SENSOR,
+            Platform.SWITCH,
+        }
+    ),
+    "wnykq": frozenset({Platform.SENSOR}),
+    "wsdcg": frozenset({Platform.BINARY_SENSOR, Platform.SENSOR, Platform.SWITCH}),
+    "wxkg": frozenset({Platform.SENSOR}),
+    "xdd": frozenset({Platform.LIGHT, Platform.SWITCH}),
+    "xxj": frozenset({Platform.SWITCH}),
+    "ykq": frozenset({Platform.LIGHT}),
+    "ylcg": frozenset({Platform.BINARY_SENSOR, Platform.SENSOR}),
+    "ywbj": frozenset({Platform.BINARY_SENSOR, Platform.SENSOR}),
+    "zd": frozenset({Platform.BINARY_SENSOR, Platform.NUMBER, Platform.SENSOR}),
+    "zndb": frozenset({Platform.SENSOR, Platform.SWITCH}),
+}
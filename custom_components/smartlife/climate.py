@@ -18,14 +18,13 @@ from homeassistant.components.climate import (
     HVACMode,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfTemperature
-from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.const import Platform, UnitOfTemperature
+from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import HomeAssistantSmartLifeData
 from .base import IntegerTypeData, SmartLifeEntity
-from .const import DOMAIN, SMART_LIFE_DISCOVERY_NEW, DPCode, DPType
+from .const import DOMAIN, DPCode, DPType
 
 SMART_LIFE_HVAC_TO_HA = {
     "auto": HVACMode.HEAT_COOL,
@@ -87,32 +86,26 @@ CLIMATE_DESCRIPTIONS: dict[str, SmartLifeClimateEntityDescription] = {
 }
 
 
+def _create_entity(
+    device: CustomerDevice, device_manager: Manager
+) -> SmartLifeClimateEntity:
+    """Create the climate entity of a device."""
+    return SmartLifeClimateEntity(
+        device, device_manager, CLIMATE_DESCRIPTIONS[device.category]
+    )
+
+
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
     """Set up smartlife climate dynamically through smartlife discovery."""
     hass_data: HomeAssistantSmartLifeData = hass.data[DOMAIN][entry.entry_id]
 
-    @callback
-    def async_discover_device(device_ids: list[str]) -> None:
-        """Discover and add a discovered smartlife climate."""
-        entities: list[SmartLifeClimateEntity] = []
-        for device_id in device_ids:
-            device = hass_data.manager.device_map[device_id]
-            if device and device.category in CLIMATE_DESCRIPTIONS:
-                entities.append(
-                    SmartLifeClimateEntity(
-                        device,
-                        hass_data.manager,
-                        CLIMATE_DESCRIPTIONS[device.category],
-                    )
-                )
-        async_add_entities(entities)
-
-    async_discover_device([*hass_data.manager.device_map])
-
-    entry.async_on_unload(
-        async_dispatcher_connect(hass, SMART_LIFE_DISCOVERY_NEW, async_discover_device)
+    hass_data.discovery.async_register_categories(
+        Platform.CLIMATE,
+        async_add_entities,
+        CLIMATE_DESCRIPTIONS,
+        _create_entity,
     )
 
 
@@ -274,36 +267,44 @@ class SmartLifeClimateEntity(SmartLifeEntity, ClimateEntity):
             if self.find_dpcode(DPCode.SWITCH_VERTICAL, prefer_function=True):
                 self._attr_swing_modes.append(SWING_VERTICAL)
 
+    def state_dpcodes(self) -> set[str] | None:
+        """Return the DPCodes the state of this entity is derived from."""
+        # The HVAC, preset, fan and swing modes are combined from several
+        # DPCodes, refresh on any change of the device.
+        return None
+
     async def async_added_to_hass(self) -> None:
         """Call when entity is added to hass."""
         await super().async_added_to_hass()
 
-    def set_hvac_mode(self, hvac_mode: HVACMode) -> None:
+    async def async_set_hvac_mode(self, hvac_mode: HVACMode) -> None:
         """Set new target hvac mode."""
         commands = [{"code": DPCode.SWITCH, "value": hvac_mode != HVACMode.OFF}]
         if hvac_mode in self._hvac_to_smart_life:
             commands.append(
                 {"code": DPCode.MODE, "value": self._hvac_to_smart_life[hvac_mode]}
             )
-        self._send_command(commands)
+        await self._async_send_command(commands)
 
-    def set_preset_mode(self, preset_mode):
+    async def async_set_preset_mode(self, preset_mode):
         """Set new target preset mode."""
         commands = [{"code": DPCode.MODE, "value": preset_mode}]
-        self._send_command(commands)
+        await self._async_send_command(commands)
 
-    def set_fan_mode(self, fan_mode: str) -> None:
+    async def async_set_fan_mode(self, fan_mode: str) -> None:
         """Set new target fan mode."""
-        self._send_command([{"code": DPCode.FAN_SPEED_ENUM, "value": fan_mode}])
+        await self._async_send_command(
+            [{"code": DPCode.FAN_SPEED_ENUM, "value": fan_mode}]
+        )
 
-    def set_humidity(self, humidity: int) -> None:
+    async def async_set_humidity(self, humidity: int) -> None:
         """Set new target humidity."""
         if self._set_humidity is None:
             raise RuntimeError(
                 "Cannot set humidity, device doesn't provide methods to set it"
             )
 
-        self._send_command(
+        await self._async_send_command(
             [
                 {
                     "code": self._set_humidity.dpcode,
@@ -312,11 +313,11 @@ class SmartLifeClimateEntity(SmartLifeEntity, ClimateEntity):
             ]
         )
 
-    def set_swing_mode(self, swing_mode: str) -> None:
+    async def async_set_swing_mode(self, swing_mode: str) -> None:
         """Set new target swing operation."""
         # The API accepts these all at once and will ignore the codes
         # that don't apply to the device being controlled.
-        self._send_command(
+        await self._async_send_command(
             [
                 {
                     "code": DPCode.SHAKE,
@@ -337,7 +338,7 @@ class SmartLifeClimateEntity(SmartLifeEntity, ClimateEntity):
             ]
         )
 
-    def set_temperature(self, **kwargs: Any) -> None:
+    async def async_set_temperature(self, **kwargs: Any) -> None:
         """Set new target temperature."""
         if self._set_temperature is None:
             raise RuntimeError(
@@ -345,7 +346,7 @@ class SmartLifeClimateEntity(SmartLifeEntity, ClimateEntity):
                 " set it"
             )
 
-        self._send_command(
+        await self._async_send_command(
             [
                 {
                     "code": self._set_temperature.dpcode,
@@ -471,25 +472,25 @@ class SmartLifeClimateEntity(SmartLifeEntity, ClimateEntity):
 
         return SWING_OFF
 
-    def turn_on(self) -> None:
+    async def async_turn_on(self) -> None:
         """Turn the device on, retaining current HVAC (if supported)."""
         if DPCode.SWITCH in self.device.function:
-            self._send_command([{"code": DPCode.SWITCH, "value": True}])
+            await self._async_send_command([{"code": DPCode.SWITCH, "value": True}])
             return
 
         # Fake turn on
         for mode in (HVACMode.HEAT_COOL, HVACMode.HEAT, HVACMode.COOL):
             if mode not in self.hvac_modes:
                 continue
-            self.set_hvac_mode(mode)
+            await self.async_set_hvac_mode(mode)
             break
 
-    def turn_off(self) -> None:
+    async def async_turn_off(self) -> None:
         """Turn the device on, retaining current HVAC (if supported)."""
         if DPCode.SWITCH in self.device.function:
-            self._send_command([{"code": DPCode.SWITCH, "value": False}])
+            await self._async_send_command([{"code": DPCode.SWITCH, "value": False}])
             return
 
         # Fake turn off
         if HVACMode.OFF in self.hvac_modes:
-            self.set_hvac_mode(HVACMode.OFF)
+            await self.async_set_hvac_mode(HVACMode.OFF)
@@ -0,0 +1,577 @@
+"""Coalescing command buffer for Smart Life devices."""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import IntEnum
+from itertools import count
+import random
+import threading
+import time
+from typing import Any
+
+from tuya_sharing import CustomerDevice, Manager
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+from .const import LOGGER
+from .local import LocalTransport
+from .metrics import Metrics
+from .tracing import DebugTracer
+
+# Batches are sent from a small dedicated pool, the SDK reuses its HTTP
+# session, so commands in flight never occupy more than this many threads.
+MAX_WORKERS = 4
+
+# Account-wide rate limit of the cloud API, in batches per second.
+DEFAULT_RATE = 10.0
+DEFAULT_BURST = 20
+
+# Failed batches are retried with jittered exponential backoff, until the
+# oldest command of the batch is older than RETRY_MAX_AGE seconds.
+RETRY_MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+RETRY_MAX_AGE = 60.0
+
+JOURNAL_SIZE = 50
+
+
+class CommandPriority(IntEnum):
+    """Priority of a command, lower values are sent first."""
+
+    SECURITY = 0
+    LIGHT = 1
+    DEFAULT = 2
+    CONFIG = 3
+
+
+@dataclass
+class CommandBatch:
+    """Commands waiting to be sent to a device."""
+
+    seq: int
+    priority: CommandPriority
+    commands: dict[str, Any] = field(default_factory=dict)
+    futures: list[Future[None]] = field(default_factory=list)
+    created: float = field(default_factory=time.monotonic)
+    ready_at: float | None = None
+    attempts: int = 0
+    error: Exception | None = None
+    cloud: bool = False
+
+
+class TokenBucket:
+    """Token bucket rate limiter."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        """Init TokenBucket."""
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def take(self) -> float:
+        """Take a token, return the seconds to wait when none is available."""
+        now = time.monotonic()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+        if self._tokens < 1:
+            return (1 - self._tokens) / self.rate
+        self._tokens -= 1
+        return 0.0
+
+
+class CommandBuffer:
+    """Merge commands sent to a device within a short window.
+
+    Commands arriving for a device within ``window`` seconds of the first
+    command are merged into a single `send_commands` call, the last value
+    sent for a DPCode wins. Every caller receives a future, resolved once
+    the batch holding its commands has been sent, or failed.
+
+    Once the window has passed, batches are queued by priority and sent at
+    the rate allowed by an account-wide token bucket. Every device holds at
+    most one batch, commands arriving while it is queued are merged into
+    it, so devices of the same priority are served round-robin.
+
+    Batches are sent from a dedicated, bounded, thread pool instead of the
+    shared executor of Home Assistant, further batches wait in its queue.
+
+    Commands re-asserting the value a device already reports can be dropped
+    before they are queued, except for devices in ``force_devices``.
+
+    Batches for devices connected over the LAN are sent locally, without
+    waiting for a token, falling back to the cloud when that fails.
+
+    Failed batches are retried with jittered exponential backoff. Commands
+    superseded by a newer command for the same DPCode are not retried, and
+    batches are dropped once they are too old. The outcome of recent
+    batches is kept in a bounded journal.
+
+    The pool threads only send batches, counters, the journal and the
+    futures of callers are updated on the event loop. Once stopped, batches
+    are no longer retried nor sent, until started again.
+    """
+
+    def __init__(
+            self,
+            hass: HomeAssistant,
+            manager: Manager,
+            window: float = 0.0,
+            metrics: Metrics | None = None,
+            tracer: DebugTracer | None = None,
+    ) -> None:
+        """Init CommandBuffer."""
+        self.hass = hass
+        self.manager = manager
+        self.window = window
+        self.metrics = metrics or Metrics()
+        self.tracer = tracer or DebugTracer()
+        self.skip_redundant = True
+        self.force_devices: set[str] = set()
+        self.bucket = TokenBucket(DEFAULT_RATE, DEFAULT_BURST)
+        self.local: LocalTransport | None = None
+        self.commands_received = 0
+        self.commands_merged = 0
+        self.commands_suppressed = 0
+        self.commands_sent = 0
+        self.batches_dispatched = 0
+        self.batches_local = 0
+        self.batches_sent = 0
+        self.batches_failed = 0
+        self.batches_throttled = 0
+        self.batches_retried = 0
+        self.batches_expired = 0
+        self.commands_superseded = 0
+        self.queue_depth_max = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._lock = threading.Lock()
+        self._pending: dict[str, CommandBatch] = {}
+        self._seq = count()
+        self._latest: dict[str, dict[str, int]] = {}
+        self._retries: dict[int, tuple[asyncio.TimerHandle, str, CommandBatch]] = {}
+        self.journal: deque[dict[str, Any]] = deque(maxlen=JOURNAL_SIZE)
+        self._flush_handles: dict[str, asyncio.TimerHandle] = {}
+        self._queues: dict[CommandPriority, deque[str]] = {
+            priority: deque() for priority in CommandPriority
+        }
+        self._dispatch_handle: asyncio.TimerHandle | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._stopped = False
+
+    @property
+    def queue_depth(self) -> int:
+        """Return the number of batches waiting to be sent."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    @callback
+    def async_filter_redundant(
+            self, device: CustomerDevice, commands: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        """Drop commands whose value already matches the status of the device.
+
+        The status of an offline device may be stale, its commands are kept.
+        """
+        if (
+                not self.skip_redundant
+                or not device.online
+                or device.id in self.force_devices
+        ):
+            return commands
+
+        remaining = [
+            command
+            for command in commands
+            if command["code"] not in device.status
+            or device.status[command["code"]] != command["value"]
+        ]
+        if suppressed := len(commands) - len(remaining):
+            self.commands_suppressed += suppressed
+            LOGGER.debug(
+                "Skipping %s redundant commands for device %s", suppressed, device.id
+            )
+        return remaining
+
+    def send_commands(
+            self,
+            device_id: str,
+            commands: list[dict[str, Any]],
+            priority: CommandPriority = CommandPriority.DEFAULT,
+    ) -> Future[None]:
+        """Queue commands for a device, safe to call from any thread."""
+        future: Future[None] = Future()
+        with self._lock:
+            if (batch := self._pending.get(device_id)) is None:
+                batch = self._pending[device_id] = CommandBatch(
+                    next(self._seq), priority
+                )
+                self.hass.loop.call_soon_threadsafe(
+                    self._async_schedule_flush, device_id
+                )
+            elif priority < batch.priority:
+                previous = batch.priority
+                batch.priority = priority
+                if batch.ready_at is not None:
+                    self.hass.loop.call_soon_threadsafe(
+                        self._async_requeue, device_id, previous, priority
+                    )
+            latest = self._latest.setdefault(device_id, {})
+            for command in commands:
+                self.commands_received += 1
+                if command["code"] in batch.commands:
+                    self.commands_merged += 1
+                batch.commands[command["code"]] = command["value"]
+                latest[command["code"]] = batch.seq
+            batch.futures.append(future)
+        return future
+
+    async def async_send_commands(
+            self,
+            device_id: str,
+            commands: list[dict[str, Any]],
+            priority: CommandPriority = CommandPriority.DEFAULT,
+    ) -> None:
+        """Queue commands for a device and wait until they have been sent."""
+        await asyncio.wrap_future(self.send_commands(device_id, commands, priority))
+
+    @callback
+    def async_start(self) -> None:
+        """Allow sending commands again, after being stopped."""
+        self._stopped = False
+
+    @callback
+    def async_remove_device(self, device_id: str) -> None:
+        """Forget the latest commands of a removed device."""
+        with self._lock:
+            if device_id not in self._pending:
+                self._latest.pop(device_id, None)
+
+    @callback
+    def async_stop(self) -> None:
+        """Send all pending commands right away and release the pool."""
+        for handle in self._flush_handles.values():
+            handle.cancel()
+        self._flush_handles.clear()
+        if self._dispatch_handle is not None:
+            self._dispatch_handle.cancel()
+            self._dispatch_handle = None
+        for queue in self._queues.values():
+            queue.clear()
+        for handle, device_id, batch in self._retries.values():
+            handle.cancel()
+            self._async_fail(device_id, batch, "unloaded")
+        self._retries.clear()
+        with self._lock:
+            device_ids = list(self._pending)
+        for device_id in device_ids:
+            self._async_send(device_id)
+        # Batches still in flight are not retried once stopped
+        self._stopped = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        with self._lock:
+            self._latest.clear()
+
+    @callback
+    def _async_schedule_flush(self, device_id: str) -> None:
+        """Queue the commands of a device once the window has passed."""
+        if self.window > 0:
+            self._flush_handles[device_id] = self.hass.loop.call_later(
+                self.window, self._async_flush, device_id
+            )
+            return
+        self._async_flush(device_id)
+
+    @callback
+    def _async_flush(self, device_id: str) -> None:
+        """Queue the pending batch of a device for sending."""
+        self._flush_handles.pop(device_id, None)
+        local = self.local is not None and self.local.available(device_id)
+        with self._lock:
+            if (batch := self._pending.get(device_id)) is None:
+                return
+            if local and not batch.cloud:
+                del self._pending[device_id]
+            else:
+                local = False
+                batch.ready_at = time.monotonic()
+                priority = batch.priority
+
+        if local:
+            self.hass.async_create_background_task(
+                self._async_send_local(device_id, batch),
+                f"smartlife local command {device_id}",
+            )
+            return
+
+        self._queues[priority].append(device_id)
+        self.queue_depth_max = max(self.queue_depth_max, self.queue_depth)
+        if self._dispatch_handle is None:
+            self._async_dispatch()
+
+    @callback
+    def _async_requeue(
+            self,
+            device_id: str,
+            previous: CommandPriority,
+            priority: CommandPriority,
+    ) -> None:
+        """Move a queued batch to the queue of its raised priority."""
+        if device_id not in self._queues[previous]:
+            return
+        self._queues[previous].remove(device_id)
+        self._queues[priority].append(device_id)
+
+    @callback
+    def _async_dispatch(self) -> None:
+        """Send queued batches, highest priority first, as tokens allow."""
+        self._dispatch_handle = None
+        while queue := next(
+            (queue for queue in self._queues.values() if queue), None
+        ):
+            if (wait := self.bucket.take()) > 0:
+                self.batches_throttled += 1
+                self._dispatch_handle = self.hass.loop.call_later(
+                    wait, self._async_dispatch
+                )
+                return
+            self._async_send(queue.popleft())
+
+    @callback
+    def _async_send(self, device_id: str) -> None:
+        """Send the pending batch of a device from the command pool."""
+        with self._lock:
+            if (batch := self._pending.pop(device_id, None)) is None:
+                return
+        if self._stopped:
+            self._async_fail(device_id, batch, "unloaded")
+            return
+        self.batches_dispatched += 1
+        if batch.ready_at is not None:
+            wait = time.monotonic() - batch.ready_at
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=MAX_WORKERS, thread_name_prefix="smartlife_command"
+            )
+        self._executor.submit(self._send_batch, device_id, batch)
+
+    def _send_batch(self, device_id: str, batch: CommandBatch) -> None:
+        """Send a batch of commands and resolve the futures of its callers."""
+        commands = [
+            {"code": code, "value": value} for code, value in batch.commands.items()
+        ]
+        if self.tracer.enabled and self.tracer.is_tracing(device_id):
+            self.tracer.trace(
+                "send_commands",
+                device_id,
+                commands=commands,
+                attempt=batch.attempts + 1,
+                priority=batch.priority.name,
+            )
+        batch.attempts += 1
+        try:
+            self._post_commands(device_id, commands)
+        except Exception as err:  # pylint: disable=broad-except
+            batch.error = err
+            self.hass.loop.call_soon_threadsafe(self._async_retry, device_id, batch)
+            return
+        self.hass.loop.call_soon_threadsafe(
+            self._async_sent, device_id, batch, time.monotonic()
+        )
+
+    def _post_commands(self, device_id: str, commands: list[dict[str, Any]]) -> None:
+        """Send commands to the cloud, raising when the request failed.
+
+        `Manager.send_commands` drops a call repeating the commands of the
+        previous call within 10 seconds, which retries are, and does not
+        report HTTP errors, so the commands are posted directly.
+        """
+        response = self.manager.customer_api.post(
+            f"/v1.1/m/thing/{device_id}/commands", None, {"commands": commands}
+        )
+        if not response or not response.get("success"):
+            raise HomeAssistantError(f"Sending commands failed: {response}")
+
+    @callback
+    def _async_sent(self, device_id: str, batch: CommandBatch, sent: float) -> None:
+        """Record a batch sent by the pool and resolve the futures."""
+        self.metrics.command_http.record(sent - batch.created)
+        self.batches_sent += 1
+        self.commands_sent += len(batch.commands)
+        self._journal(device_id, batch, "sent")
+        _resolve(batch.futures)
+
+    @callback
+    def _async_retry(self, device_id: str, batch: CommandBatch) -> None:
+        """Schedule a retry of a failed batch, or give up on it."""
+        if self._stopped:
+            self._async_fail(device_id, batch, "unloaded")
+            return
+        if batch.attempts >= RETRY_MAX_ATTEMPTS:
+            self._async_fail(device_id, batch, "failed")
+            return
+        if time.monotonic() - batch.created >= RETRY_MAX_AGE:
+            self.batches_expired += 1
+            self._async_fail(device_id, batch, "expired")
+            return
+
+        delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (batch.attempts - 1))
+        delay *= random.uniform(0.5, 1.0)
+        LOGGER.debug(
+            "Retrying commands for device %s in %.1f seconds: %s",
+            device_id,
+            delay,
+            batch.error,
+        )
+        self.batches_retried += 1
+        self._journal(device_id, batch, "retrying")
+        handle = self.hass.loop.call_later(delay, self._async_resend, device_id, batch)
+        self._retries[batch.seq] = (handle, device_id, batch)
+
+    async def _async_send_local(self, device_id: str, batch: CommandBatch) -> None:
+        """Send a batch over the LAN, or queue it for the cloud."""
+        assert self.local is not None
+        if not await self.local.async_send_commands(device_id, batch.commands):
+            batch.cloud = True
+            self._async_requeue_batch(device_id, batch)
+            return
+
+        self.metrics.command_http.record(time.monotonic() - batch.created)
+        self.batches_local += 1
+        self.batches_sent += 1
+        self.commands_sent += len(batch.commands)
+        self._journal(device_id, batch, "sent_local")
+        _resolve(batch.futures)
+
+    @callback
+    def _async_resend(self, device_id: str, batch: CommandBatch) -> None:
+        """Queue a failed batch again."""
+        self._retries.pop(batch.seq, None)
+        self._async_requeue_batch(device_id, batch)
+
+    @callback
+    def _async_requeue_batch(self, device_id: str, batch: CommandBatch) -> None:
+        """Queue a batch again, without the superseded commands."""
+        with self._lock:
+            latest = self._latest.get(device_id)
+        if latest is None:
+            # The device was removed, or the buffer stopped
+            self._async_fail(
+                device_id, batch, "unloaded" if self._stopped else "removed"
+            )
+            return
+
+        with self._lock:
+            commands = {
+                code: value
+                for code, value in batch.commands.items()
+                if latest.get(code) == batch.seq
+            }
+            self.commands_superseded += len(batch.commands) - len(commands)
+            batch.commands = commands
+
+            if (pending := self._pending.get(device_id)) is not None:
+                # Merge into the batch waiting to be sent
+                for code, value in commands.items():
+                    pending.commands[code] = value
+                    latest[code] = pending.seq
+                pending.futures.extend(batch.futures)
+                pending.priority = min(pending.priority, batch.priority)
+                pending.created = min(pending.created, batch.created)
+                pending.attempts = max(pending.attempts, batch.attempts)
+                pending.cloud = pending.cloud or batch.cloud
+                return
+
+            if not commands:
+                # Every command was superseded by a newer, sent, command
+                self._journal(device_id, batch, "superseded")
+                _resolve(batch.futures)
+                return
+
+            batch.ready_at = None
+            self._pending[device_id] = batch
+        self._async_flush(device_id)
+
+    @callback
+    def _async_fail(self, device_id: str, batch: CommandBatch, outcome: str) -> None:
+        """Give up on a batch and fail the futures of its callers.
+
+        Batches dropped without being sent, because the buffer stopped or the
+        device was removed, fail without an error of their own.
+        """
+        if (error := batch.error) is None:
+            error = HomeAssistantError(
+                "Device removed" if outcome == "removed" else "Integration unloaded"
+            )
+        else:
+            LOGGER.warning(
+                "Failed to send commands to device %s: %s", device_id, batch.error
+            )
+        self.batches_failed += 1
+        self._journal(device_id, batch, outcome)
+        for future in batch.futures:
+            # Callers may have cancelled waiting for their commands
+            if not future.done():
+                future.set_exception(error)
+
+    @callback
+    def _journal(self, device_id: str, batch: CommandBatch, outcome: str) -> None:
+        """Record the outcome of a batch in the journal."""
+        self.journal.append(
+            {
+                "time": dt_util.utcnow().isoformat(),
+                "device_id": device_id,
+                "commands": dict(batch.commands),
+                "attempts": batch.attempts,
+                "outcome": outcome,
+                "error": None if batch.error is None else str(batch.error),
+            }
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the command buffer counters."""
+        dispatched = self.batches_dispatched
+        return {
+            "window": self.window,
+            "max_workers": MAX_WORKERS,
+            "rate": self.bucket.rate,
+            "burst": self.bucket.burst,
+            "commands_received": self.commands_received,
+            "commands_merged": self.commands_merged,
+            "commands_suppressed": self.commands_suppressed,
+            "commands_sent": self.commands_sent,
+            "batches_dispatched": dispatched,
+            "batches_local": self.batches_local,
+            "batches_sent": self.batches_sent,
+            "batches_failed": self.batches_failed,
+            "batches_throttled": self.batches_throttled,
+            "batches_retried": self.batches_retried,
+            "batches_expired": self.batches_expired,
+            "commands_superseded": self.commands_superseded,
+            "queue_depth": {
+                priority.name.lower(): len(queue)
+                for priority, queue in self._queues.items()
+            },
+            "queue_depth_max": self.queue_depth_max,
+            "wait_mean": round(self.wait_total / dispatched, 3) if dispatched else 0.0,
+            "wait_max": round(self.wait_max, 3),
+            "journal": list(self.journal),
+        }
+
+
+def _resolve(futures: list[Future[None]]) -> None:
+    """Resolve the futures of callers that still wait for their commands."""
+    for future in futures:
+        if not future.done():
+            future.set_result(None)
@@ -2,6 +2,8 @@
 from __future__ import annotations
 
 from homeassistant import config_entries
+from homeassistant.core import callback
+import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
 from io import BytesIO
 from tuya_sharing import LoginControl
@@ -11,8 +13,25 @@ from .const import (
     CONF_USER_CODE,
     LOGGER,
     CONF_CLIENT_ID,
-    CONF_SCHEMA
-
+    CONF_SCHEMA,
+    CONF_COMMAND_WINDOW,
+    CONF_DEBUG_TRACE,
+    CONF_FORCE_DEVICES,
+    CONF_LOCAL_CONTROL,
+    CONF_OPTIMISTIC_TIMEOUT,
+    CONF_SKIP_REDUNDANT,
+    CONF_STATISTICS_WINDOW,
+    CONF_TRACE_DEVICES,
+    CONF_TRACE_SAMPLE_RATE,
+    CONF_UPDATE_WINDOW,
+    DEFAULT_COMMAND_WINDOW,
+    DEFAULT_DEBUG_TRACE,
+    DEFAULT_LOCAL_CONTROL,
+    DEFAULT_OPTIMISTIC_TIMEOUT,
+    DEFAULT_SKIP_REDUNDANT,
+    DEFAULT_STATISTICS_WINDOW,
+    DEFAULT_TRACE_SAMPLE_RATE,
+    DEFAULT_UPDATE_WINDOW,
 )
 
 APP_QR_CODE_HEADER = "tuyaSmart--qrLogin?token="
@@ -21,12 +40,24 @@ APP_QR_CODE_HEADER = "tuyaSmart--qrLogin?token="
 class SmartlifeConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """smartlife Config Flow."""
 
+    # Raised with each migration in migration.py
+    VERSION = 1
+    MINOR_VERSION = 2
+
     def __init__(self) -> None:
         """Initialize the config flow."""
         self._user_code: str | None = None
         self._qr_code: str | None = None
         self.login_control = LoginControl()
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+            config_entry: config_entries.ConfigEntry,
+    ) -> SmartlifeOptionsFlow:
+        """Get the options flow for this handler."""
+        return SmartlifeOptionsFlow(config_entry)
+
     async def async_step_user(self, user_input=None):
         """Step user."""
         errors = {}
@@ -108,6 +139,86 @@ class SmartlifeConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
 
+class SmartlifeOptionsFlow(config_entries.OptionsFlow):
+    """smartlife Options Flow."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize the options flow."""
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+
+        # Devices can only be listed while the config entry is loaded
+        devices: dict[str, str] = {}
+        if hass_data := self.hass.data.get(DOMAIN, {}).get(self.config_entry.entry_id):
+            devices = {
+                device.id: device.name
+                for device in hass_data.manager.device_map.values()
+            }
+        # Keep the selected devices that are not listed, so that saving the
+        # options while the entry is not loaded does not drop them
+        force_devices = options.get(CONF_FORCE_DEVICES, [])
+        trace_devices = options.get(CONF_TRACE_DEVICES, [])
+        for device_id in (*force_devices, *trace_devices):
+            devices.setdefault(device_id, device_id)
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_UPDATE_WINDOW,
+                        default=options.get(CONF_UPDATE_WINDOW, DEFAULT_UPDATE_WINDOW),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+                    vol.Optional(
+                        CONF_COMMAND_WINDOW,
+                        default=options.get(CONF_COMMAND_WINDOW, DEFAULT_COMMAND_WINDOW),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=2)),
+                    vol.Optional(
+                        CONF_OPTIMISTIC_TIMEOUT,
+                        default=options.get(
+                            CONF_OPTIMISTIC_TIMEOUT, DEFAULT_OPTIMISTIC_TIMEOUT
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=60)),
+                    vol.Optional(
+                        CONF_SKIP_REDUNDANT,
+                        default=options.get(CONF_SKIP_REDUNDANT, DEFAULT_SKIP_REDUNDANT),
+                    ): bool,
+                    vol.Optional(
+                        CONF_FORCE_DEVICES, default=force_devices
+                    ): cv.multi_select(devices),
+                    vol.Optional(
+                        CONF_LOCAL_CONTROL,
+                        default=options.get(CONF_LOCAL_CONTROL, DEFAULT_LOCAL_CONTROL),
+                    ): bool,
+                    vol.Optional(
+                        CONF_DEBUG_TRACE,
+                        default=options.get(CONF_DEBUG_TRACE, DEFAULT_DEBUG_TRACE),
+                    ): bool,
+                    vol.Optional(
+                        CONF_TRACE_DEVICES, default=trace_devices
+                    ): cv.multi_select(devices),
+                    vol.Optional(
+                        CONF_TRACE_SAMPLE_RATE,
+                        default=options.get(
+                            CONF_TRACE_SAMPLE_RATE, DEFAULT_TRACE_SAMPLE_RATE
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0.001, max=1)),
+                    vol.Optional(
+                        CONF_STATISTICS_WINDOW,
+                        default=options.get(
+                            CONF_STATISTICS_WINDOW, DEFAULT_STATISTICS_WINDOW
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=1, max=1440)),
+                }
+            ),
+        )
+
+
 def _generate_qr_code(data: str) -> str:
     """Generate a base64 PNG string represent QR Code image of data."""
     import pyqrcode  # pylint: disable=import-outside-toplevel
@@ -35,10 +35,28 @@ CONF_ENDPOINT = "endpoint"
 CONF_USER_CODE = "user_code"
 CONF_CLIENT_ID = "HA_3y9q4ak7g4ephrvke"
 CONF_SCHEMA = "haauthorize"
+CONF_UPDATE_WINDOW = "update_window"
+CONF_COMMAND_WINDOW = "command_window"
+CONF_OPTIMISTIC_TIMEOUT = "optimistic_timeout"
+CONF_SKIP_REDUNDANT = "skip_redundant"
+CONF_FORCE_DEVICES = "force_devices"
+CONF_LOCAL_CONTROL = "local_control"
+CONF_DEBUG_TRACE = "debug_trace"
+CONF_TRACE_DEVICES = "trace_devices"
+CONF_TRACE_SAMPLE_RATE = "trace_sample_rate"
+CONF_STATISTICS_WINDOW = "statistics_window"
+
+DEFAULT_UPDATE_WINDOW = 0.0
+DEFAULT_COMMAND_WINDOW = 0.05
+DEFAULT_OPTIMISTIC_TIMEOUT = 5.0
+DEFAULT_SKIP_REDUNDANT = True
+DEFAULT_LOCAL_CONTROL = False
+DEFAULT_DEBUG_TRACE = False
+DEFAULT_TRACE_SAMPLE_RATE = 1.0
+DEFAULT_STATISTICS_WINDOW = 60.0
 
 
 SMART_LIFE_DISCOVERY_NEW = "smartlife_discovery_new"
-SMART_LIFE_HA_SIGNAL_UPDATE_ENTITY = "smartlife_entry_update"
 
 
 PLATFORMS = [
@@ -15,13 +15,13 @@ from homeassistant.components.cover import (
     CoverEntityFeature,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import HomeAssistantSmartLifeData
 from .base import IntegerTypeData, SmartLifeEntity
-from .const import DOMAIN, SMART_LIFE_DISCOVERY_NEW, DPCode, DPType
+from .const import DOMAIN, DPCode, DPType
 
 
 @dataclass
@@ -140,36 +140,25 @@ COVERS: dict[str, tuple[SmartLifeCoverEntityDescription, ...]] = {
 }
 
 
+def _is_supported(
+    device: CustomerDevice, description: SmartLifeCoverEntityDescription
+) -> bool:
+    """Return if a device can be controlled through the DPCode of a cover."""
+    return description.key in device.function or description.key in device.status_range
+
+
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
     """Set up smartlife cover dynamically through smartlife discovery."""
     hass_data: HomeAssistantSmartLifeData = hass.data[DOMAIN][entry.entry_id]
 
-    @callback
-    def async_discover_device(device_ids: list[str]) -> None:
-        """Discover and add a discovered smartlife cover."""
-        entities: list[SmartLifeCoverEntity] = []
-        for device_id in device_ids:
-            device = hass_data.manager.device_map[device_id]
-            if descriptions := COVERS.get(device.category):
-                for description in descriptions:
-                    if (
-                        description.key in device.function
-                        or description.key in device.status_range
-                    ):
-                        entities.append(
-                            SmartLifeCoverEntity(
-                                device, hass_data.manager, description
-                            )
-                        )
-
-        async_add_entities(entities)
-
-    async_discover_device([*hass_data.manager.device_map])
-
-    entry.async_on_unload(
-        async_dispatcher_connect(hass, SMART_LIFE_DISCOVERY_NEW, async_discover_device)
+    hass_data.discovery.async_register_descriptions(
+        Platform.COVER,
+        async_add_entities,
+        COVERS,
+        SmartLifeCoverEntity,
+        _is_supported,
     )
 
 
@@ -281,7 +270,7 @@ class SmartLifeCoverEntity(SmartLifeEntity, CoverEntity):
 
         return None
 
-    def open_cover(self, **kwargs: Any) -> None:
+    async def async_open_cover(self, **kwargs: Any) -> None:
         """Open the cover."""
         value: bool | str = True
         if self.find_dpcode(
@@ -303,9 +292,9 @@ class SmartLifeCoverEntity(SmartLifeEntity, CoverEntity):
                 }
             )
 
-        self._send_command(commands)
+        await self._async_send_command(commands, force=True)
 
-    def close_cover(self, **kwargs: Any) -> None:
+    async def async_close_cover(self, **kwargs: Any) -> None:
         """Close cover."""
         value: bool | str = False
         if self.find_dpcode(
@@ -327,16 +316,16 @@ class SmartLifeCoverEntity(SmartLifeEntity, CoverEntity):
                 }
             )
 
-        self._send_command(commands)
+        await self._async_send_command(commands, force=True)
 
-    def set_cover_position(self, **kwargs: Any) -> None:
+    async def async_set_cover_position(self, **kwargs: Any) -> None:
         """Move the cover to a specific position."""
         if self._set_position is None:
             raise RuntimeError(
                 "Cannot set position, device doesn't provide methods to set it"
             )
 
-        self._send_command(
+        await self._async_send_command(
             [
                 {
                     "code": self._set_position.dpcode,
@@ -346,28 +335,30 @@ class SmartLifeCoverEntity(SmartLifeEntity, CoverEntity):
                         )
                     ),
                 }
-            ]
+            ],
+            force=True,
         )
 
-    def stop_cover(self, **kwargs: Any) -> None:
+    async def async_stop_cover(self, **kwargs: Any) -> None:
         """Stop the cover."""
-        self._send_command(
+        await self._async_send_command(
             [
                 {
                     "code": self.entity_description.key,
                     "value": self.entity_description.stop_instruction_value,
                 }
-            ]
+            ],
+            force=True,
         )
 
-    def set_cover_tilt_position(self, **kwargs: Any) -> None:
+    async def async_set_cover_tilt_position(self, **kwargs: Any) -> None:
         """Move the cover tilt to a specific position."""
         if self._tilt is None:
             raise RuntimeError(
                 "Cannot set tilt, device doesn't provide methods to set it"
             )
 
-        self._send_command(
+        await self._async_send_command(
             [
                 {
                     "code": self._tilt.dpcode,
@@ -377,5 +368,6 @@ class SmartLifeCoverEntity(SmartLifeEntity, CoverEntity):
                         )
                     ),
                 }
-            ]
+            ],
+            force=True,
         )
@@ -15,6 +15,7 @@ from homeassistant.helpers.device_registry import DeviceEntry
 from homeassistant.util import dt as dt_util
 
 from . import HomeAssistantSmartLifeData
+from .base import schema_stats
 from .const import (
     DOMAIN,
     DPCode,
@@ -54,10 +55,28 @@ def _async_get_diagnostics(
         "mqtt_connected": mqtt_connected,
         "disabled_by": entry.disabled_by,
         "disabled_polling": entry.pref_disable_polling,
+        "bootstrap": hass_data.bootstrap.as_dict(),
+        "updates": hass_data.dispatcher.as_dict(),
+        "commands": hass_data.commands.as_dict(),
+        "optimistic": hass_data.optimistic.as_dict(),
+        "local": hass_data.local.as_dict(),
+        "metrics": hass_data.metrics.as_dict(),
+        "tracing": hass_data.tracer.as_dict(),
+        "discovery": hass_data.discovery.as_dict(),
+        "statistics": hass_data.statistics.as_dict(),
+        "capture": (
+            hass_data.listener.recorder.as_dict()
+            if hass_data.listener.recorder is not None
+            else None
+        ),
+        "schemas": schema_stats(),
     }
 
     if device:
         smartlife_device_id = next(iter(device.identifiers))[1]
+        # The hub device of the config entry only holds metrics
+        if smartlife_device_id == entry.entry_id:
+            return data
         data |= _async_device_as_dict(
             hass, hass_data.manager.device_map[smartlife_device_id]
         )
@@ -0,0 +1,227 @@
+"""Single pass discovery of the entities of Smart Life devices."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Iterable, Mapping
+from typing import Any, TypeVar
+
+from tuya_sharing import CustomerDevice, Manager
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity import Entity, EntityDescription
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .categories import ALWAYS_LOADED, CATEGORY_PLATFORMS
+from .const import LOGGER, SMART_LIFE_DISCOVERY_NEW
+
+_DescriptionT = TypeVar("_DescriptionT", bound=EntityDescription)
+
+EntityFactory = Callable[[CustomerDevice, Manager], Entity | None]
+
+
+def _key_in_status(device: CustomerDevice, description: EntityDescription) -> bool:
+    """Return if the DPCode of a description is part of the device status."""
+    return description.key in device.status
+
+
+@callback
+def async_required_platforms(devices: Iterable[CustomerDevice]) -> set[Platform]:
+    """Return the platforms handling the categories of devices."""
+    platforms = set(ALWAYS_LOADED)
+    for category in {device.category for device in devices}:
+        platforms.update(CATEGORY_PLATFORMS.get(category, ()))
+    return platforms
+
+
+class DiscoveryEngine:
+    """Create the entities of devices for all platforms in one pass.
+
+    Platforms register their description tables, or an entity factory for
+    the categories they handle, when they are set up. The registrations are
+    compiled into a single category index, so discovering devices looks up
+    the category of each device once and hands the entities of every
+    platform to its `async_add_entities` at once.
+
+    Platforms are only loaded for the categories present, platforms needed
+    by devices of a new category are loaded before those devices are
+    discovered.
+    """
+
+    def __init__(
+            self, hass: HomeAssistant, entry: ConfigEntry, manager: Manager
+    ) -> None:
+        """Init DiscoveryEngine."""
+        self.hass = hass
+        self.entry = entry
+        self.manager = manager
+        self.platforms: set[Platform] = set()
+        # Platforms being forwarded, with the task loading them
+        self._loading: dict[Platform, asyncio.Task[None]] = {}
+        self.passes = 0
+        self.entities = 0
+        self._add_entities: dict[Platform, AddEntitiesCallback] = {}
+        self._index: dict[str, list[tuple[Platform, EntityFactory]]] = {}
+
+    @callback
+    def async_register_descriptions(
+            self,
+            platform: Platform,
+            async_add_entities: AddEntitiesCallback,
+            descriptions: Mapping[str, Iterable[_DescriptionT]],
+            entity_class: Callable[[CustomerDevice, Manager, _DescriptionT], Entity],
+            is_supported: Callable[
+                [CustomerDevice, _DescriptionT], bool
+            ] = _key_in_status,
+    ) -> None:
+        """Register the description table of a platform.
+
+        An entity is created for every description of the category of a
+        device the device supports, by default when the key of the
+        description is part of the device status.
+        """
+        self._add_entities[platform] = async_add_entities
+        for category, category_descriptions in descriptions.items():
+            index = self._index.setdefault(category, [])
+            for description in category_descriptions:
+                index.append(
+                    (
+                        platform,
+                        _description_factory(entity_class, description, is_supported),
+                    )
+                )
+
+    @callback
+    def async_register_categories(
+            self,
+            platform: Platform,
+            async_add_entities: AddEntitiesCallback,
+            categories: Iterable[str],
+            entity_factory: EntityFactory,
+    ) -> None:
+        """Register a factory creating the entity of devices of categories."""
+        self._add_entities[platform] = async_add_entities
+        for category in categories:
+            self._index.setdefault(category, []).append((platform, entity_factory))
+
+    @callback
+    def async_setup(self) -> CALLBACK_TYPE:
+        """Discover new devices, return a callback to stop."""
+        return async_dispatcher_connect(
+            self.hass, SMART_LIFE_DISCOVERY_NEW, self._async_discover_new
+        )
+
+    @callback
+    def async_reset(self) -> None:
+        """Forget all registrations, once the platforms are unloaded."""
+        self.platforms.clear()
+        self._loading.clear()
+        self._add_entities.clear()
+        self._index.clear()
+
+    async def async_load_platforms(self, devices: Iterable[CustomerDevice]) -> None:
+        """Load the platforms needed by devices, that are not loaded yet.
+
+        Returns once all of them are loaded, including those another call
+        is still loading.
+        """
+        platforms = async_required_platforms(devices) - self.platforms
+        if new := platforms - self._loading.keys():
+            LOGGER.debug("Loading platforms %s", sorted(new))
+            task = self.hass.async_create_task(
+                self._async_forward(new), f"smartlife {self.entry.entry_id} platforms"
+            )
+            for platform in new:
+                self._loading[platform] = task
+        if tasks := {
+            self._loading[platform]
+            for platform in platforms
+            if platform in self._loading
+        }:
+            await asyncio.gather(*tasks)
+
+    async def _async_forward(self, platforms: set[Platform]) -> None:
+        """Forward the setup of platforms, marking them loaded once done."""
+        try:
+            await self.hass.config_entries.async_forward_entry_setups(
+                self.entry, platforms
+            )
+            self.platforms.update(platforms)
+        finally:
+            for platform in platforms:
+                self._loading.pop(platform, None)
+
+    @callback
+    def async_discover(self, device_ids: Iterable[str]) -> None:
+        """Create the entities of devices and add them to their platforms."""
+        entities: dict[Platform, list[Entity]] = {}
+        device_map = self.manager.device_map
+        for device_id in device_ids:
+            if (device := device_map.get(device_id)) is None:
+                continue
+            for platform, factory in self._index.get(device.category, ()):
+                try:
+                    entity = factory(device, self.manager)
+                except Exception:  # pylint: disable=broad-except
+                    LOGGER.exception(
+                        "Error creating %s entity of device %s", platform, device_id
+                    )
+                    continue
+                if entity is not None:
+                    entities.setdefault(platform, []).append(entity)
+
+        self.passes += 1
+        for platform, platform_entities in entities.items():
+            self.entities += len(platform_entities)
+            self._add_entities[platform](platform_entities)
+
+    @callback
+    def _async_discover_new(self, device_ids: list[str]) -> None:
+        """Discover new devices of this config entry."""
+        # The signal is shared by all config entries
+        device_map = self.manager.device_map
+        device_ids = [device_id for device_id in device_ids if device_id in device_map]
+        if not device_ids:
+            return
+        devices = [device_map[device_id] for device_id in device_ids]
+        if not async_required_platforms(devices) - self.platforms:
+            self.async_discover(device_ids)
+            return
+        self.entry.async_create_background_task(
+            self.hass,
+            self._async_load_and_discover(devices, device_ids),
+            f"smartlife {self.entry.entry_id} discover",
+        )
+
+    async def _async_load_and_discover(
+            self, devices: list[CustomerDevice], device_ids: list[str]
+    ) -> None:
+        """Load the platforms of new devices, then discover them."""
+        await self.async_load_platforms(devices)
+        self.async_discover(device_ids)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the loaded platforms and discovery counters."""
+        return {
+            "platforms": sorted(self.platforms),
+            "categories": len(self._index),
+            "passes": self.passes,
+            "entities": self.entities,
+        }
+
+
+def _description_factory(
+        entity_class: Callable[[CustomerDevice, Manager, _DescriptionT], Entity],
+        description: _DescriptionT,
+        is_supported: Callable[[CustomerDevice, _DescriptionT], bool],
+) -> EntityFactory:
+    """Return a factory creating the entity of a description."""
+
+    def factory(device: CustomerDevice, manager: Manager) -> Entity | None:
+        if not is_supported(device, description):
+            return None
+        return entity_class(device, manager, description)
+
+    return factory
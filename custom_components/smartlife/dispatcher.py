@@ -0,0 +1,256 @@
+"""Coalescing update dispatcher for Smart Life devices."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Iterable
+import threading
+import time
+from typing import Any
+
+from tuya_sharing import CustomerDevice
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .const import LOGGER
+from .metrics import Metrics
+
+SOURCE_MQ = "mq"
+SOURCE_LOCAL = "local"
+SOURCE_INTERNAL = "internal"
+
+
+class UpdateDispatcher:
+    """Coalesce device updates and fan them out to entities.
+
+    Status messages arrive on the MQ thread. Instead of hopping to the event
+    loop for every message, the status of the device is compared with the
+    previously seen status and the changed DPCodes are collected in a dirty
+    map. The dirty map is flushed once on the next event loop iteration, or
+    after ``window`` seconds when a coalescing window is configured.
+
+    Entities subscribe to the DPCodes that make up their state, and write
+    their state at most once per flush, only when one of those DPCodes has
+    changed. A change of the online state of a device refreshes all entities
+    of that device.
+
+    Updates are counted by source, so that the counters of the MQ messages
+    are not inflated by local pushes and by updates made by the integration
+    itself, such as optimistic states.
+    """
+
+    def __init__(
+            self,
+            hass: HomeAssistant,
+            window: float = 0.0,
+            metrics: Metrics | None = None,
+    ) -> None:
+        """Init UpdateDispatcher."""
+        self.hass = hass
+        self.window = window
+        self.metrics = metrics or Metrics()
+        self.updates_received: dict[str, int] = {}
+        self.updates_unchanged: dict[str, int] = {}
+        self.flushes = 0
+        self.state_writes = 0
+        self._lock = threading.Lock()
+        self._status: dict[str, tuple[bool, dict[str, Any]]] = {}
+        self._dirty: dict[str, set[str] | None] = {}
+        self._received: dict[str, float] = {}
+        # Monotonic arrival time of the last flushed change of each device
+        self.last_received: dict[str, float] = {}
+        self._scheduled = False
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._listeners: dict[str, dict[str | None, list[Callable[[], None]]]] = {}
+        # Called after the state writes of a device with the device id, the
+        # monotonic arrival time of its first pending change and the number
+        # of state writes
+        self.flush_listeners: list[Callable[[str, float, int], None]] = []
+
+    @callback
+    def async_connect(
+            self,
+            device_id: str,
+            target: Callable[[], None],
+            dpcodes: Iterable[str] | None = None,
+    ) -> CALLBACK_TYPE:
+        """Connect a callback to changes of DPCodes of a device.
+
+        Without DPCodes, the callback is called on any change of the device.
+        """
+        keys: set[str | None] = {None} if dpcodes is None else set(dpcodes)
+        device_listeners = self._listeners.setdefault(device_id, {})
+        for key in keys:
+            device_listeners.setdefault(key, []).append(target)
+
+        @callback
+        def async_remove_listener() -> None:
+            """Remove the callback."""
+            for key in keys:
+                listeners = device_listeners[key]
+                listeners.remove(target)
+                if not listeners:
+                    del device_listeners[key]
+            if (
+                    not device_listeners
+                    and self._listeners.get(device_id) is device_listeners
+            ):
+                del self._listeners[device_id]
+
+        return async_remove_listener
+
+    @callback
+    def async_subscriptions(
+            self, device_id: str
+    ) -> dict[Callable[[], None], set[str | None]]:
+        """Return the callbacks connected to a device and their DPCodes.
+
+        A None DPCode stands for a callback called on any change.
+        """
+        subscriptions: dict[Callable[[], None], set[str | None]] = {}
+        for key, targets in self._listeners.get(device_id, {}).items():
+            for target in targets:
+                subscriptions.setdefault(target, set()).add(key)
+        return subscriptions
+
+    @callback
+    def async_updated_since(self, since: float) -> set[str]:
+        """Return the devices with changes that arrived since a monotonic time."""
+        with self._lock:
+            pending = {
+                device_id
+                for device_id, received in self._received.items()
+                if received >= since
+            }
+        return pending | {
+            device_id
+            for device_id, received in self.last_received.items()
+            if received >= since
+        }
+
+    def update_device(
+            self, device: CustomerDevice, source: str = SOURCE_MQ
+    ) -> None:
+        """Record the changes of a device, safe to call from any thread."""
+        status = dict(device.status)
+        with self._lock:
+            self.updates_received[source] = self.updates_received.get(source, 0) + 1
+            previous = self._status.get(device.id)
+            self._status[device.id] = (device.online, status)
+
+            changed: set[str] | None = None
+            if previous is not None and previous[0] == device.online:
+                previous_status = previous[1]
+                changed = {
+                    dpcode
+                    for dpcode, value in status.items()
+                    if dpcode not in previous_status
+                    or previous_status[dpcode] != value
+                }
+                if not changed:
+                    self.updates_unchanged[source] = (
+                        self.updates_unchanged.get(source, 0) + 1
+                    )
+                    return
+
+            if device.id not in self._dirty:
+                self._dirty[device.id] = changed
+                self._received[device.id] = time.monotonic()
+            elif (dirty := self._dirty[device.id]) is not None:
+                if changed is None:
+                    self._dirty[device.id] = None
+                else:
+                    dirty.update(changed)
+
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.hass.loop.call_soon_threadsafe(self._async_schedule_flush)
+
+    @callback
+    def async_remove_device(self, device_id: str) -> None:
+        """Forget the last seen status of a device."""
+        with self._lock:
+            self._status.pop(device_id, None)
+            self._dirty.pop(device_id, None)
+            self._received.pop(device_id, None)
+        self.last_received.pop(device_id, None)
+
+    @callback
+    def async_stop(self) -> None:
+        """Cancel a pending flush."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        with self._lock:
+            self._status.clear()
+            self._dirty.clear()
+            self._received.clear()
+            self._scheduled = False
+        self.last_received.clear()
+
+    @callback
+    def _async_schedule_flush(self) -> None:
+        """Flush now, or once the coalescing window has passed."""
+        if self.window > 0:
+            self._flush_handle = self.hass.loop.call_later(
+                self.window, self._async_flush
+            )
+            return
+        self._async_flush()
+
+    @callback
+    def _async_flush(self) -> None:
+        """Write the state of all entities affected by the dirty DPCodes."""
+        self._flush_handle = None
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+            received, self._received = self._received, {}
+            self._scheduled = False
+
+        self.flushes += 1
+        mq_dispatch = self.metrics.mq_dispatch.record
+        dispatch_write = self.metrics.dispatch_write.record
+        start = time.monotonic()
+        for device_id, changed in dirty.items():
+            mq_dispatch(start - received[device_id])
+            self.last_received[device_id] = received[device_id]
+            writes = 0
+            for target in self._async_targets(device_id, changed):
+                try:
+                    target()
+                except Exception:  # pylint: disable=broad-except
+                    LOGGER.exception("Error updating entity of device %s", device_id)
+                    continue
+                dispatch_write(time.monotonic() - start)
+                writes += 1
+            self.state_writes += writes
+            for flush_listener in self.flush_listeners:
+                flush_listener(device_id, received[device_id], writes)
+
+    @callback
+    def _async_targets(
+            self, device_id: str, changed: set[str] | None
+    ) -> list[Callable[[], None]]:
+        """Return the callbacks to call for the changed DPCodes of a device."""
+        if not (device_listeners := self._listeners.get(device_id)):
+            return []
+
+        keys = device_listeners if changed is None else (None, *changed)
+
+        # An entity listening to multiple changed DPCodes is only called once
+        targets: dict[Callable[[], None], None] = {}
+        for key in keys:
+            targets.update(dict.fromkeys(device_listeners.get(key, ())))
+        return list(targets)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the dispatcher counters."""
+        return {
+            "window": self.window,
+            "messages_received": self.updates_received.get(SOURCE_MQ, 0),
+            "messages_unchanged": self.updates_unchanged.get(SOURCE_MQ, 0),
+            "updates_received": dict(self.updates_received),
+            "updates_unchanged": dict(self.updates_unchanged),
+            "flushes": self.flushes,
+            "state_writes": self.state_writes,
+        }
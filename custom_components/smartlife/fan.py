@@ -12,8 +12,8 @@ from homeassistant.components.fan import (
     FanEntityFeature,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.util.percentage import (
     ordered_list_item_to_percentage,
@@ -22,7 +22,7 @@ from homeassistant.util.percentage import (
 
 from . import HomeAssistantSmartLifeData
 from .base import EnumTypeData, IntegerTypeData, SmartLifeEntity
-from .const import DOMAIN, SMART_LIFE_DISCOVERY_NEW, DPCode, DPType
+from .const import DOMAIN, DPCode, DPType
 
 SMART_LIFE_SUPPORT_TYPE = {
     "fs",  # Fan
@@ -33,26 +33,29 @@ SMART_LIFE_SUPPORT_TYPE = {
 }
 
 
+def _create_entity(
+    device: CustomerDevice, device_manager: Manager
+) -> SmartLifeFanEntity | None:
+    """Create the fan entity of a device with a fan switch."""
+    if not any(
+        dpcode in device.status
+        for dpcode in (DPCode.SWITCH_FAN, DPCode.FAN_SWITCH, DPCode.SWITCH)
+    ):
+        return None
+    return SmartLifeFanEntity(device, device_manager)
+
+
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
     """Set up smartlife fan dynamically through smartlife discovery."""
     hass_data: HomeAssistantSmartLifeData = hass.data[DOMAIN][entry.entry_id]
 
-    @callback
-    def async_discover_device(device_ids: list[str]) -> None:
-        """Discover and add a discovered smartlife fan."""
-        entities: list[SmartLifeFanEntity] = []
-        for device_id in device_ids:
-            device = hass_data.manager.device_map[device_id]
-            if device and device.category in SMART_LIFE_SUPPORT_TYPE and any(e in device.status for e in [DPCode.SWITCH_FAN, DPCode.FAN_SWITCH, DPCode.SWITCH]):
-                entities.append(SmartLifeFanEntity(device, hass_data.manager))
-        async_add_entities(entities)
-
-    async_discover_device([*hass_data.manager.device_map])
-
-    entry.async_on_unload(
-        async_dispatcher_connect(hass, SMART_LIFE_DISCOVERY_NEW, async_discover_device)
+    hass_data.discovery.async_register_categories(
+        Platform.FAN,
+        async_add_entities,
+        SMART_LIFE_SUPPORT_TYPE,
+        _create_entity,
     )
 
 
@@ -116,22 +119,26 @@ class SmartLifeFanEntity(SmartLifeEntity, FanEntity):
             self._direction = enum_type
             self._attr_supported_features |= FanEntityFeature.DIRECTION
 
-    def set_preset_mode(self, preset_mode: str) -> None:
+    async def async_set_preset_mode(self, preset_mode: str) -> None:
         """Set the preset mode of the fan."""
         if self._presets is None:
             return
-        self._send_command([{"code": self._presets.dpcode, "value": preset_mode}])
+        await self._async_send_command(
+            [{"code": self._presets.dpcode, "value": preset_mode}]
+        )
 
-    def set_direction(self, direction: str) -> None:
+    async def async_set_direction(self, direction: str) -> None:
         """Set the direction of the fan."""
         if self._direction is None:
             return
-        self._send_command([{"code": self._direction.dpcode, "value": direction}])
+        await self._async_send_command(
+            [{"code": self._direction.dpcode, "value": direction}]
+        )
 
-    def set_percentage(self, percentage: int) -> None:
+    async def async_set_percentage(self, percentage: int) -> None:
         """Set the speed of the fan, as a percentage."""
         if self._speed is not None:
-            self._send_command(
+            await self._async_send_command(
                 [
                     {
                         "code": self._speed.dpcode,
@@ -142,7 +149,7 @@ class SmartLifeFanEntity(SmartLifeEntity, FanEntity):
             return
 
         if self._speeds is not None:
-            self._send_command(
+            await self._async_send_command(
                 [
                     {
                         "code": self._speeds.dpcode,
@@ -153,11 +160,11 @@ class SmartLifeFanEntity(SmartLifeEntity, FanEntity):
                 ]
             )
 
-    def turn_off(self, **kwargs: Any) -> None:
+    async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the fan off."""
-        self._send_command([{"code": self._switch, "value": False}])
+        await self._async_send_command([{"code": self._switch, "value": False}])
 
-    def turn_on(
+    async def async_turn_on(
         self,
         percentage: int | None = None,
         preset_mode: str | None = None,
@@ -192,13 +199,15 @@ class SmartLifeFanEntity(SmartLifeEntity, FanEntity):
         if preset_mode is not None and self._presets is not None:
             commands.append({"code": self._presets.dpcode, "value": preset_mode})
 
-        self._send_command(commands)
+        await self._async_send_command(commands)
 
-    def oscillate(self, oscillating: bool) -> None:
+    async def async_oscillate(self, oscillating: bool) -> None:
         """Oscillate the fan."""
         if self._oscillate is None:
             return
-        self._send_command([{"code": self._oscillate, "value": oscillating}])
+        await self._async_send_command(
+            [{"code": self._oscillate, "value": oscillating}]
+        )
 
     @property
     def is_on(self) -> bool | None:
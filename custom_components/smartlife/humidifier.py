@@ -12,13 +12,13 @@ from homeassistant.components.humidifier import (
     HumidifierEntityFeature,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import HomeAssistantSmartLifeData
 from .base import IntegerTypeData, SmartLifeEntity
-from .const import DOMAIN, SMART_LIFE_DISCOVERY_NEW, DPCode, DPType
+from .const import DOMAIN, DPCode, DPType
 
 
 @dataclass
@@ -51,29 +51,27 @@ HUMIDIFIERS: dict[str, SmartLifeHumidifierEntityDescription] = {
 }
 
 
+def _is_supported(
+    device: CustomerDevice, description: SmartLifeHumidifierEntityDescription
+) -> bool:
+    """Return if a device reports the DPCodes of a (de)humidifier."""
+    return description.key in device.status or any(
+        item in device.status for item in description.dpcode
+    )
+
+
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
     """Set up smartlife (de)humidifier dynamically through smartlife discovery."""
     hass_data: HomeAssistantSmartLifeData = hass.data[DOMAIN][entry.entry_id]
 
-    @callback
-    def async_discover_device(device_ids: list[str]) -> None:
-        """Discover and add a discovered smartlife (de)humidifier."""
-        entities: list[SmartLifeHumidifierEntity] = []
-        for device_id in device_ids:
-            device = hass_data.manager.device_map[device_id]
-            if description := HUMIDIFIERS.get(device.category):
-                if description.key in device.status or any(item in device.status for item in description.dpcode):
-                    entities.append(
-                        SmartLifeHumidifierEntity(device, hass_data.manager, description)
-                    )
-        async_add_entities(entities)
-
-    async_discover_device([*hass_data.manager.device_map])
-
-    entry.async_on_unload(
-        async_dispatcher_connect(hass, SMART_LIFE_DISCOVERY_NEW, async_discover_device)
+    hass_data.discovery.async_register_descriptions(
+        Platform.HUMIDIFIER,
+        async_add_entities,
+        {category: (description,) for category, description in HUMIDIFIERS.items()},
+        SmartLifeHumidifierEntity,
+        _is_supported,
     )
 
 
@@ -115,6 +113,10 @@ class SmartLifeHumidifierEntity(SmartLifeEntity, HumidifierEntity):
             self._attr_supported_features |= HumidifierEntityFeature.MODES
             self._attr_available_modes = enum_type.range
 
+    def state_dpcodes(self) -> set[str] | None:
+        """Return the DPCodes the state of this entity is derived from."""
+        return super().state_dpcodes() | {DPCode.MODE}
+
     @property
     def is_on(self) -> bool:
         """Return the device is on or off."""
@@ -139,22 +141,22 @@ class SmartLifeHumidifierEntity(SmartLifeEntity, HumidifierEntity):
 
         return round(self._set_humidity.scale_value(humidity))
 
-    def turn_on(self, **kwargs):
+    async def async_turn_on(self, **kwargs):
         """Turn the device on."""
-        self._send_command([{"code": self._switch_dpcode, "value": True}])
+        await self._async_send_command([{"code": self._switch_dpcode, "value": True}])
 
-    def turn_off(self, **kwargs):
+    async def async_turn_off(self, **kwargs):
         """Turn the device off."""
-        self._send_command([{"code": self._switch_dpcode, "value": False}])
+        await self._async_send_command([{"code": self._switch_dpcode, "value": False}])
 
-    def set_humidity(self, humidity: int) -> None:
+    async def async_set_humidity(self, humidity: int) -> None:
         """Set new target humidity."""
         if self._set_humidity is None:
             raise RuntimeError(
                 "Cannot set humidity, device doesn't provide methods to set it"
             )
 
-        self._send_command(
+        await self._async_send_command(
             [
                 {
                     "code": self._set_humidity.dpcode,
@@ -163,6 +165,6 @@ class SmartLifeHumidifierEntity(SmartLifeEntity, HumidifierEntity):
             ]
         )
 
-    def set_mode(self, mode):
+    async def async_set_mode(self, mode):
         """Set new target preset mode."""
-        self._send_command([{"code": DPCode.MODE, "value": mode}])
+        await self._async_send_command([{"code": DPCode.MODE, "value": mode}])
@@ -3,7 +3,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 import json
-from typing import Any, cast
+from typing import Any
 
 from tuya_sharing import Manager, CustomerDevice
 
@@ -16,14 +16,15 @@ from homeassistant.components.light import (
     LightEntityDescription,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import EntityCategory
-from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.const import EntityCategory, Platform
+from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import HomeAssistantSmartLifeData
-from .base import IntegerTypeData, SmartLifeEntity
-from .const import DOMAIN, SMART_LIFE_DISCOVERY_NEW, DPCode, DPType, WorkMode
+from .base import IntegerTypeData, SmartLifeEntity, get_device_schema
+from .command import CommandPriority
+from .const import DOMAIN, DPCode, DPType, WorkMode
+from .metrics import COUNTERS
 from .util import remap_value
 
 
@@ -368,27 +369,11 @@ async def async_setup_entry(
     """Set up smartlife light dynamically through smartlife discovery."""
     hass_data: HomeAssistantSmartLifeData = hass.data[DOMAIN][entry.entry_id]
 
-    @callback
-    def async_discover_device(device_ids: list[str]):
-        """Discover and add a discovered smartlife light."""
-        entities: list[SmartLifeLightEntity] = []
-        for device_id in device_ids:
-            device = hass_data.manager.device_map[device_id]
-            if descriptions := LIGHTS.get(device.category):
-                for description in descriptions:
-                    if description.key in device.status:
-                        entities.append(
-                            SmartLifeLightEntity(
-                                device, hass_data.manager, description
-                            )
-                        )
-
-        async_add_entities(entities)
-
-    async_discover_device([*hass_data.manager.device_map])
-
-    entry.async_on_unload(
-        async_dispatcher_connect(hass, SMART_LIFE_DISCOVERY_NEW, async_discover_device)
+    hass_data.discovery.async_register_descriptions(
+        Platform.LIGHT,
+        async_add_entities,
+        LIGHTS,
+        SmartLifeLightEntity,
     )
 
 
@@ -397,6 +382,7 @@ class SmartLifeLightEntity(SmartLifeEntity, LightEntity):
 
     entity_description: SmartLifeLightEntityDescription
 
+    _command_priority = CommandPriority.LIGHT
     _brightness_max: IntegerTypeData | None = None
     _brightness_min: IntegerTypeData | None = None
     _brightness: IntegerTypeData | None = None
@@ -445,13 +431,9 @@ class SmartLifeLightEntity(SmartLifeEntity, LightEntity):
         ) and self.get_dptype(dpcode) == DPType.JSON:
             self._color_data_dpcode = dpcode
             self._attr_supported_color_modes.add(ColorMode.HS)
-            if dpcode in self.device.function:
-                values = cast(str, self.device.function[dpcode].values)
-            else:
-                values = self.device.status_range[dpcode].values
 
             # Fetch color data type information
-            if function_data := json.loads(values):
+            if function_data := get_device_schema(self.device).get_values(dpcode):
                 self._color_data_type = ColorTypeData(
                     h_type=IntegerTypeData(dpcode, **function_data["h"]),
                     s_type=IntegerTypeData(dpcode, **function_data["s"]),
@@ -473,7 +455,7 @@ class SmartLifeLightEntity(SmartLifeEntity, LightEntity):
         """Return true if light is on."""
         return self.device.status.get(self.entity_description.key, False)
 
-    def turn_on(self, **kwargs: Any) -> None:
+    async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn on or control the light."""
         commands = [{"code": self.entity_description.key, "value": True}]
 
@@ -585,11 +567,13 @@ class SmartLifeLightEntity(SmartLifeEntity, LightEntity):
                 },
             ]
 
-        self._send_command(commands)
+        await self._async_send_command(commands)
 
-    def turn_off(self, **kwargs: Any) -> None:
+    async def async_turn_off(self, **kwargs: Any) -> None:
         """Instruct the light to turn off."""
-        self._send_command([{"code": self.entity_description.key, "value": False}])
+        await self._async_send_command(
+            [{"code": self.entity_description.key, "value": False}]
+        )
 
     @property
     def brightness(self) -> int | None:
@@ -684,6 +668,7 @@ class SmartLifeLightEntity(SmartLifeEntity, LightEntity):
         if not (status_data := self.device.status[self._color_data_dpcode]):
             return None
 
+        COUNTERS.json_parse += 1
         if not (status := json.loads(status_data)):
             return None
 
@@ -0,0 +1,387 @@
+"""Local LAN control of Smart Life devices supporting it."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+import contextlib
+from itertools import count
+import time
+from typing import Any
+
+from tuya_sharing import CustomerDevice, Manager
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import LOGGER
+from .dispatcher import SOURCE_LOCAL, UpdateDispatcher
+from .local_protocol import (
+    TCP_PORT,
+    UDP_PORT,
+    UDP_PORT_ENCRYPTED,
+    Command,
+    Message,
+    ProtocolError,
+    decode_discovery,
+    decode_payload,
+    encode_payload,
+    pack_message,
+    unpack_message,
+)
+from .tracing import DebugTracer
+
+CONNECT_TIMEOUT = 5.0
+RESPONSE_TIMEOUT = 2.0
+HEART_BEAT_INTERVAL = 10.0
+RECONNECT_DELAY = 30.0
+
+# Values of these types are the same locally and in the cloud, DPCodes of
+# other types (JSON color data, raw) are left to the cloud.
+LOCAL_VALUE_TYPES = {"Boolean", "Integer", "Enum"}
+
+
+class LocalConnection:
+    """Persistent TCP connection to a device."""
+
+    def __init__(
+            self,
+            hass: HomeAssistant,
+            device_id: str,
+            host: str,
+            local_key: bytes,
+            on_dps: Callable[[str, dict[str, Any]], None],
+            on_close: Callable[[LocalConnection], None],
+    ) -> None:
+        """Init LocalConnection."""
+        self.hass = hass
+        self.device_id = device_id
+        self.host = host
+        self.local_key = local_key
+        self.connected = False
+        self._on_dps = on_dps
+        self._on_close = on_close
+        self._seq = count(1)
+        self._responses: dict[int, asyncio.Future[Message]] = {}
+        self._writer: asyncio.StreamWriter | None = None
+        self._tasks: list[asyncio.Task[None]] = []
+
+    async def async_connect(self) -> None:
+        """Connect to the device and query its status."""
+        reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, TCP_PORT), CONNECT_TIMEOUT
+        )
+        self.connected = True
+        self._tasks = [
+            self.hass.async_create_background_task(
+                self._async_read(reader), f"smartlife local read {self.device_id}"
+            ),
+            self.hass.async_create_background_task(
+                self._async_heart_beat(), f"smartlife local heart beat {self.device_id}"
+            ),
+        ]
+        response = await self.async_request(
+            Command.DP_QUERY,
+            {"gwId": self.device_id, "devId": self.device_id, "uid": self.device_id},
+        )
+        if payload := decode_payload(self.local_key, response.payload):
+            self._on_dps(self.device_id, payload.get("dps", {}))
+
+    async def async_request(self, cmd: Command, payload: dict[str, Any]) -> Message:
+        """Send a command and wait for its response."""
+        if self._writer is None or not self.connected:
+            raise ConnectionError("Not connected")
+
+        seq = next(self._seq)
+        future: asyncio.Future[Message] = asyncio.get_running_loop().create_future()
+        self._responses[seq] = future
+        payload = {**payload, "t": str(int(time.time()))}
+        self._writer.write(
+            pack_message(
+                Message(seq, cmd, encode_payload(self.local_key, cmd, payload))
+            )
+        )
+        try:
+            await self._writer.drain()
+            response = await asyncio.wait_for(future, RESPONSE_TIMEOUT)
+        except (OSError, asyncio.TimeoutError) as err:
+            self.close()
+            raise ConnectionError(f"No response from {self.host}") from err
+        finally:
+            self._responses.pop(seq, None)
+
+        if response.retcode:
+            raise ConnectionError(f"Device returned {response.retcode}")
+        return response
+
+    @callback
+    def close(self) -> None:
+        """Close the connection."""
+        if not self.connected:
+            return
+        self.connected = False
+        for task in self._tasks:
+            if task is not asyncio.current_task():
+                task.cancel()
+        for future in self._responses.values():
+            if not future.done():
+                future.set_exception(ConnectionError("Connection closed"))
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._on_close(self)
+
+    async def _async_read(self, reader: asyncio.StreamReader) -> None:
+        """Read messages until the connection is closed."""
+        buffer = bytearray()
+        try:
+            while data := await reader.read(4096):
+                buffer += data
+                while True:
+                    message, consumed = unpack_message(buffer)
+                    if message is None:
+                        break
+                    del buffer[:consumed]
+                    self._handle_message(message)
+        except (OSError, ProtocolError) as err:
+            LOGGER.debug("Local connection to %s failed: %s", self.device_id, err)
+        self.close()
+
+    @callback
+    def _handle_message(self, message: Message) -> None:
+        """Resolve responses and forward pushed status."""
+        future = self._responses.get(message.seq)
+        if future is not None and not future.done():
+            future.set_result(message)
+        if message.cmd != Command.STATUS:
+            return
+        with contextlib.suppress(ProtocolError):
+            if payload := decode_payload(self.local_key, message.payload):
+                self._on_dps(self.device_id, payload.get("dps", {}))
+
+    async def _async_heart_beat(self) -> None:
+        """Keep the connection alive."""
+        while self.connected:
+            await asyncio.sleep(HEART_BEAT_INTERVAL)
+            try:
+                await self.async_request(Command.HEART_BEAT, {})
+            except ConnectionError:
+                return
+
+
+class DiscoveryProtocol(asyncio.DatagramProtocol):
+    """Receive the UDP broadcasts of devices."""
+
+    def __init__(self, on_discovered: Callable[[dict[str, Any]], None]) -> None:
+        """Init DiscoveryProtocol."""
+        self._on_discovered = on_discovered
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        """Handle a discovery broadcast."""
+        try:
+            info = decode_discovery(data)
+        except ProtocolError:
+            return
+        info.setdefault("ip", addr[0])
+        self._on_discovered(info)
+
+
+class LocalTransport:
+    """Send commands to devices over the LAN, with the cloud as fallback.
+
+    Devices reporting `support_local` are discovered through their UDP
+    broadcasts, and a persistent connection is kept to each of them. The
+    DPCodes of a device are mapped to its DP ids through the local strategy
+    of the device. Status pushed over a connection is applied like an MQ
+    update.
+    """
+
+    def __init__(
+            self,
+            hass: HomeAssistant,
+            manager: Manager,
+            dispatcher: UpdateDispatcher,
+            tracer: DebugTracer | None = None,
+    ) -> None:
+        """Init LocalTransport."""
+        self.hass = hass
+        self.manager = manager
+        self.dispatcher = dispatcher
+        self.tracer = tracer or DebugTracer()
+        self.commands_sent = 0
+        self.commands_failed = 0
+        self.status_received = 0
+        self._hosts: dict[str, str] = {}
+        self._connections: dict[str, LocalConnection] = {}
+        self._connecting: set[str] = set()
+        self._retry_after: dict[str, float] = {}
+        self._transports: list[asyncio.DatagramTransport] = []
+
+    @property
+    def running(self) -> bool:
+        """Return if the transport listens for devices."""
+        return bool(self._transports)
+
+    async def async_start(self) -> None:
+        """Listen for device broadcasts."""
+        for port in (UDP_PORT, UDP_PORT_ENCRYPTED):
+            try:
+                transport, _ = await self.hass.loop.create_datagram_endpoint(
+                    lambda: DiscoveryProtocol(self._async_discovered),
+                    local_addr=("0.0.0.0", port),
+                    reuse_port=True,
+                )
+            except OSError as err:
+                LOGGER.warning("Cannot listen for local devices on %s: %s", port, err)
+                continue
+            self._transports.append(transport)
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop listening and close all connections."""
+        for transport in self._transports:
+            transport.close()
+        self._transports.clear()
+        for connection in list(self._connections.values()):
+            connection.close()
+        self._connections.clear()
+
+    @callback
+    def available(self, device_id: str) -> bool:
+        """Return if a device is connected locally."""
+        return (
+            connection := self._connections.get(device_id)
+        ) is not None and connection.connected
+
+    async def async_send_commands(
+            self, device_id: str, commands: dict[str, Any]
+    ) -> bool:
+        """Send commands over the LAN, return False to fall back to the cloud."""
+        if (
+                (connection := self._connections.get(device_id)) is None
+                or (device := self.manager.device_map.get(device_id)) is None
+                or (dps := _commands_to_dps(device, commands)) is None
+        ):
+            return False
+
+        try:
+            await connection.async_request(
+                Command.CONTROL,
+                {"devId": device_id, "uid": device_id, "dps": dps},
+            )
+        except (ConnectionError, ProtocolError) as err:
+            LOGGER.debug("Local command to %s failed: %s", device_id, err)
+            self.commands_failed += 1
+            return False
+
+        self.commands_sent += 1
+        return True
+
+    @callback
+    def _async_discovered(self, info: dict[str, Any]) -> None:
+        """Connect to a discovered device."""
+        if not (device_id := info.get("gwId")) or not (host := info.get("ip")):
+            return
+        self._hosts[device_id] = host
+        if (
+                device_id in self._connections
+                or device_id in self._connecting
+                or self._retry_after.get(device_id, 0) > time.monotonic()
+                or (device := self.manager.device_map.get(device_id)) is None
+                or not device.support_local
+                or not getattr(device, "local_key", None)
+        ):
+            return
+
+        self._connecting.add(device_id)
+        connection = LocalConnection(
+            self.hass,
+            device_id,
+            host,
+            device.local_key.encode(),
+            self._async_handle_dps,
+            self._async_closed,
+        )
+        self.hass.async_create_background_task(
+            self._async_connect(connection), f"smartlife local connect {device_id}"
+        )
+
+    async def _async_connect(self, connection: LocalConnection) -> None:
+        """Connect to a device."""
+        try:
+            self._connections[connection.device_id] = connection
+            await connection.async_connect()
+        except (OSError, asyncio.TimeoutError, ConnectionError, ProtocolError) as err:
+            LOGGER.debug(
+                "Cannot connect to %s at %s: %s",
+                connection.device_id,
+                connection.host,
+                err,
+            )
+            connection.close()
+            self._connections.pop(connection.device_id, None)
+            self._retry_after[connection.device_id] = (
+                time.monotonic() + RECONNECT_DELAY
+            )
+        else:
+            LOGGER.debug(
+                "Connected to %s at %s", connection.device_id, connection.host
+            )
+        finally:
+            self._connecting.discard(connection.device_id)
+
+    @callback
+    def _async_closed(self, connection: LocalConnection) -> None:
+        """Forget a closed connection, it is reopened on the next broadcast."""
+        if self._connections.get(connection.device_id) is connection:
+            del self._connections[connection.device_id]
+
+    @callback
+    def _async_handle_dps(self, device_id: str, dps: dict[str, Any]) -> None:
+        """Apply status pushed by a device."""
+        if (device := self.manager.device_map.get(device_id)) is None:
+            return
+        strategy = _local_strategy(device)
+        changed = False
+        for dp_id, value in dps.items():
+            if (item := strategy.get(str(dp_id))) is None:
+                continue
+            device.status[item["status_code"]] = value
+            changed = True
+        if changed:
+            if self.tracer.enabled and self.tracer.is_tracing(device_id):
+                self.tracer.trace("local_status", device_id, dps=dps)
+            self.status_received += 1
+            self.dispatcher.update_device(device, SOURCE_LOCAL)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the local transport counters."""
+        return {
+            "running": self.running,
+            "discovered": len(self._hosts),
+            "connected": sorted(self._connections),
+            "commands_sent": self.commands_sent,
+            "commands_failed": self.commands_failed,
+            "status_received": self.status_received,
+        }
+
+
+def _local_strategy(device: CustomerDevice) -> dict[str, dict[str, Any]]:
+    """Return the local strategy items usable locally, by DP id."""
+    return {
+        str(dp_id): item
+        for dp_id, item in (getattr(device, "local_strategy", None) or {}).items()
+        if "status_code" in item
+        and item.get("config_item", {}).get("valueType") in LOCAL_VALUE_TYPES
+        and item.get("value_convert", "default") == "default"
+    }
+
+
+def _commands_to_dps(
+        device: CustomerDevice, commands: dict[str, Any]
+) -> dict[str, Any] | None:
+    """Map commands to DP ids, or None if any of them cannot be sent locally."""
+    dp_ids = {
+        item["status_code"]: dp_id for dp_id, item in _local_strategy(device).items()
+    }
+    if not all(code in dp_ids for code in commands):
+        return None
+    return {dp_ids[code]: value for code, value in commands.items()}
@@ -0,0 +1,154 @@
+"""Tuya local protocol, version 3.3.
+
+This module has no Home Assistant dependencies, so it can be shared with
+the device simulator in `tools/`.
+"""
+from __future__ import annotations
+
+import binascii
+from dataclasses import dataclass
+from enum import IntEnum
+from hashlib import md5
+import json
+import struct
+from typing import Any
+
+from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+PREFIX = 0x000055AA
+SUFFIX = 0x0000AA55
+HEADER = struct.Struct(">4I")
+FOOTER = struct.Struct(">2I")
+RETCODE = struct.Struct(">I")
+
+TCP_PORT = 6668
+UDP_PORT = 6666
+UDP_PORT_ENCRYPTED = 6667
+UDP_KEY = md5(b"yGAdlopoPVldABfn").digest()
+
+VERSION = b"3.3"
+VERSION_HEADER = VERSION + bytes(12)
+
+
+class Command(IntEnum):
+    """Commands of the local protocol."""
+
+    CONTROL = 7
+    STATUS = 8
+    HEART_BEAT = 9
+    DP_QUERY = 10
+    DISCOVERY = 19
+
+
+class ProtocolError(Exception):
+    """Malformed local protocol message."""
+
+
+@dataclass
+class Message:
+    """Local protocol message."""
+
+    seq: int
+    cmd: int
+    payload: bytes
+    retcode: int | None = None
+
+
+def encrypt(key: bytes, data: bytes) -> bytes:
+    """Encrypt data with AES-128-ECB and PKCS7 padding."""
+    padder = padding.PKCS7(128).padder()
+    data = padder.update(data) + padder.finalize()
+    encryptor = Cipher(algorithms.AES(key), modes.ECB()).encryptor()
+    return encryptor.update(data) + encryptor.finalize()
+
+
+def decrypt(key: bytes, data: bytes) -> bytes:
+    """Decrypt data encrypted with AES-128-ECB and PKCS7 padding."""
+    decryptor = Cipher(algorithms.AES(key), modes.ECB()).decryptor()
+    data = decryptor.update(data) + decryptor.finalize()
+    unpadder = padding.PKCS7(128).unpadder()
+    return unpadder.update(data) + unpadder.finalize()
+
+
+def pack_message(message: Message) -> bytes:
+    """Return a message as bytes."""
+    body = message.payload
+    if message.retcode is not None:
+        body = RETCODE.pack(message.retcode) + body
+    header = HEADER.pack(PREFIX, message.seq, message.cmd, len(body) + FOOTER.size)
+    crc = binascii.crc32(header + body) & 0xFFFFFFFF
+    return header + body + FOOTER.pack(crc, SUFFIX)
+
+
+def unpack_message(data: bytes | bytearray) -> tuple[Message | None, int]:
+    """Unpack the first message of a buffer.
+
+    Returns the message and the number of bytes consumed, or None and 0
+    when the buffer does not hold a complete message yet.
+    """
+    if len(data) < HEADER.size:
+        return None, 0
+
+    prefix, seq, cmd, length = HEADER.unpack_from(data)
+    if prefix != PREFIX:
+        raise ProtocolError(f"Invalid prefix {prefix:#010x}")
+    end = HEADER.size + length
+    if len(data) < end:
+        return None, 0
+
+    body = bytes(data[HEADER.size:end - FOOTER.size])
+    crc, suffix = FOOTER.unpack_from(data, end - FOOTER.size)
+    if suffix != SUFFIX:
+        raise ProtocolError(f"Invalid suffix {suffix:#010x}")
+    if crc != binascii.crc32(bytes(data[:end - FOOTER.size])) & 0xFFFFFFFF:
+        raise ProtocolError("CRC mismatch")
+
+    # Messages sent by devices start with a return code, payloads never
+    # start with three zero bytes.
+    retcode = None
+    if len(body) >= RETCODE.size and body[:3] == b"\x00\x00\x00":
+        (retcode,) = RETCODE.unpack_from(body)
+        body = body[RETCODE.size:]
+    return Message(seq, cmd, body, retcode), end
+
+
+def encode_payload(key: bytes, cmd: int, payload: dict[str, Any]) -> bytes:
+    """Return an encrypted payload for a command."""
+    data = encrypt(key, json.dumps(payload, separators=(",", ":")).encode())
+    if cmd not in (Command.DP_QUERY, Command.HEART_BEAT):
+        data = VERSION_HEADER + data
+    return data
+
+
+def decode_payload(key: bytes, payload: bytes) -> dict[str, Any] | None:
+    """Return a decrypted payload, or None for an empty payload."""
+    if payload.startswith(VERSION):
+        payload = payload[len(VERSION_HEADER):]
+    if not payload:
+        return None
+    try:
+        return json.loads(decrypt(key, payload))
+    except ValueError as err:
+        raise ProtocolError("Cannot decrypt payload") from err
+
+
+def decode_discovery(data: bytes) -> dict[str, Any]:
+    """Return the device information of a UDP discovery packet."""
+    message, _ = unpack_message(data)
+    if message is None:
+        raise ProtocolError("Incomplete discovery packet")
+    try:
+        return json.loads(message.payload)
+    except ValueError:
+        pass
+    try:
+        return json.loads(decrypt(UDP_KEY, message.payload))
+    except ValueError as err:
+        raise ProtocolError("Cannot decode discovery packet") from err
+
+
+def encode_discovery(info: dict[str, Any]) -> bytes:
+    """Return an encrypted UDP discovery packet."""
+    payload = encrypt(UDP_KEY, json.dumps(info, separators=(",", ":")).encode())
+    return pack_message(Message(0, Command.DISCOVERY, payload, retcode=0))
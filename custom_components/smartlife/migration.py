@@ -0,0 +1,133 @@
+"""Versioned migrations of smartlife config entries."""
+from __future__ import annotations
+
+from collections.abc import Callable
+
+from homeassistant.components.light import DOMAIN as LIGHT_DOMAIN
+from homeassistant.components.switch import DOMAIN as SWITCH_DOMAIN
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+
+from .const import DOMAIN, LOGGER, DPCode
+
+MigrationFunc = Callable[[HomeAssistant, ConfigEntry], None]
+
+
+@callback
+def async_migrate_unique_ids(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Migrate unique_ids of lights and switches to the DPCode format.
+
+    Old lights where in `smartlife.{device_id}` format, now the DPCode is
+    added. Previously only devices providing the SWITCH_LED DPCode were
+    supported, thus this can be added to those existing IDs.
+
+    `smartlife.{device_id}` -> `smartlife.{device_id}{SWITCH_LED}`
+
+    Old switches has different formats for the unique ID, but is mappable.
+
+    `smartlife.{device_id}` -> `smartlife.{device_id}{SWITCH}`
+    `smartlife.{device_id}_1` -> `smartlife.{device_id}{SWITCH_1}`
+    ...
+    `smartlife.{device_id}_usb6` -> `smartlife.{device_id}{SWITCH_USB6}`
+
+    Migrations run before the devices are loaded, the device id of an entity
+    is taken from the device registry. The old formats are never produced
+    for other categories, so they are matched without a category check.
+    """
+    device_registry = dr.async_get(hass)
+    entity_registry = er.async_get(hass)
+    registry_entries = er.async_entries_for_config_entry(
+        entity_registry, entry.entry_id
+    )
+    unique_ids = {
+        (registry_entry.domain, registry_entry.unique_id)
+        for registry_entry in registry_entries
+    }
+
+    for registry_entry in registry_entries:
+        if (
+                registry_entry.device_id is None
+                or (device := device_registry.async_get(registry_entry.device_id))
+                is None
+        ):
+            continue
+        device_id = next(
+            (
+                identifier
+                for domain, identifier in device.identifiers
+                if domain == DOMAIN
+            ),
+            None,
+        )
+        if device_id is None:
+            continue
+
+        migrations: dict[str, DPCode] = {}
+        if registry_entry.domain == LIGHT_DOMAIN:
+            migrations = {"": DPCode.SWITCH_LED}
+        elif registry_entry.domain == SWITCH_DOMAIN:
+            migrations = {
+                "": DPCode.SWITCH,
+                "_1": DPCode.SWITCH_1,
+                "_2": DPCode.SWITCH_2,
+                "_3": DPCode.SWITCH_3,
+                "_4": DPCode.SWITCH_4,
+                "_5": DPCode.SWITCH_5,
+                "_6": DPCode.SWITCH_6,
+                "_usb1": DPCode.SWITCH_USB1,
+                "_usb2": DPCode.SWITCH_USB2,
+                "_usb3": DPCode.SWITCH_USB3,
+                "_usb4": DPCode.SWITCH_USB4,
+                "_usb5": DPCode.SWITCH_USB5,
+                "_usb6": DPCode.SWITCH_USB6,
+            }
+
+        prefix = f"smartlife.{device_id}"
+        if not registry_entry.unique_id.startswith(prefix) or (
+                dpcode := migrations.get(registry_entry.unique_id[len(prefix):])
+        ) is None:
+            continue
+        new_unique_id = f"{prefix}{dpcode}"
+        if (registry_entry.domain, new_unique_id) in unique_ids:
+            continue
+        entity_registry.async_update_entity(
+            registry_entry.entity_id, new_unique_id=new_unique_id
+        )
+        unique_ids.add((registry_entry.domain, new_unique_id))
+
+
+# The version and minor version reached by each migration, in order. Add
+# new migrations at the end and raise the versions of the config flow.
+MIGRATIONS: list[tuple[int, int, MigrationFunc]] = [
+    (1, 2, async_migrate_unique_ids),
+]
+
+
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Run the migrations a config entry has not seen yet."""
+    # Minor versions are backward compatible, only refuse newer major versions
+    if entry.version > MIGRATIONS[-1][0]:
+        LOGGER.error(
+            "Cannot downgrade config entry %s from version %s.%s",
+            entry.entry_id,
+            entry.version,
+            entry.minor_version,
+        )
+        return False
+
+    for version, minor_version, migrate in MIGRATIONS:
+        if (entry.version, entry.minor_version) >= (version, minor_version):
+            continue
+        LOGGER.debug(
+            "Migrating config entry %s to version %s.%s",
+            entry.entry_id,
+            version,
+            minor_version,
+        )
+        migrate(hass, entry)
+        # Home Assistant saves the config entries once the migration succeeded,
+        # async_update_entry only takes the versions from 2024.3 on
+        entry.version = version
+        entry.minor_version = minor_version
+    return True
@@ -0,0 +1,223 @@
+"""Optimistic device status for commands in flight."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from functools import partial
+import threading
+import time
+from typing import Any
+
+from tuya_sharing import CustomerDevice
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .dispatcher import SOURCE_INTERNAL, UpdateDispatcher
+from .metrics import LatencyHistogram, Metrics
+
+_MISSING = object()
+
+
+class ShadowStatus(dict[str, Any]):
+    """Device status holding optimistic values of commands in flight.
+
+    Optimistic values are written into the status itself, so entities read
+    them like any other value. Every optimistic value is tracked with a
+    pending marker holding the authoritative value it replaced. The SDK
+    writes reported values with `__setitem__`, which clears the marker.
+    """
+
+    def __init__(self, status: dict[str, Any]) -> None:
+        """Init ShadowStatus."""
+        super().__init__(status)
+        self.lock = threading.Lock()
+        self.pending: dict[str, tuple[Any, Any, float]] = {}
+        self.confirmed_count = 0
+        self.corrected_count = 0
+        self.echo: LatencyHistogram | None = None
+
+    def __setitem__(self, dpcode: str, value: Any) -> None:
+        """Set an authoritative value, reconciling a pending marker."""
+        with self.lock:
+            if (marker := self.pending.pop(dpcode, None)) is not None:
+                if marker[0] == value:
+                    self.confirmed_count += 1
+                    if self.echo is not None:
+                        self.echo.record(time.monotonic() - marker[2])
+                else:
+                    self.corrected_count += 1
+            super().__setitem__(dpcode, value)
+
+    def apply(self, dpcode: str, value: Any, sent_at: float) -> None:
+        """Set an optimistic value."""
+        with self.lock:
+            previous = (
+                self.pending[dpcode][1]
+                if dpcode in self.pending
+                else self.get(dpcode, _MISSING)
+            )
+            self.pending[dpcode] = (value, previous, sent_at)
+            super().__setitem__(dpcode, value)
+
+    def confirmed(self) -> dict[str, Any]:
+        """Return the status with the authoritative values of pending DPCodes."""
+        with self.lock:
+            status = dict(self)
+            for dpcode, (_, previous, _) in self.pending.items():
+                if previous is _MISSING:
+                    status.pop(dpcode, None)
+                else:
+                    status[dpcode] = previous
+        return status
+
+    def rollback(self, dpcode: str, sent_at: float | None = None) -> bool:
+        """Restore the authoritative value of a still pending DPCode."""
+        with self.lock:
+            if (marker := self.pending.get(dpcode)) is None or (
+                sent_at is not None and marker[2] != sent_at
+            ):
+                return False
+            del self.pending[dpcode]
+            if marker[1] is _MISSING:
+                self.pop(dpcode, None)
+            else:
+                super().__setitem__(dpcode, marker[1])
+            return True
+
+
+class OptimisticState:
+    """Apply commands to the device status before they are reported back.
+
+    The values sent to a device are applied to its status right away, and
+    reconciled once the device reports them over MQ. Values that are not
+    reported back within ``timeout`` seconds, or whose command failed, are
+    rolled back to the last reported value.
+    """
+
+    def __init__(
+            self,
+            hass: HomeAssistant,
+            dispatcher: UpdateDispatcher,
+            timeout: float = 0.0,
+            metrics: Metrics | None = None,
+    ) -> None:
+        """Init OptimisticState."""
+        self.hass = hass
+        self.dispatcher = dispatcher
+        self.timeout = timeout
+        self.metrics = metrics or Metrics()
+        self.applied = 0
+        self.rolled_back = 0
+        self._shadows: dict[str, ShadowStatus] = {}
+
+    @callback
+    def async_apply(
+            self, device: CustomerDevice, commands: list[dict[str, Any]]
+    ) -> float | None:
+        """Apply commands to the status of a device.
+
+        Only DPCodes already part of the status are applied. Returns the
+        timestamp identifying the applied values, or None when nothing was
+        applied.
+        """
+        if self.timeout <= 0:
+            return None
+
+        dpcodes = [
+            command["code"] for command in commands if command["code"] in device.status
+        ]
+        if not dpcodes:
+            return None
+
+        shadow = self._async_shadow(device)
+        sent_at = time.monotonic()
+        for command in commands:
+            if command["code"] in dpcodes:
+                shadow.apply(command["code"], command["value"], sent_at)
+        self.applied += len(dpcodes)
+        self.dispatcher.update_device(device, SOURCE_INTERNAL)
+
+        async_call_later(
+            self.hass,
+            self.timeout,
+            partial(self._async_expire, device, shadow, dpcodes, sent_at),
+        )
+        return sent_at
+
+    @callback
+    def async_rollback(
+            self,
+            device: CustomerDevice,
+            dpcodes: Iterable[str],
+            sent_at: float | None = None,
+    ) -> None:
+        """Roll back the pending optimistic values of a device."""
+        if (shadow := self._shadows.get(device.id)) is None:
+            return
+        self._async_rollback(device, shadow, dpcodes, sent_at)
+
+    @callback
+    def async_remove_device(self, device_id: str) -> None:
+        """Forget the shadow status of a device."""
+        self._shadows.pop(device_id, None)
+
+    @callback
+    def _async_shadow(self, device: CustomerDevice) -> ShadowStatus:
+        """Return the shadow status of a device, wrapping its status if needed."""
+        if not isinstance(device.status, ShadowStatus):
+            device.status = ShadowStatus(device.status)
+        device.status.echo = self.metrics.command_echo
+        self._shadows[device.id] = device.status
+        return device.status
+
+    @callback
+    def _async_expire(
+            self,
+            device: CustomerDevice,
+            shadow: ShadowStatus,
+            dpcodes: list[str],
+            sent_at: float,
+            _now: Any,
+    ) -> None:
+        """Roll back optimistic values that were not reported in time."""
+        self._async_rollback(device, shadow, dpcodes, sent_at)
+
+    @callback
+    def _async_rollback(
+            self,
+            device: CustomerDevice,
+            shadow: ShadowStatus,
+            dpcodes: Iterable[str],
+            sent_at: float | None,
+    ) -> None:
+        """Roll back pending DPCodes and refresh the entities of the device."""
+        # The status may have been replaced by a refresh of the device list
+        if device.status is not shadow:
+            return
+        rolled_back = sum(shadow.rollback(dpcode, sent_at) for dpcode in dpcodes)
+        if rolled_back:
+            self.rolled_back += rolled_back
+            self.dispatcher.update_device(device, SOURCE_INTERNAL)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the optimistic state counters and pending DPCodes."""
+        now = time.monotonic()
+        return {
+            "timeout": self.timeout,
+            "applied": self.applied,
+            "confirmed": sum(
+                shadow.confirmed_count for shadow in self._shadows.values()
+            ),
+            "corrected": sum(
+                shadow.corrected_count for shadow in self._shadows.values()
+            ),
+            "rolled_back": self.rolled_back,
+            "pending": {
+                device_id: {
+                    dpcode: {"value": value, "age": round(now - sent_at, 3)}
+                    for dpcode, (value, _, sent_at) in dict(shadow.pending).items()
+                }
+                for device_id, shadow in self._shadows.items()
+                if shadow.pending
+            },
+        }
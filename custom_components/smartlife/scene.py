@@ -20,7 +20,7 @@ async def async_setup_entry(
 ) -> None:
     """Set up smartlife scenes."""
     hass_data: HomeAssistantSmartLifeData = hass.data[DOMAIN][entry.entry_id]
-    scenes = await hass.async_add_executor_job(hass_data.manager.query_scenes)
+    scenes = await hass_data.bootstrap.async_result("query_scenes")
     async_add_entities(
         SmartLifeSceneEntity(hass_data.manager, scene) for scene in scenes
     )
@@ -1,13 +1,17 @@
 """Support for smartlife sensors."""
 from __future__ import annotations
 
+from collections.abc import Callable
 from dataclasses import dataclass
+import time
+from typing import Any
 
 from tuya_sharing import Manager, CustomerDevice
 from tuya_sharing.device import DeviceStatusRange
 
 
 from homeassistant.components.sensor import (
+    RestoreSensor,
     SensorDeviceClass,
     SensorEntity,
     SensorEntityDescription,
@@ -17,27 +21,38 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     PERCENTAGE,
     EntityCategory,
+    Platform,
     UnitOfElectricCurrent,
     UnitOfElectricPotential,
     UnitOfPower,
     UnitOfTime,
     UnitOfEnergy,
 )
-from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.device_registry import DeviceEntryType
+from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.typing import StateType
 
 from . import HomeAssistantSmartLifeData
-from .base import ElectricityTypeData, EnumTypeData, IntegerTypeData, SmartLifeEntity
+from .base import (
+    EnumTypeData,
+    IntegerTypeData,
+    SmartLifeEntity,
+    get_device_schema,
+    get_electricity_data,
+)
 from .const import (
     DEVICE_CLASS_UNITS,
     DOMAIN,
-    SMART_LIFE_DISCOVERY_NEW,
     DPCode,
     DPType,
     UnitOfMeasurement,
 )
+from .metrics import COUNTERS, LatencyHistogram, Metrics
+from .throttle import StateThrottle, ThrottleConfig
+from .window import RollingWindow, StatisticsWindows
 
 
 @dataclass
@@ -45,8 +60,43 @@ class SmartLifeSensorEntityDescription(SensorEntityDescription):
     """Describes Smart Life sensor entity."""
 
     subkey: str | None = None
+    throttle: ThrottleConfig | None = None
+
+
+@dataclass
+class SmartLifeStatisticsSensorEntityDescription(SmartLifeSensorEntityDescription):
+    """Describes a rolling window statistic of a Smart Life sensor."""
+
+    statistic: str = "mean"
 
 
+@dataclass
+class SmartLifeMetricSensorEntityDescription(SensorEntityDescription):
+    """Describes a metric sensor of the hub device of a config entry."""
+
+    value_fn: Callable[[Metrics], StateType] | None = None
+    attributes_fn: Callable[[Metrics], dict[str, Any]] | None = None
+
+
+@dataclass
+class SmartLifeSensorSchema:
+    """Sensor entity description resolved against a product schema."""
+
+    type: DPType | None = None
+    type_data: IntegerTypeData | EnumTypeData | None = None
+    uom: UnitOfMeasurement | None = None
+    native_unit_of_measurement: str | None = None
+    device_class: SensorDeviceClass | str | None = None
+    icon: str | None = None
+
+
+# Power monitoring plugs report their measurements many times a minute,
+# small changes are only published every few minutes.
+METER_THROTTLE = ThrottleConfig(deadband_relative=0.02, min_interval=5, max_age=300)
+VOLTAGE_THROTTLE = ThrottleConfig(
+    deadband_relative=0.005, min_interval=5, max_age=300
+)
+
 # Commonly used battery sensors, that are re-used in the sensors down below.
 BATTERY_SENSORS: tuple[SmartLifeSensorEntityDescription, ...] = (
     SmartLifeSensorEntityDescription(
@@ -341,6 +391,7 @@ SENSORS: dict[str, tuple[SmartLifeSensorEntityDescription, ...]] = {
             device_class=SensorDeviceClass.CURRENT,
             state_class=SensorStateClass.MEASUREMENT,
             entity_registry_enabled_default=False,
+            throttle=METER_THROTTLE,
         ),
         SmartLifeSensorEntityDescription(
             key=DPCode.CUR_POWER,
@@ -348,6 +399,7 @@ SENSORS: dict[str, tuple[SmartLifeSensorEntityDescription, ...]] = {
             device_class=SensorDeviceClass.POWER,
             state_class=SensorStateClass.MEASUREMENT,
             entity_registry_enabled_default=False,
+            throttle=METER_THROTTLE,
         ),
         SmartLifeSensorEntityDescription(
             key=DPCode.CUR_VOLTAGE,
@@ -355,6 +407,7 @@ SENSORS: dict[str, tuple[SmartLifeSensorEntityDescription, ...]] = {
             device_class=SensorDeviceClass.VOLTAGE,
             state_class=SensorStateClass.MEASUREMENT,
             entity_registry_enabled_default=False,
+            throttle=VOLTAGE_THROTTLE,
         ),
     ),
     # IoT Switch
@@ -1106,6 +1159,145 @@ SENSORS["cz"] = SENSORS["kg"]
 # https://developer.tuya.com/en/docs/iot/s?id=K9gf7o5prgf7s
 SENSORS["pc"] = SENSORS["kg"]
 
+# Energy integrated from the power of plugs, for plugs that only report
+# their instantaneous power
+ENERGY_SENSORS: dict[str, tuple[SmartLifeSensorEntityDescription, ...]] = {
+    "kg": (
+        SmartLifeSensorEntityDescription(
+            key=DPCode.CUR_POWER,
+            name="Integrated energy",
+            device_class=SensorDeviceClass.ENERGY,
+            state_class=SensorStateClass.TOTAL_INCREASING,
+            native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+            suggested_display_precision=3,
+            entity_registry_enabled_default=False,
+            throttle=ThrottleConfig(deadband=0.01, min_interval=60, max_age=600),
+        ),
+    ),
+}
+ENERGY_SENSORS["cz"] = ENERGY_SENSORS["kg"]
+ENERGY_SENSORS["pc"] = ENERGY_SENSORS["kg"]
+ENERGY_SENSORS["tdq"] = ENERGY_SENSORS["kg"]
+
+
+# Statistics offered for the measurements of these device classes, with the
+# attribute of the rolling window and the name suffix of each statistic
+STATISTICS_DEVICE_CLASSES = {
+    SensorDeviceClass.HUMIDITY,
+    SensorDeviceClass.PM25,
+    SensorDeviceClass.POWER,
+    SensorDeviceClass.TEMPERATURE,
+}
+STATISTICS = {
+    "min": "minimum",
+    "max": "maximum",
+    "mean": "mean",
+    "stddev": "standard deviation",
+}
+
+
+def _statistics_sensors(
+    descriptions: tuple[SmartLifeSensorEntityDescription, ...]
+) -> tuple[SmartLifeStatisticsSensorEntityDescription, ...]:
+    """Return the statistics sensors of the measurements of a category."""
+    return tuple(
+        SmartLifeStatisticsSensorEntityDescription(
+            key=description.key,
+            name=f"{description.name} {label}",
+            # A deviation is not a value of the measured quantity
+            device_class=(
+                None if statistic == "stddev" else description.device_class
+            ),
+            state_class=SensorStateClass.MEASUREMENT,
+            native_unit_of_measurement=description.native_unit_of_measurement,
+            entity_registry_enabled_default=False,
+            statistic=statistic,
+        )
+        for description in descriptions
+        if description.device_class in STATISTICS_DEVICE_CLASSES
+        and description.state_class == SensorStateClass.MEASUREMENT
+        and description.subkey is None
+        and isinstance(description.name, str)
+        for statistic, label in STATISTICS.items()
+    )
+
+
+STATISTICS_SENSORS: dict[
+    str, tuple[SmartLifeStatisticsSensorEntityDescription, ...]
+] = {
+    category: statistics_sensors
+    for category, descriptions in SENSORS.items()
+    if (statistics_sensors := _statistics_sensors(descriptions))
+}
+
+
+def _latency_sensor(
+    key: str, name: str, histogram: Callable[[Metrics], LatencyHistogram]
+) -> SmartLifeMetricSensorEntityDescription:
+    """Describe a sensor reporting the 99th percentile of a latency histogram."""
+    return SmartLifeMetricSensorEntityDescription(
+        key=key,
+        name=name,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        suggested_display_precision=1,
+        value_fn=lambda metrics: round(histogram(metrics).percentile(0.99) * 1000, 3),
+        attributes_fn=lambda metrics: histogram(metrics).as_dict(),
+    )
+
+
+# Metric sensors of the hub device, polled instead of pushed
+METRIC_SENSORS: tuple[SmartLifeMetricSensorEntityDescription, ...] = (
+    _latency_sensor(
+        "mq_dispatch_latency",
+        "Update dispatch latency",
+        lambda metrics: metrics.mq_dispatch,
+    ),
+    _latency_sensor(
+        "dispatch_write_latency",
+        "State write latency",
+        lambda metrics: metrics.dispatch_write,
+    ),
+    _latency_sensor(
+        "command_http_latency",
+        "Command latency",
+        lambda metrics: metrics.command_http,
+    ),
+    _latency_sensor(
+        "command_echo_latency",
+        "Command echo latency",
+        lambda metrics: metrics.command_echo,
+    ),
+    SmartLifeMetricSensorEntityDescription(
+        key="find_dpcode",
+        name="DPCode lookups",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda _: COUNTERS.find_dpcode,
+        attributes_fn=lambda _: {"resolved": COUNTERS.find_dpcode_resolved},
+    ),
+    SmartLifeMetricSensorEntityDescription(
+        key="throttled",
+        name="Throttled sensor updates",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda metrics: metrics.throttled,
+        attributes_fn=lambda metrics: {"published": metrics.throttled_published},
+    ),
+    SmartLifeMetricSensorEntityDescription(
+        key="json_parse",
+        name="JSON parses",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda _: COUNTERS.json_parse,
+    ),
+)
+
 
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
@@ -1113,27 +1305,27 @@ async def async_setup_entry(
     """Set up Smart Life sensor dynamically through Smart Life discovery."""
     hass_data: HomeAssistantSmartLifeData = hass.data[DOMAIN][entry.entry_id]
 
-    @callback
-    def async_discover_device(device_ids: list[str]) -> None:
-        """Discover and add a discovered Smart Life sensor."""
-        entities: list[SmartLifeSensorEntity] = []
-        for device_id in device_ids:
-            device = hass_data.manager.device_map[device_id]
-            if descriptions := SENSORS.get(device.category):
-                for description in descriptions:
-                    if description.key in device.status:
-                        entities.append(
-                            SmartLifeSensorEntity(
-                                device, hass_data.manager, description
-                            )
-                        )
-
-        async_add_entities(entities)
-
-    async_discover_device([*hass_data.manager.device_map])
-
-    entry.async_on_unload(
-        async_dispatcher_connect(hass, SMART_LIFE_DISCOVERY_NEW, async_discover_device)
+    async_add_entities(
+        SmartLifeMetricSensorEntity(entry, hass_data.metrics, description)
+        for description in METRIC_SENSORS
+    )
+    hass_data.discovery.async_register_descriptions(
+        Platform.SENSOR,
+        async_add_entities,
+        SENSORS,
+        SmartLifeSensorEntity,
+    )
+    hass_data.discovery.async_register_descriptions(
+        Platform.SENSOR,
+        async_add_entities,
+        ENERGY_SENSORS,
+        SmartLifeEnergySensorEntity,
+    )
+    hass_data.discovery.async_register_descriptions(
+        Platform.SENSOR,
+        async_add_entities,
+        STATISTICS_SENSORS,
+        SmartLifeStatisticsSensorEntity,
     )
 
 
@@ -1146,6 +1338,11 @@ class SmartLifeSensorEntity(SmartLifeEntity, SensorEntity):
     _type: DPType | None = None
     _type_data: IntegerTypeData | EnumTypeData | None = None
     _uom: UnitOfMeasurement | None = None
+    _throttle: StateThrottle | None = None
+    _throttle_available = True
+    _throttle_deadline: float | None = None
+    _throttle_cancel: CALLBACK_TYPE | None = None
+    _metrics: Metrics | None = None
 
     def __init__(
         self,
@@ -1160,55 +1357,163 @@ class SmartLifeSensorEntity(SmartLifeEntity, SensorEntity):
             f"{super().unique_id}{description.key}{description.subkey or ''}"
         )
 
+        # The description is resolved once per product schema, identical
+        # devices share the resolved type data and unit of measurement.
+        schema = get_device_schema(device).memoize(
+            ("sensor", id(description)), lambda: self._resolve_schema(description)
+        )
+        self._type = schema.type
+        self._type_data = schema.type_data
+        self._uom = schema.uom
+        self._attr_native_unit_of_measurement = schema.native_unit_of_measurement
+        self._attr_device_class = schema.device_class
+        self._attr_icon = schema.icon
+
+    async def async_added_to_hass(self) -> None:
+        """Call when entity is added to hass."""
+        await super().async_added_to_hass()
+        hass_data = self.hass.data[DOMAIN][self.platform.config_entry.entry_id]
+        self._metrics = hass_data.metrics
+        self._async_configure_throttle()
+        self.async_on_remove(self._async_cancel_throttled)
+
+    async def async_registry_entry_updated(self) -> None:
+        """Apply changed throttle options of the entity."""
+        self._async_configure_throttle()
+
+    @callback
+    def _async_configure_throttle(self) -> None:
+        """Set up the throttle from the description and entity options.
+
+        The limits of the description are overridden by the `deadband`,
+        `deadband_relative`, `min_interval` and `max_age` entity options
+        of the smartlife domain, zero disables a limit.
+        """
+        config = self.entity_description.throttle or ThrottleConfig()
+        if self.registry_entry is not None:
+            config = config.with_options(self.registry_entry.options.get(DOMAIN, {}))
+
+        self._async_cancel_throttled()
+        if not config.enabled:
+            self._throttle = None
+            return
+        self._throttle = StateThrottle(config)
+        self._throttle.published(self.native_value, time.monotonic())
+        self._throttle_available = self.available
+
+    @callback
+    def _async_handle_update(self) -> None:
+        """Write the state, unless held back by the throttle."""
+        if (throttle := self._throttle) is None:
+            self.async_write_ha_state()
+            return
+
+        now = time.monotonic()
+        value = self.native_value
+        if self.available == self._throttle_available:
+            delay = throttle.delay(value, now)
+        else:
+            delay = 0
+        if delay == 0:
+            self._async_cancel_throttled()
+            self._throttle_available = self.available
+            throttle.published(value, now)
+            self.async_write_ha_state()
+            return
+
+        if self._metrics is not None:
+            self._metrics.throttled += 1
+        if delay is None or (
+            self._throttle_deadline is not None
+            and self._throttle_deadline <= now + delay
+        ):
+            return
+        self._async_cancel_throttled()
+        self._throttle_deadline = now + delay
+        self._throttle_cancel = async_call_later(
+            self.hass, delay, self._async_throttled_update
+        )
+
+    @callback
+    def _async_throttled_update(self, _now: Any) -> None:
+        """Publish a held back value once its interval or age is reached."""
+        self._throttle_cancel = None
+        self._throttle_deadline = None
+        if (throttle := self._throttle) is None:
+            return
+        published_at = throttle.published_at
+        self._async_handle_update()
+        if self._metrics is not None and throttle.published_at != published_at:
+            self._metrics.throttled_published += 1
+
+    @callback
+    def _async_cancel_throttled(self) -> None:
+        """Cancel publishing a held back value."""
+        if self._throttle_cancel is not None:
+            self._throttle_cancel()
+            self._throttle_cancel = None
+        self._throttle_deadline = None
+
+    def _resolve_schema(
+        self, description: SmartLifeSensorEntityDescription
+    ) -> SmartLifeSensorSchema:
+        """Resolve the description against the DPCode schema of the device."""
+        schema = SmartLifeSensorSchema(
+            native_unit_of_measurement=description.native_unit_of_measurement,
+            device_class=description.device_class,
+            icon=description.icon,
+        )
+
         if int_type := self.find_dpcode(description.key, dptype=DPType.INTEGER):
-            self._type_data = int_type
-            self._type = DPType.INTEGER
+            schema.type_data = int_type
+            schema.type = DPType.INTEGER
             if description.native_unit_of_measurement is None:
-                self._attr_native_unit_of_measurement = int_type.unit
+                schema.native_unit_of_measurement = int_type.unit
         elif enum_type := self.find_dpcode(
             description.key, dptype=DPType.ENUM, prefer_function=True
         ):
-            self._type_data = enum_type
-            self._type = DPType.ENUM
+            schema.type_data = enum_type
+            schema.type = DPType.ENUM
         else:
-            self._type = self.get_dptype(DPCode(description.key))
+            schema.type = self.get_dptype(DPCode(description.key))
 
         # Logic to ensure the set device class and API received Unit Of Measurement
         # match Home Assistants requirements.
         if (
-            self.device_class is not None
-            and not self.device_class.startswith(DOMAIN)
+            schema.device_class is not None
+            and not schema.device_class.startswith(DOMAIN)
             and description.native_unit_of_measurement is None
         ):
             # We cannot have a device class, if the UOM isn't set or the
             # device class cannot be found in the validation mapping.
             if (
-                self.native_unit_of_measurement is None
-                or self.device_class not in DEVICE_CLASS_UNITS
+                schema.native_unit_of_measurement is None
+                or schema.device_class not in DEVICE_CLASS_UNITS
             ):
-                self._attr_device_class = None
-                return
+                schema.device_class = None
+                return schema
 
-            uoms = DEVICE_CLASS_UNITS[self.device_class]
-            self._uom = uoms.get(self.native_unit_of_measurement) or uoms.get(
-                self.native_unit_of_measurement.lower()
+            uoms = DEVICE_CLASS_UNITS[schema.device_class]
+            schema.uom = uoms.get(schema.native_unit_of_measurement) or uoms.get(
+                schema.native_unit_of_measurement.lower()
             )
 
             # Unknown unit of measurement, device class should not be used.
-            if self._uom is None:
-                self._attr_device_class = None
-                return
+            if schema.uom is None:
+                schema.device_class = None
+                return schema
 
             # If we still have a device class, we should not use an icon
-            if self.device_class:
-                self._attr_icon = None
+            schema.icon = None
 
             # Found unit of measurement, use the standardized Unit
             # Use the target conversion unit (if set)
-            self._attr_native_unit_of_measurement = (
-                self._uom.conversion_unit or self._uom.unit
+            schema.native_unit_of_measurement = (
+                schema.uom.conversion_unit or schema.uom.unit
             )
 
+        return schema
+
     @property
     def native_value(self) -> StateType:
         """Return the value reported by the sensor."""
@@ -1245,14 +1550,233 @@ class SmartLifeSensorEntity(SmartLifeEntity, SensorEntity):
         if self._type is DPType.JSON:
             if self.entity_description.subkey is None:
                 return None
-            values = ElectricityTypeData.from_json(value)
+            values = get_electricity_data(
+                self.device, self.entity_description.key, self._type
+            )
             return getattr(values, self.entity_description.subkey)
 
         if self._type is DPType.RAW:
             if self.entity_description.subkey is None:
                 return None
-            values = ElectricityTypeData.from_raw(value)
+            values = get_electricity_data(
+                self.device, self.entity_description.key, self._type
+            )
             return getattr(values, self.entity_description.subkey)
 
         # Valid string or enum value
         return value
+
+
+class SmartLifeEnergySensorEntity(SmartLifeSensorEntity, RestoreSensor):
+    """Energy integrated from the power reported by a device.
+
+    The scaled power is integrated with the trapezoidal rule at the arrival
+    times of the power updates, restarting after the device was offline.
+    The total is restored after a restart of Home Assistant.
+    """
+
+    def __init__(
+        self,
+        device: CustomerDevice,
+        device_manager: Manager,
+        description: SmartLifeSensorEntityDescription,
+    ) -> None:
+        """Init Smart Life energy sensor."""
+        super().__init__(device, device_manager, description)
+        self._attr_unique_id = f"{self._attr_unique_id}_energy"
+        self._total = 0.0
+        # Monotonic time and power in kW of the last integrated sample
+        self._sample: tuple[float, float] | None = None
+        self._last_received: dict[str, float] = {}
+
+    async def async_added_to_hass(self) -> None:
+        """Restore the total, and start integrating."""
+        if (last := await self.async_get_last_sensor_data()) is not None:
+            try:
+                self._total = float(last.native_value)  # type: ignore[arg-type]
+            except (TypeError, ValueError):
+                pass
+        await super().async_added_to_hass()
+        hass_data = self.hass.data[DOMAIN][self.platform.config_entry.entry_id]
+        self._last_received = hass_data.dispatcher.last_received
+        if self.available and (power := self._power()) is not None:
+            self._sample = (time.monotonic(), power)
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the integrated energy."""
+        return self._total
+
+    @callback
+    def _async_handle_update(self) -> None:
+        """Integrate a new power sample, then write the state."""
+        self._async_integrate()
+        super()._async_handle_update()
+
+    @callback
+    def _async_integrate(self) -> None:
+        """Add the energy since the previous sample to the total."""
+        if not self.available or (power := self._power()) is None:
+            self._sample = None
+            return
+
+        received = self._last_received.get(self.device.id)
+        if received is None or (
+            self._sample is not None and received <= self._sample[0]
+        ):
+            return
+        if self._sample is not None:
+            sampled_at, previous = self._sample
+            self._total += (previous + power) / 2 * (received - sampled_at) / 3600
+        self._sample = (received, power)
+
+    def _power(self) -> float | None:
+        """Return the reported power in kW."""
+        if not isinstance(self._type_data, IntegerTypeData) or not isinstance(
+            value := self.device.status.get(self.entity_description.key),
+            (int, float),
+        ):
+            return None
+        power = self._type_data.scale_value(value)
+        if (self._type_data.unit or "").lower() == "kw":
+            return power
+        return power / 1000
+
+
+class SmartLifeStatisticsSensorEntity(SmartLifeSensorEntity):
+    """Rolling window statistic of the value of a Smart Life sensor.
+
+    The sensors of the statistics of a DPCode share one rolling window of
+    the scaled values, sampled at their arrival times. Samples leaving the
+    window update the state as well, at most once a minute while the value
+    is not reported. No recorder queries are needed.
+    """
+
+    entity_description: SmartLifeStatisticsSensorEntityDescription
+
+    _expire_interval = 60.0
+
+    def __init__(
+        self,
+        device: CustomerDevice,
+        device_manager: Manager,
+        description: SmartLifeStatisticsSensorEntityDescription,
+    ) -> None:
+        """Init Smart Life statistics sensor."""
+        super().__init__(device, device_manager, description)
+        self._attr_unique_id = f"{self._attr_unique_id}_{description.statistic}"
+        self._windows: StatisticsWindows | None = None
+        self._window: RollingWindow | None = None
+        self._last_received: dict[str, float] = {}
+        self._expire_cancel: CALLBACK_TYPE | None = None
+
+    async def async_added_to_hass(self) -> None:
+        """Acquire the rolling window of the DPCode."""
+        hass_data = self.hass.data[DOMAIN][self.platform.config_entry.entry_id]
+        self._windows = hass_data.statistics
+        self._window = self._windows.acquire(
+            self.device.id, self.entity_description.key
+        )
+        self._last_received = hass_data.dispatcher.last_received
+        await super().async_added_to_hass()
+        self.async_on_remove(self._async_release)
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the statistic of the samples in the window."""
+        if self._window is None:
+            return None
+        return getattr(self._window, self.entity_description.statistic)
+
+    @callback
+    def _async_handle_update(self) -> None:
+        """Add a new sample, then write the state."""
+        self._async_sample()
+        super()._async_handle_update()
+        self._async_schedule_expire()
+
+    @callback
+    def _async_sample(self) -> None:
+        """Add the value to the window, once for all statistics sensors."""
+        if (window := self._window) is None:
+            return
+        window.expire(time.monotonic())
+        received = self._last_received.get(self.device.id)
+        if received is None or (
+            (last_time := window.last_time) is not None and received <= last_time
+        ):
+            return
+        value = super().native_value
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            window.add(received, float(value))
+
+    @callback
+    def _async_schedule_expire(self) -> None:
+        """Update the state once the oldest sample leaves the window."""
+        if self._expire_cancel is not None:
+            self._expire_cancel()
+            self._expire_cancel = None
+        if self._window is None or (oldest := self._window.oldest_time) is None:
+            return
+        self._expire_cancel = async_call_later(
+            self.hass,
+            max(
+                oldest + self._window.window - time.monotonic(),
+                self._expire_interval,
+            ),
+            self._async_expired,
+        )
+
+    @callback
+    def _async_expired(self, _now: Any) -> None:
+        """Update the state after samples left the window."""
+        self._expire_cancel = None
+        self._async_handle_update()
+
+    @callback
+    def _async_release(self) -> None:
+        """Release the rolling window."""
+        if self._expire_cancel is not None:
+            self._expire_cancel()
+            self._expire_cancel = None
+        if self._windows is not None:
+            self._windows.release(self.device.id, self.entity_description.key)
+        self._window = None
+
+
+class SmartLifeMetricSensorEntity(SensorEntity):
+    """Metric of the integration, on the hub device of a config entry."""
+
+    entity_description: SmartLifeMetricSensorEntityDescription
+
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        entry: ConfigEntry,
+        metrics: Metrics,
+        description: SmartLifeMetricSensorEntityDescription,
+    ) -> None:
+        """Init Smart Life metric sensor."""
+        self.entity_description = description
+        self._metrics = metrics
+        self._attr_unique_id = f"smartlife.{entry.entry_id}.{description.key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, entry.entry_id)},
+            manufacturer="smartlife",
+            name=entry.title,
+            entry_type=DeviceEntryType.SERVICE,
+        )
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the current value of the metric."""
+        assert self.entity_description.value_fn is not None
+        return self.entity_description.value_fn(self._metrics)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the details of the metric."""
+        if self.entity_description.attributes_fn is None:
+            return None
+        return self.entity_description.attributes_fn(self._metrics)
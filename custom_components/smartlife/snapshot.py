@@ -0,0 +1,186 @@
+"""Persistent snapshot of the Smart Life device list."""
+from __future__ import annotations
+
+from collections.abc import Collection
+from typing import Any
+
+from tuya_sharing import CustomerDevice
+from tuya_sharing.device import DeviceFunction, DeviceStatusRange
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, LOGGER
+from .optimistic import ShadowStatus
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 60
+
+# Device attributes stored in the snapshot, the device local key is left out
+# on purpose as it is fetched from the cloud on every start.
+DEVICE_ATTRIBUTES = (
+    "id",
+    "name",
+    "category",
+    "product_id",
+    "product_name",
+    "sub",
+    "uuid",
+    "asset_id",
+    "online",
+    "icon",
+    "ip",
+    "time_zone",
+    "active_time",
+    "create_time",
+    "update_time",
+)
+
+
+class DeviceSnapshot:
+    """Store the last known device list, including its status, in `.storage`.
+
+    Entities are created from the snapshot on startup, while the device list
+    is refreshed from the cloud in the background.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Init DeviceSnapshot."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.devices", private=True
+        )
+
+    async def async_load(self) -> dict[str, CustomerDevice]:
+        """Load the devices of the last snapshot."""
+        if not (data := await self._store.async_load()):
+            return {}
+
+        devices: dict[str, CustomerDevice] = {}
+        for item in data.get("devices", []):
+            try:
+                device = _device_from_dict(item)
+            except (KeyError, TypeError, ValueError):
+                LOGGER.warning("Ignoring invalid snapshot device %s", item.get("id"))
+                continue
+            devices[device.id] = device
+        return devices
+
+    @callback
+    def async_schedule_save(self, device_map: dict[str, CustomerDevice]) -> None:
+        """Schedule saving the device list."""
+        self._store.async_delay_save(
+            lambda: _device_map_to_dict(device_map), SAVE_DELAY
+        )
+
+    async def async_save(self, device_map: dict[str, CustomerDevice]) -> None:
+        """Save the device list."""
+        await self._store.async_save(_device_map_to_dict(device_map))
+
+    async def async_remove(self) -> None:
+        """Remove the snapshot."""
+        await self._store.async_remove()
+
+
+@callback
+def async_reconcile_device_map(
+        device_map: dict[str, CustomerDevice],
+        fresh: dict[str, CustomerDevice],
+        added_since: Collection[str] = (),
+        updated_since: Collection[str] = (),
+) -> tuple[list[str], list[str], list[str]]:
+    """Reconcile the device map with a freshly fetched device map.
+
+    Devices present in both maps are updated in place, so entities keep
+    referencing the same device objects. Devices with changed functions or
+    status ranges are replaced, as their entities have to be recreated.
+
+    Devices added to the map while fresh was fetched are kept, and devices
+    updated meanwhile keep their status, as it is newer than the fetched one.
+
+    Returns the added, removed and replaced device ids.
+    """
+    added: list[str] = []
+    replaced: list[str] = []
+    removed = [
+        device_id
+        for device_id in device_map
+        if device_id not in fresh and device_id not in added_since
+    ]
+    for device_id in removed:
+        del device_map[device_id]
+
+    for device_id, device in fresh.items():
+        if (current := device_map.get(device_id)) is None:
+            device_map[device_id] = device
+            added.append(device_id)
+        elif _schema(current) != _schema(device):
+            device_map[device_id] = device
+            replaced.append(device_id)
+        else:
+            set_up = current.set_up
+            status = current.status
+            vars(current).update(vars(device))
+            current.set_up = set_up
+            if device_id in updated_since:
+                current.status = status
+
+    return added, removed, replaced
+
+
+def _schema(device: CustomerDevice) -> tuple[dict[str, Any], dict[str, Any]]:
+    """Return the functions and status ranges of a device, for comparison."""
+    return (
+        {code: (item.type, item.values) for code, item in device.function.items()},
+        {code: (item.type, item.values) for code, item in device.status_range.items()},
+    )
+
+
+def _device_map_to_dict(device_map: dict[str, CustomerDevice]) -> dict[str, Any]:
+    """Return a device map as compact, JSON serializable, dictionary."""
+    return {"devices": [_device_to_dict(device) for device in device_map.values()]}
+
+
+def _device_to_dict(device: CustomerDevice) -> dict[str, Any]:
+    """Return a device as JSON serializable dictionary."""
+    data = {key: getattr(device, key, None) for key in DEVICE_ATTRIBUTES}
+    data["function"] = {
+        code: [item.type, item.values] for code, item in device.function.items()
+    }
+    data["status_range"] = {
+        code: [item.type, item.values] for code, item in device.status_range.items()
+    }
+    # The SDK converts the MQ reports of local capable devices with their
+    # local strategy
+    data["support_local"] = getattr(device, "support_local", False)
+    data["local_strategy"] = getattr(device, "local_strategy", None) or {}
+    # Optimistic values of commands in flight are not persisted
+    if isinstance(device.status, ShadowStatus):
+        data["status"] = device.status.confirmed()
+    else:
+        data["status"] = dict(device.status)
+    return data
+
+
+def _device_from_dict(data: dict[str, Any]) -> CustomerDevice:
+    """Return a device from a snapshot dictionary."""
+    # JSON turns the integer DP ids of the local strategy into strings
+    local_strategy = {
+        int(dp_id): item for dp_id, item in data.get("local_strategy", {}).items()
+    }
+    return CustomerDevice(
+        **{key: data.get(key) for key in DEVICE_ATTRIBUTES},
+        # Snapshots without a local strategy cannot convert MQ reports of
+        # local capable devices, until the device list is refreshed
+        support_local=bool(data.get("support_local") and local_strategy),
+        local_strategy=local_strategy,
+        set_up=False,
+        function={
+            code: DeviceFunction(code=code, type=dptype, values=values)
+            for code, (dptype, values) in data["function"].items()
+        },
+        status_range={
+            code: DeviceStatusRange(code=code, type=dptype, values=values)
+            for code, (dptype, values) in data["status_range"].items()
+        },
+        status=data["status"],
+    )
@@ -0,0 +1,105 @@
+"""Deadband and interval throttling of sensor state writes."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass, fields, replace
+from typing import Any
+
+_UNSET = object()
+
+
+@dataclass(frozen=True)
+class ThrottleConfig:
+    """Throttling of the state writes of a sensor, zero disables a limit.
+
+    - deadband: absolute change of the value needed to publish it
+    - deadband_relative: change relative to the published value needed to
+      publish it, 0.02 for 2%
+    - min_interval: seconds between two published values
+    - max_age: seconds after which a value held back by the deadband is
+      published anyway
+    """
+
+    deadband: float = 0.0
+    deadband_relative: float = 0.0
+    min_interval: float = 0.0
+    max_age: float = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        """Return if any limit is set."""
+        return any(getattr(self, field.name) for field in fields(self))
+
+    def with_options(self, options: Mapping[str, Any]) -> ThrottleConfig:
+        """Return the config with the limits set in entity options."""
+        changes: dict[str, float] = {}
+        for field in fields(self):
+            if field.name not in options:
+                continue
+            try:
+                value = float(options[field.name])
+            except (TypeError, ValueError):
+                continue
+            if value >= 0:
+                changes[field.name] = value
+        return replace(self, **changes)
+
+
+class StateThrottle:
+    """Decide when a changed sensor value is published.
+
+    Values are compared with the last published value, so slow drifts
+    within the deadband still add up to a published change. Values that
+    are not numeric, and changes from or to a non numeric value, are only
+    subject to the minimum interval.
+    """
+
+    def __init__(self, config: ThrottleConfig) -> None:
+        """Init StateThrottle."""
+        self.config = config
+        self.value: Any = _UNSET
+        self.published_at = 0.0
+
+    def published(self, value: Any, now: float) -> None:
+        """Record a published value."""
+        self.value = value
+        self.published_at = now
+
+    def delay(self, value: Any, now: float) -> float | None:
+        """Return the seconds until a value may be published.
+
+        Returns 0 to publish the value now, and None when the value is held
+        back by the deadband without a maximum age.
+        """
+        if self.value is _UNSET:
+            return 0
+
+        config = self.config
+        elapsed = now - self.published_at
+        if config.min_interval and elapsed < config.min_interval:
+            return config.min_interval - elapsed
+
+        if not self._within_deadband(value):
+            return 0
+        if not config.max_age:
+            return None
+        return max(config.max_age - elapsed, 0)
+
+    def _within_deadband(self, value: Any) -> bool:
+        """Return if a value differs too little from the published value."""
+        previous = self.value
+        if not _is_number(value) or not _is_number(previous):
+            return value == previous
+        change = abs(value - previous)
+        config = self.config
+        if config.deadband and change < config.deadband:
+            return True
+        return bool(
+            config.deadband_relative
+            and change < abs(previous) * config.deadband_relative
+        )
+
+
+def _is_number(value: Any) -> bool:
+    """Return if a value is an int or float, but not a bool."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
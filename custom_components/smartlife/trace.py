@@ -0,0 +1,340 @@
+"""Capture and replay of Smart Life MQ device updates."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+import copy
+from dataclasses import asdict, dataclass, field
+from datetime import timedelta
+import gzip
+import json
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+from tuya_sharing import CustomerDevice
+import voluptuous as vol
+
+from homeassistant.const import CONF_PATH
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.service import async_register_admin_service
+
+from .const import DOMAIN, LOGGER
+from .dispatcher import UpdateDispatcher
+from .metrics import Metrics
+
+if TYPE_CHECKING:
+    from . import HomeAssistantSmartLifeData
+
+SERVICE_START_CAPTURE = "start_capture"
+SERVICE_STOP_CAPTURE = "stop_capture"
+SERVICE_REPLAY = "replay"
+
+ATTR_MAX_SIZE = "max_size"
+ATTR_SPEED = "speed"
+
+EVENT_REPLAY_FINISHED = f"{DOMAIN}_replay_finished"
+
+DEFAULT_TRACE_FILE = f"{DOMAIN}_trace.jsonl.gz"
+DEFAULT_MAX_SIZE = 10  # MiB
+FLUSH_INTERVAL = timedelta(seconds=5)
+
+
+class TraceRecorder:
+    """Append the status changes of devices to a compressed JSONL trace.
+
+    Records are collected on the MQ thread and written by the executor
+    every few seconds. When the trace grows over half of ``max_size``, it is
+    rotated to ``<path>.1``, so both files together stay within bounds.
+    """
+
+    def __init__(self, hass: HomeAssistant, path: str, max_size: int) -> None:
+        """Init TraceRecorder."""
+        self.hass = hass
+        self.path = path
+        self.max_size = max_size
+        self.records = 0
+        self._lock = threading.Lock()
+        self._lines: list[str] = []
+        self._status: dict[str, tuple[bool, dict[str, Any]]] = {}
+        self._unsub: Callable[[], None] | None = None
+
+    @callback
+    def async_start(self) -> None:
+        """Start writing the trace periodically."""
+        self._unsub = async_track_time_interval(
+            self.hass, self._async_flush, FLUSH_INTERVAL
+        )
+
+    async def async_stop(self) -> None:
+        """Stop capturing and write the remaining records."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+        await self._async_flush()
+
+    def record(self, device: CustomerDevice) -> None:
+        """Record the changes of a device, safe to call from any thread."""
+        status = dict(device.status)
+        with self._lock:
+            previous = self._status.get(device.id)
+            self._status[device.id] = (device.online, status)
+            if previous is not None:
+                status = {
+                    dpcode: value
+                    for dpcode, value in status.items()
+                    if previous[1].get(dpcode, value) != value
+                    or dpcode not in previous[1]
+                }
+            self._lines.append(
+                json.dumps(
+                    {
+                        "t": time.time(),
+                        "id": device.id,
+                        "online": device.online,
+                        "status": status,
+                    },
+                    separators=(",", ":"),
+                    default=str,
+                )
+            )
+            self.records += 1
+
+    async def _async_flush(self, *_: Any) -> None:
+        """Write the collected records."""
+        with self._lock:
+            lines, self._lines = self._lines, []
+        if lines:
+            await self.hass.async_add_executor_job(self._write, lines)
+
+    def _write(self, lines: list[str]) -> None:
+        """Append lines to the trace, rotating it when it is too large."""
+        if os.path.exists(self.path) and os.path.getsize(self.path) > self.max_size / 2:
+            os.replace(self.path, f"{self.path}.1")
+        with gzip.open(self.path, "at", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the capture state."""
+        return {
+            "path": self.path,
+            "max_size": self.max_size,
+            "records": self.records,
+        }
+
+
+@dataclass
+class ReplayReport:
+    """Result of a trace replay.
+
+    The latencies run from feeding a record to the dispatch of the state
+    writes its entities would make, they do not include writing the state.
+    """
+
+    path: str
+    speed: float
+    records: int = 0
+    skipped: int = 0
+    duration: float = 0.0
+    latencies: list[float] = field(default_factory=list, repr=False)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the report with latency percentiles in milliseconds."""
+        data = asdict(self)
+        latencies = sorted(data.pop("latencies"))
+        data["duration"] = round(self.duration, 3)
+        data["dispatched_writes"] = len(latencies)
+        if latencies:
+            for name, percentile in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+                index = min(len(latencies) - 1, int(len(latencies) * percentile))
+                data[f"dispatch_latency_{name}_ms"] = round(
+                    latencies[index] * 1000, 3
+                )
+            data["dispatch_latency_max_ms"] = round(latencies[-1] * 1000, 3)
+        return data
+
+
+def read_trace(path: str) -> list[dict[str, Any]]:
+    """Read the records of a trace."""
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+async def async_replay(
+        hass: HomeAssistant,
+        hass_data: HomeAssistantSmartLifeData,
+        path: str,
+        speed: float = 1.0,
+) -> ReplayReport:
+    """Feed the records of a trace through a replay dispatcher.
+
+    Records are replayed with their original spacing, divided by ``speed``,
+    or as fast as possible with a speed of 0. The records are applied to
+    copies of the devices, and dispatched by a separate dispatcher with the
+    coalescing window and the subscriptions of the entities, whose
+    callbacks only count the state writes. The live devices, entities and
+    everything derived from them are left untouched.
+
+    Only the dispatch overhead is measured: the latency from feeding a
+    record to the dispatch of the state writes its entities would make,
+    without the writes themselves.
+    """
+    records = await hass.async_add_executor_job(read_trace, path)
+    report = ReplayReport(path, speed)
+    live_dispatcher = hass_data.dispatcher
+    dispatcher = UpdateDispatcher(hass, metrics=Metrics())
+    devices: dict[str, CustomerDevice] = {}
+    for device_id, device in hass_data.manager.device_map.items():
+        devices[device_id] = replay_device = copy.copy(device)
+        replay_device.status = dict(device.status)
+        dispatcher.update_device(replay_device)
+    # Flush the current status, before the subscriptions are connected
+    await asyncio.sleep(0)
+
+    dispatcher.window = live_dispatcher.window
+    for device_id in devices:
+        for dpcodes in live_dispatcher.async_subscriptions(device_id).values():
+            dispatcher.async_connect(
+                device_id, lambda: None, None if None in dpcodes else dpcodes
+            )
+
+    @callback
+    def async_flushed(device_id: str, received: float, writes: int) -> None:
+        """Record the latency of the state writes of a device."""
+        report.latencies.extend([time.monotonic() - received] * writes)
+
+    dispatcher.flush_listeners.append(async_flushed)
+    start = time.monotonic()
+    try:
+        for record in records:
+            if (device := devices.get(record["id"])) is None:
+                report.skipped += 1
+                continue
+            if speed > 0:
+                delay = (record["t"] - records[0]["t"]) / speed
+                if (wait := start + delay - time.monotonic()) > 0:
+                    await asyncio.sleep(wait)
+            for dpcode, value in record["status"].items():
+                device.status[dpcode] = value
+            device.online = record["online"]
+            dispatcher.update_device(device)
+            report.records += 1
+            # Let the dispatcher flush between records
+            await asyncio.sleep(0)
+        await asyncio.sleep(dispatcher.window)
+        await asyncio.sleep(0)
+    finally:
+        dispatcher.async_stop()
+    report.duration = time.monotonic() - start
+    return report
+
+
+@callback
+def async_unregister_services(hass: HomeAssistant) -> None:
+    """Remove the trace services."""
+    for service in (SERVICE_START_CAPTURE, SERVICE_STOP_CAPTURE, SERVICE_REPLAY):
+        hass.services.async_remove(DOMAIN, service)
+
+
+@callback
+def async_register_services(hass: HomeAssistant) -> None:
+    """Register the trace services."""
+    if hass.services.has_service(DOMAIN, SERVICE_REPLAY):
+        return
+
+    def entries() -> list[HomeAssistantSmartLifeData]:
+        return list(hass.data.get(DOMAIN, {}).values())
+
+    def trace_paths(call: ServiceCall) -> dict[str, str]:
+        """Return the trace path of each config entry, if they are allowed.
+
+        The default trace file is named after the config entry, a given
+        path only when several config entries are loaded.
+        """
+        entry_ids = list(hass.data.get(DOMAIN, {}))
+        if (path := call.data.get(CONF_PATH)) and len(entry_ids) == 1:
+            paths = {entry_ids[0]: path}
+        else:
+            path = path or hass.config.path(DEFAULT_TRACE_FILE)
+            paths = {entry_id: _entry_path(path, entry_id) for entry_id in entry_ids}
+        for entry_path in paths.values():
+            if not hass.config.is_allowed_path(entry_path):
+                raise HomeAssistantError(
+                    f"Cannot access {entry_path}, path is not allowed"
+                )
+        return paths
+
+    async def async_start_capture(call: ServiceCall) -> None:
+        """Start capturing device updates."""
+        max_size = call.data[ATTR_MAX_SIZE] * 1024 * 1024
+        for entry_id, path in trace_paths(call).items():
+            hass_data = hass.data[DOMAIN][entry_id]
+            if hass_data.listener.recorder is not None:
+                await hass_data.listener.recorder.async_stop()
+            recorder = TraceRecorder(hass, path, max_size)
+            recorder.async_start()
+            hass_data.listener.recorder = recorder
+            LOGGER.info("Capturing device updates to %s", path)
+
+    async def async_stop_capture(call: ServiceCall) -> None:
+        """Stop capturing device updates."""
+        for hass_data in entries():
+            if (recorder := hass_data.listener.recorder) is not None:
+                hass_data.listener.recorder = None
+                await recorder.async_stop()
+                LOGGER.info(
+                    "Captured %s device updates to %s", recorder.records, recorder.path
+                )
+
+    async def async_replay_trace(call: ServiceCall) -> None:
+        """Replay a trace and report the dispatch latency of the state writes."""
+        for entry_id, path in trace_paths(call).items():
+            hass_data = hass.data[DOMAIN][entry_id]
+            report = (
+                await async_replay(hass, hass_data, path, call.data[ATTR_SPEED])
+            ).as_dict()
+            LOGGER.info("Replayed %s: %s", path, report)
+            hass.bus.async_fire(EVENT_REPLAY_FINISHED, report)
+
+    async_register_admin_service(
+        hass,
+        DOMAIN,
+        SERVICE_START_CAPTURE,
+        async_start_capture,
+        schema=vol.Schema(
+            {
+                vol.Optional(CONF_PATH): cv.string,
+                vol.Optional(ATTR_MAX_SIZE, default=DEFAULT_MAX_SIZE): vol.All(
+                    vol.Coerce(int), vol.Range(min=1, max=1024)
+                ),
+            }
+        ),
+    )
+    async_register_admin_service(
+        hass, DOMAIN, SERVICE_STOP_CAPTURE, async_stop_capture
+    )
+    async_register_admin_service(
+        hass,
+        DOMAIN,
+        SERVICE_REPLAY,
+        async_replay_trace,
+        schema=vol.Schema(
+            {
+                vol.Optional(CONF_PATH): cv.string,
+                vol.Optional(ATTR_SPEED, default=1.0): vol.All(
+                    vol.Coerce(float), vol.Range(min=0)
+                ),
+            }
+        ),
+    )
+
+
+def _entry_path(path: str, entry_id: str) -> str:
+    """Return a trace path with the config entry id added to the file name."""
+    directory, name = os.path.split(path)
+    stem, dot, suffixes = name.partition(".")
+    return os.path.join(directory, f"{stem}_{entry_id}{dot}{suffixes}")
@@ -0,0 +1,89 @@
+"""Structured, sampled debug tracing of the integration hot paths."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+import json
+import logging
+import random
+from typing import Any
+from weakref import WeakKeyDictionary
+
+from .const import LOGGER
+
+_LOGGER = LOGGER.getChild("trace")
+
+
+class DebugTracer:
+    """Emit structured debug records for selected devices.
+
+    Hot paths check the plain ``enabled`` flag first, and only build the
+    fields of a record once ``is_tracing`` accepted the device, so tracing
+    costs a single attribute lookup while it is turned off. Records are
+    logged as ``<event> <device id> <JSON fields>`` at debug level to the
+    ``trace`` child logger of the integration.
+
+    Tracing can be limited to a set of devices, and a fraction of the
+    events of the traced devices can be sampled.
+    """
+
+    def __init__(self) -> None:
+        """Init DebugTracer."""
+        self.enabled = False
+        self.devices: frozenset[str] = frozenset()
+        self.sample_rate = 1.0
+        self.traced = 0
+        self.skipped = 0
+
+    def configure(
+            self, enabled: bool, devices: Iterable[str], sample_rate: float
+    ) -> None:
+        """Apply the tracing options."""
+        self.enabled = enabled
+        self.devices = frozenset(devices)
+        self.sample_rate = sample_rate
+
+    def is_tracing(self, device_id: str) -> bool:
+        """Return if an event of a device should be traced."""
+        if not self.enabled or not _LOGGER.isEnabledFor(logging.DEBUG):
+            return False
+        if self.devices and device_id not in self.devices:
+            return False
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            self.skipped += 1
+            return False
+        return True
+
+    def trace(self, event: str, device_id: str, **fields: Any) -> None:
+        """Log a trace record."""
+        self.traced += 1
+        _LOGGER.debug(
+            "%s %s %s", event, device_id, json.dumps(fields, default=str)
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the tracing options and counters."""
+        return {
+            "enabled": self.enabled,
+            "devices": sorted(self.devices),
+            "sample_rate": self.sample_rate,
+            "traced": self.traced,
+            "skipped": self.skipped,
+        }
+
+
+# Tracers of the config entries, by the manager of the entry. Entities look
+# up the tracer of their entry while they are created, through the manager
+# they are created with.
+_TRACERS: WeakKeyDictionary[Any, DebugTracer] = WeakKeyDictionary()
+# Tracer of the managers of no config entry, never enabled
+_DISABLED = DebugTracer()
+
+
+def set_tracer(manager: Any, tracer: DebugTracer) -> None:
+    """Set the tracer of the config entry of a manager."""
+    _TRACERS[manager] = tracer
+
+
+def get_tracer(manager: Any) -> DebugTracer:
+    """Return the tracer of the config entry of a manager."""
+    return _TRACERS.get(manager, _DISABLED)
@@ -13,14 +13,19 @@ from homeassistant.components.vacuum import (
     VacuumEntityFeature,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import STATE_IDLE, STATE_PAUSED
-from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.const import STATE_IDLE, STATE_PAUSED, Platform
+from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import HomeAssistantSmartLifeData
 from .base import EnumTypeData, IntegerTypeData, SmartLifeEntity
-from .const import DOMAIN, SMART_LIFE_DISCOVERY_NEW, DPCode, DPType
+from .const import DOMAIN, DPCode, DPType
+
+VACUUMS: tuple[str, ...] = (
+    # Robot Vacuum
+    # https://developer.tuya.com/en/docs/iot/fsd?id=K9gf487ck1tlo
+    "sd",
+)
 
 SMART_LIFE_MODE_RETURN_HOME = "chargego"
 SMART_LIFE_STATUS_TO_HA = {
@@ -56,20 +61,11 @@ async def async_setup_entry(
     """Set up smartlife vacuum dynamically through smartlife discovery."""
     hass_data: HomeAssistantSmartLifeData = hass.data[DOMAIN][entry.entry_id]
 
-    @callback
-    def async_discover_device(device_ids: list[str]) -> None:
-        """Discover and add a discovered smartlife vacuum."""
-        entities: list[SmartLifeVacuumEntity] = []
-        for device_id in device_ids:
-            device = hass_data.manager.device_map[device_id]
-            if device.category == "sd":
-                entities.append(SmartLifeVacuumEntity(device, hass_data.manager))
-        async_add_entities(entities)
-
-    async_discover_device([*hass_data.manager.device_map])
-
-    entry.async_on_unload(
-        async_dispatcher_connect(hass, SMART_LIFE_DISCOVERY_NEW, async_discover_device)
+    hass_data.discovery.async_register_categories(
+        Platform.VACUUM,
+        async_add_entities,
+        VACUUMS,
+        SmartLifeVacuumEntity,
     )
 
 
@@ -127,6 +123,15 @@ class SmartLifeVacuumEntity(SmartLifeEntity, StateVacuumEntity):
             self._attr_supported_features |= VacuumEntityFeature.BATTERY
             self._battery_level = int_type
 
+    def state_dpcodes(self) -> set[str] | None:
+        """Return the DPCodes the state of this entity is derived from."""
+        return super().state_dpcodes() | {
+            DPCode.ELECTRICITY_LEFT,
+            DPCode.PAUSE,
+            DPCode.STATUS,
+            DPCode.SUCTION,
+        }
+
     @property
     def battery_level(self) -> int | None:
         """Return smartlife device state."""
@@ -152,44 +157,53 @@ class SmartLifeVacuumEntity(SmartLifeEntity, StateVacuumEntity):
             return None
         return SMART_LIFE_STATUS_TO_HA.get(status)
 
-    def turn_on(self, **kwargs: Any) -> None:
+    async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the device on."""
-        self._send_command([{"code": DPCode.POWER, "value": True}])
+        await self._async_send_command([{"code": DPCode.POWER, "value": True}])
 
-    def turn_off(self, **kwargs: Any) -> None:
+    async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the device off."""
-        self._send_command([{"code": DPCode.POWER, "value": False}])
+        await self._async_send_command([{"code": DPCode.POWER, "value": False}])
 
-    def start(self, **kwargs: Any) -> None:
+    async def async_start(self, **kwargs: Any) -> None:
         """Start the device."""
-        self._send_command([{"code": DPCode.POWER_GO, "value": True}])
+        await self._async_send_command(
+            [{"code": DPCode.POWER_GO, "value": True}], force=True
+        )
 
-    def stop(self, **kwargs: Any) -> None:
+    async def async_stop(self, **kwargs: Any) -> None:
         """Stop the device."""
-        self._send_command([{"code": DPCode.POWER_GO, "value": False}])
+        await self._async_send_command(
+            [{"code": DPCode.POWER_GO, "value": False}], force=True
+        )
 
-    def pause(self, **kwargs: Any) -> None:
+    async def async_pause(self, **kwargs: Any) -> None:
         """Pause the device."""
-        self._send_command([{"code": DPCode.POWER_GO, "value": False}])
+        await self._async_send_command(
+            [{"code": DPCode.POWER_GO, "value": False}], force=True
+        )
 
-    def return_to_base(self, **kwargs: Any) -> None:
+    async def async_return_to_base(self, **kwargs: Any) -> None:
         """Return device to dock."""
-        self._send_command(
+        await self._async_send_command(
             [
                 {"code": DPCode.SWITCH_CHARGE, "value": True},
                 {"code": DPCode.MODE, "value": SMART_LIFE_MODE_RETURN_HOME},
-            ]
+            ],
+            force=True,
         )
 
-    def locate(self, **kwargs: Any) -> None:
+    async def async_locate(self, **kwargs: Any) -> None:
         """Locate the device."""
-        self._send_command([{"code": DPCode.SEEK, "value": True}])
+        await self._async_send_command(
+            [{"code": DPCode.SEEK, "value": True}], force=True
+        )
 
-    def set_fan_speed(self, fan_speed: str, **kwargs: Any) -> None:
+    async def async_set_fan_speed(self, fan_speed: str, **kwargs: Any) -> None:
         """Set fan speed."""
-        self._send_command([{"code": DPCode.SUCTION, "value": fan_speed}])
+        await self._async_send_command([{"code": DPCode.SUCTION, "value": fan_speed}])
 
-    def send_command(
+    async def async_send_command(
         self,
         command: str,
         params: dict[str, Any] | list[Any] | None = None,
@@ -200,4 +214,6 @@ class SmartLifeVacuumEntity(SmartLifeEntity, StateVacuumEntity):
             raise ValueError("Params cannot be omitted for smartlife vacuum commands")
         if not isinstance(params, list):
             raise TypeError("Params must be a list for smartlife vacuum commands")
-        self._send_command([{"code": command, "value": params[0]}])
+        await self._async_send_command(
+            [{"code": command, "value": params[0]}], force=True
+        )
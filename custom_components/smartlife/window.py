@@ -0,0 +1,190 @@
+"""Rolling window statistics of sensor values."""
+from __future__ import annotations
+
+from array import array
+from collections import deque
+import math
+from typing import Any
+
+
+class RollingWindow:
+    """Min, max, mean and standard deviation of the samples of a time window.
+
+    Samples are kept in fixed size ring buffers of the array module, the
+    oldest sample is dropped when the buffer is full. The sums for the mean
+    and the deviation are updated on every added and expired sample, and
+    recomputed from the buffer once per ``capacity`` expired samples to
+    bound rounding errors. Min and max are kept in monotonic deques. Adding
+    a sample takes O(1) amortized time, reading a statistic O(1).
+    """
+
+    def __init__(self, window: float, capacity: int = 1024) -> None:
+        """Init RollingWindow."""
+        self.window = window
+        self.capacity = capacity
+        self._values = array("d", bytes(8 * capacity))
+        self._times = array("d", bytes(8 * capacity))
+        # Sequence numbers of the oldest sample and of the next sample
+        self._start = 0
+        self._end = 0
+        # Sums of the samples relative to a shift, for numeric stability
+        self._shift = 0.0
+        self._sum = 0.0
+        self._sum_squares = 0.0
+        self._expired = 0
+        self._min: deque[tuple[int, float]] = deque()
+        self._max: deque[tuple[int, float]] = deque()
+
+    def __len__(self) -> int:
+        """Return the number of samples in the window."""
+        return self._end - self._start
+
+    @property
+    def last_time(self) -> float | None:
+        """Return the time of the newest sample."""
+        if not len(self):
+            return None
+        return self._times[(self._end - 1) % self.capacity]
+
+    @property
+    def oldest_time(self) -> float | None:
+        """Return the time of the oldest sample."""
+        if not len(self):
+            return None
+        return self._times[self._start % self.capacity]
+
+    def add(self, now: float, value: float) -> None:
+        """Add a sample, expiring the samples that left the window."""
+        self.expire(now)
+        if len(self) == self.capacity:
+            self._pop()
+        if not len(self):
+            self._shift = value
+            self._sum = self._sum_squares = 0.0
+
+        sequence = self._end
+        index = sequence % self.capacity
+        self._values[index] = value
+        self._times[index] = now
+        self._end += 1
+        delta = value - self._shift
+        self._sum += delta
+        self._sum_squares += delta * delta
+
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((sequence, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((sequence, value))
+
+    def expire(self, now: float) -> None:
+        """Drop the samples older than the window."""
+        cutoff = now - self.window
+        while len(self) and self._times[self._start % self.capacity] < cutoff:
+            self._pop()
+
+    def clear(self) -> None:
+        """Drop all samples."""
+        self._start = self._end
+        self._min.clear()
+        self._max.clear()
+
+    @property
+    def min(self) -> float | None:
+        """Return the smallest sample."""
+        return self._min[0][1] if self._min else None
+
+    @property
+    def max(self) -> float | None:
+        """Return the largest sample."""
+        return self._max[0][1] if self._max else None
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean of the samples."""
+        if not (count := len(self)):
+            return None
+        return self._shift + self._sum / count
+
+    @property
+    def stddev(self) -> float | None:
+        """Return the sample standard deviation."""
+        if (count := len(self)) < 2:
+            return None
+        variance = (self._sum_squares - self._sum * self._sum / count) / (count - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    def _pop(self) -> None:
+        """Drop the oldest sample."""
+        sequence = self._start
+        delta = self._values[sequence % self.capacity] - self._shift
+        self._sum -= delta
+        self._sum_squares -= delta * delta
+        self._start += 1
+        if self._min[0][0] == sequence:
+            self._min.popleft()
+        if self._max[0][0] == sequence:
+            self._max.popleft()
+
+        self._expired += 1
+        if self._expired >= self.capacity:
+            self._expired = 0
+            self._recompute()
+
+    def _recompute(self) -> None:
+        """Recompute the sums from the samples in the buffer."""
+        values = [
+            self._values[sequence % self.capacity]
+            for sequence in range(self._start, self._end)
+        ]
+        self._shift = values[0] if values else 0.0
+        self._sum = math.fsum(value - self._shift for value in values)
+        self._sum_squares = math.fsum(
+            (value - self._shift) ** 2 for value in values
+        )
+
+
+class StatisticsWindows:
+    """Rolling windows of the DPCodes of devices, shared by their sensors.
+
+    The sensors of the statistics of a DPCode share a single window, which
+    is dropped once the last of them is removed.
+    """
+
+    def __init__(self, window: float) -> None:
+        """Init StatisticsWindows."""
+        self.window = window
+        self._windows: dict[tuple[str, str], tuple[RollingWindow, int]] = {}
+
+    def set_window(self, window: float) -> None:
+        """Change the length of all windows."""
+        self.window = window
+        for rolling_window, _ in self._windows.values():
+            rolling_window.window = window
+
+    def acquire(self, device_id: str, dpcode: str) -> RollingWindow:
+        """Return the window of a DPCode, creating it if needed."""
+        key = (device_id, dpcode)
+        if (entry := self._windows.get(key)) is None:
+            entry = (RollingWindow(self.window), 0)
+        self._windows[key] = (entry[0], entry[1] + 1)
+        return entry[0]
+
+    def release(self, device_id: str, dpcode: str) -> None:
+        """Release the window of a DPCode, dropping it when unused."""
+        key = (device_id, dpcode)
+        if (entry := self._windows.get(key)) is None:
+            return
+        if entry[1] <= 1:
+            del self._windows[key]
+        else:
+            self._windows[key] = (entry[0], entry[1] - 1)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the window length and number of samples."""
+        return {
+            "window": self.window,
+            "windows": len(self._windows),
+            "samples": sum(len(window) for window, _ in self._windows.values()),
+        }
@@ -0,0 +1,42 @@
+"""Fixtures for the Smart Life integration tests."""
+from __future__ import annotations
+
+from typing import Any
+
+from tuya_sharing import CustomerDevice
+from tuya_sharing.device import DeviceFunction, DeviceStatusRange
+
+
+def make_device(
+        device_id: str = "device",
+        status: dict[str, Any] | None = None,
+        category: str = "kg",
+        **kwargs: Any,
+) -> CustomerDevice:
+    """Return a device with a boolean switch and an integer brightness."""
+    status = {"switch_1": False, "bright_value": 10} if status is None else status
+    values = {
+        "switch_1": ("Boolean", "{}"),
+        "bright_value": (
+            "Integer",
+            '{"unit":"","min":10,"max":1000,"scale":0,"step":1}',
+        ),
+    }
+    kwargs = {"online": True, "support_local": False, "set_up": False, **kwargs}
+    return CustomerDevice(
+        id=device_id,
+        name=f"Device {device_id}",
+        category=category,
+        product_id="product",
+        product_name="Product",
+        function={
+            code: DeviceFunction(code=code, type=dptype, values=dpvalues)
+            for code, (dptype, dpvalues) in values.items()
+        },
+        status_range={
+            code: DeviceStatusRange(code=code, type=dptype, values=dpvalues)
+            for code, (dptype, dpvalues) in values.items()
+        },
+        status=status,
+        **kwargs,
+    )
@@ -0,0 +1,151 @@
+"""Tests for the command buffer."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncGenerator
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.smartlife.command import CommandBuffer
+
+
+@pytest.fixture
+async def commands(hass: HomeAssistant) -> AsyncGenerator[CommandBuffer, None]:
+    """Return a command buffer posting to a mocked cloud API."""
+    manager = MagicMock()
+    manager.customer_api.post.return_value = {"success": True}
+    buffer = CommandBuffer(hass, manager)
+    yield buffer
+    buffer.async_stop()
+
+
+def _posted(buffer: CommandBuffer) -> list[Any]:
+    """Return the commands posted to the cloud API."""
+    return [
+        call.args[2]["commands"]
+        for call in buffer.manager.customer_api.post.call_args_list
+    ]
+
+
+async def test_merge(hass: HomeAssistant, commands: CommandBuffer) -> None:
+    """Test commands queued before a flush are sent in one batch."""
+    first = commands.send_commands("device", [{"code": "switch_1", "value": True}])
+    second = commands.send_commands(
+        "device",
+        [{"code": "switch_1", "value": False}, {"code": "bright_value", "value": 5}],
+    )
+    await hass.async_add_executor_job(first.result, 5)
+    await hass.async_add_executor_job(second.result, 5)
+    await hass.async_block_till_done()
+
+    assert _posted(commands) == [
+        [{"code": "switch_1", "value": False}, {"code": "bright_value", "value": 5}]
+    ]
+    assert commands.commands_merged == 1
+    assert commands.batches_sent == 1
+
+
+@patch("custom_components.smartlife.command.RETRY_BASE_DELAY", 0.01)
+async def test_retry_failed_request(
+        hass: HomeAssistant, commands: CommandBuffer
+) -> None:
+    """Test unsuccessful and failed requests are retried."""
+    commands.manager.customer_api.post.side_effect = [
+        None,
+        {"success": False},
+        {"success": True},
+    ]
+    await commands.async_send_commands(
+        "device", [{"code": "switch_1", "value": True}]
+    )
+    await hass.async_block_till_done()
+
+    assert _posted(commands) == [[{"code": "switch_1", "value": True}]] * 3
+    assert commands.batches_retried == 2
+    assert [item["outcome"] for item in commands.journal] == [
+        "retrying",
+        "retrying",
+        "sent",
+    ]
+
+
+@patch("custom_components.smartlife.command.RETRY_MAX_ATTEMPTS", 2)
+@patch("custom_components.smartlife.command.RETRY_BASE_DELAY", 0.01)
+async def test_retry_gives_up(hass: HomeAssistant, commands: CommandBuffer) -> None:
+    """Test the callers get the error once the retries are exhausted."""
+    commands.manager.customer_api.post.return_value = None
+    with pytest.raises(HomeAssistantError, match="Sending commands failed"):
+        await commands.async_send_commands(
+            "device", [{"code": "switch_1", "value": True}]
+        )
+    assert commands.batches_failed == 1
+
+
+async def test_cancelled_caller(hass: HomeAssistant, commands: CommandBuffer) -> None:
+    """Test a cancelled caller does not keep the others of its batch waiting."""
+    cancelled = hass.async_create_task(
+        commands.async_send_commands("device", [{"code": "switch_1", "value": True}])
+    )
+    waiting = hass.async_create_task(
+        commands.async_send_commands(
+            "device", [{"code": "bright_value", "value": 5}]
+        )
+    )
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    await asyncio.wait_for(waiting, 5)
+    assert cancelled.cancelled()
+    assert commands.batches_sent == 1
+
+
+async def test_unloaded(
+        hass: HomeAssistant,
+        commands: CommandBuffer,
+        caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Test commands queued once stopped fail without a failure log."""
+    commands.async_stop()
+    with pytest.raises(HomeAssistantError, match="Integration unloaded"):
+        await commands.async_send_commands(
+            "device", [{"code": "switch_1", "value": True}]
+        )
+    assert _posted(commands) == []
+    assert "Failed to send commands" not in caplog.text
+
+
+@patch("custom_components.smartlife.command.RETRY_BASE_DELAY", 0.05)
+async def test_retry_drops_superseded(
+        hass: HomeAssistant, commands: CommandBuffer
+) -> None:
+    """Test a retried batch merges into the pending one, without old values."""
+    commands.manager.customer_api.post.side_effect = [
+        None,
+        {"success": True},
+        {"success": True},
+    ]
+    first = commands.send_commands(
+        "device",
+        [{"code": "switch_1", "value": True}, {"code": "bright_value", "value": 5}],
+    )
+    await asyncio.sleep(0.01)
+    await hass.async_block_till_done()
+    second = commands.send_commands("device", [{"code": "switch_1", "value": False}])
+    await hass.async_add_executor_job(first.result, 5)
+    await hass.async_add_executor_job(second.result, 5)
+
+    posted = _posted(commands)
+    assert posted[0] == [
+        {"code": "switch_1", "value": True},
+        {"code": "bright_value", "value": 5},
+    ]
+    assert {"code": "switch_1", "value": True} not in posted[-1]
+    assert {"code": "bright_value", "value": 5} in [
+        command for batch in posted[1:] for command in batch
+    ]
+    assert commands.commands_superseded == 1
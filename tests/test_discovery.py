@@ -0,0 +1,70 @@
+"""Tests for the single pass discovery."""
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from tuya_sharing import CustomerDevice
+
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
+
+from custom_components.smartlife.const import DOMAIN
+from custom_components.smartlife.discovery import DiscoveryEngine
+
+from .conftest import make_device
+
+
+def _engine(hass: HomeAssistant, *devices: object) -> DiscoveryEngine:
+    """Return a discovery engine for devices."""
+    entry = MockConfigEntry(domain=DOMAIN)
+    entry.add_to_hass(hass)
+    manager = SimpleNamespace(device_map={device.id: device for device in devices})
+    return DiscoveryEngine(hass, entry, manager)
+
+
+async def test_load_in_flight(hass: HomeAssistant) -> None:
+    """Test platforms being loaded are waited for, not loaded twice."""
+    engine = _engine(hass)
+    loaded = asyncio.Event()
+
+    async def forward(*_: object) -> None:
+        await loaded.wait()
+
+    with patch.object(
+        hass.config_entries, "async_forward_entry_setups", side_effect=forward
+    ) as forward_mock:
+        first = hass.async_create_task(engine.async_load_platforms([make_device()]))
+        second = hass.async_create_task(engine.async_load_platforms([make_device()]))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert forward_mock.call_count == 1
+        assert not second.done()
+        assert Platform.SWITCH not in engine.platforms
+
+        loaded.set()
+        await asyncio.gather(first, second)
+
+    assert Platform.SWITCH in engine.platforms
+    assert forward_mock.call_count == 1
+
+
+async def test_failing_factory(hass: HomeAssistant) -> None:
+    """Test a failing entity factory does not abort the discovery pass."""
+    engine = _engine(hass, make_device("broken"), make_device("working"))
+    async_add_entities = MagicMock()
+
+    def factory(device: CustomerDevice, manager: object) -> object:
+        if device.id == "broken":
+            raise ValueError("broken")
+        return device.id
+
+    engine.async_register_categories(
+        Platform.SWITCH, async_add_entities, ["kg"], factory
+    )
+    engine.async_discover(["broken", "working"])
+
+    async_add_entities.assert_called_once_with(["working"])
+    assert engine.passes == 1
@@ -0,0 +1,154 @@
+"""Tests for the update dispatcher."""
+from __future__ import annotations
+
+import asyncio
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.smartlife.dispatcher import (
+    SOURCE_INTERNAL,
+    SOURCE_LOCAL,
+    UpdateDispatcher,
+)
+
+from .conftest import make_device
+
+
+async def test_coalesce(hass: HomeAssistant) -> None:
+    """Test updates arriving before a flush are written once."""
+    dispatcher = UpdateDispatcher(hass)
+    device = make_device()
+    dispatcher.update_device(device)
+    await asyncio.sleep(0)
+
+    writes: list[None] = []
+    dispatcher.async_connect(device.id, lambda: writes.append(None))
+    for value in range(20, 25):
+        device.status["bright_value"] = value
+        dispatcher.update_device(device)
+    await asyncio.sleep(0)
+
+    assert len(writes) == 1
+    assert dispatcher.state_writes == 1
+    assert dispatcher.metrics.mq_dispatch.count == 2
+
+
+async def test_window(hass: HomeAssistant) -> None:
+    """Test a coalescing window delays the flush."""
+    dispatcher = UpdateDispatcher(hass, window=0.05)
+    device = make_device()
+    writes: list[None] = []
+    dispatcher.async_connect(device.id, lambda: writes.append(None))
+    dispatcher.update_device(device)
+    await asyncio.sleep(0)
+    assert not writes
+
+    await asyncio.sleep(0.1)
+    assert len(writes) == 1
+    dispatcher.async_stop()
+
+
+async def test_count_by_source(hass: HomeAssistant) -> None:
+    """Test only MQ messages are counted as messages."""
+    dispatcher = UpdateDispatcher(hass)
+    device = make_device()
+    dispatcher.update_device(device)
+    dispatcher.update_device(device)
+    dispatcher.update_device(device, SOURCE_LOCAL)
+    dispatcher.update_device(device, SOURCE_INTERNAL)
+    await asyncio.sleep(0)
+
+    data = dispatcher.as_dict()
+    assert data["messages_received"] == 2
+    assert data["messages_unchanged"] == 1
+    assert data["updates_received"] == {"mq": 2, "local": 1, "internal": 1}
+    assert data["updates_unchanged"] == {"mq": 1, "local": 1, "internal": 1}
+
+
+async def test_remove_listener(hass: HomeAssistant) -> None:
+    """Test removed callbacks are no longer called."""
+    dispatcher = UpdateDispatcher(hass)
+    device = make_device()
+    writes: list[None] = []
+    unsub = dispatcher.async_connect(device.id, lambda: writes.append(None))
+    unsub()
+    dispatcher.update_device(device)
+    await asyncio.sleep(0)
+    assert not writes
+    assert dispatcher.async_subscriptions(device.id) == {}
+
+
+async def test_changed_dpcodes(hass: HomeAssistant) -> None:
+    """Test only entities of changed DPCodes are written."""
+    dispatcher = UpdateDispatcher(hass)
+    device = make_device()
+    dispatcher.update_device(device)
+    await asyncio.sleep(0)
+
+    switch: list[None] = []
+    brightness: list[None] = []
+    both: list[None] = []
+    dispatcher.async_connect(device.id, lambda: switch.append(None), {"switch_1"})
+    dispatcher.async_connect(
+        device.id, lambda: brightness.append(None), {"bright_value"}
+    )
+    dispatcher.async_connect(
+        device.id, lambda: both.append(None), {"switch_1", "bright_value"}
+    )
+
+    device.status["switch_1"] = True
+    dispatcher.update_device(device)
+    await asyncio.sleep(0)
+    assert (len(switch), len(brightness), len(both)) == (1, 0, 1)
+
+    device.status["switch_1"] = False
+    device.status["bright_value"] = 500
+    dispatcher.update_device(device)
+    await asyncio.sleep(0)
+    assert (len(switch), len(brightness), len(both)) == (2, 1, 2)
+
+
+async def test_unchanged(hass: HomeAssistant) -> None:
+    """Test updates without changes are not dispatched."""
+    dispatcher = UpdateDispatcher(hass)
+    device = make_device()
+    dispatcher.update_device(device)
+    await asyncio.sleep(0)
+
+    writes: list[None] = []
+    dispatcher.async_connect(device.id, lambda: writes.append(None))
+    dispatcher.update_device(device)
+    await asyncio.sleep(0)
+    assert not writes
+    assert dispatcher.as_dict()["messages_unchanged"] == 1
+
+
+async def test_online_change(hass: HomeAssistant) -> None:
+    """Test a change of the online state writes all entities of a device."""
+    dispatcher = UpdateDispatcher(hass)
+    device = make_device()
+    dispatcher.update_device(device)
+    await asyncio.sleep(0)
+
+    writes: list[None] = []
+    dispatcher.async_connect(device.id, lambda: writes.append(None), {"switch_1"})
+    device.online = False
+    dispatcher.update_device(device)
+    await asyncio.sleep(0)
+    assert len(writes) == 1
+
+
+async def test_failing_callback(hass: HomeAssistant) -> None:
+    """Test a failing callback does not stop the other callbacks."""
+    dispatcher = UpdateDispatcher(hass)
+    device = make_device()
+    writes: list[None] = []
+
+    def fail() -> None:
+        raise ValueError
+
+    dispatcher.async_connect(device.id, fail)
+    dispatcher.async_connect(device.id, lambda: writes.append(None))
+    dispatcher.update_device(device)
+    await asyncio.sleep(0)
+    assert len(writes) == 1
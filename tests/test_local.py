@@ -0,0 +1,47 @@
+"""Tests for the local connection to devices."""
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.smartlife.local import LocalConnection
+from custom_components.smartlife.local_protocol import (
+    Command,
+    Message,
+    encode_payload,
+    pack_message,
+    unpack_message,
+)
+
+KEY = b"0123456789abcdef"
+
+
+async def test_connect_tracks_tasks(hass: HomeAssistant, socket_enabled: None) -> None:
+    """Test the reader and heart beat are background tasks of Home Assistant."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        message, _ = unpack_message(await reader.read(4096))
+        payload = encode_payload(KEY, Command.DP_QUERY, {"dps": {"1": True}})
+        writer.write(pack_message(Message(message.seq, message.cmd, payload, 0)))
+        await writer.drain()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    on_dps = MagicMock()
+    on_close = MagicMock()
+    connection = LocalConnection(hass, "device", "127.0.0.1", KEY, on_dps, on_close)
+
+    with patch("custom_components.smartlife.local.TCP_PORT", port):
+        await connection.async_connect()
+
+    on_dps.assert_called_once_with("device", {"1": True})
+    assert len(connection._tasks) == 2
+    assert set(connection._tasks) <= hass._background_tasks
+
+    connection.close()
+    on_close.assert_called_once_with(connection)
+    await hass.async_block_till_done()
+    server.close()
+    await server.wait_closed()
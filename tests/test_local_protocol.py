@@ -0,0 +1,134 @@
+"""Tests for the local protocol of Tuya devices."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.smartlife.local_protocol import (
+    FOOTER,
+    HEADER,
+    VERSION_HEADER,
+    Command,
+    Message,
+    ProtocolError,
+    decode_discovery,
+    decode_payload,
+    decrypt,
+    encode_discovery,
+    encode_payload,
+    encrypt,
+    pack_message,
+    unpack_message,
+)
+
+KEY = b"0123456789abcdef"
+
+
+def test_encrypt_roundtrip() -> None:
+    """Test encrypted data is padded to the block size and decrypts."""
+    data = encrypt(KEY, b"hello")
+    assert len(data) == 16
+    assert decrypt(KEY, data) == b"hello"
+
+
+def test_pack_roundtrip() -> None:
+    """Test a packed message unpacks to the same message."""
+    message = Message(5, Command.CONTROL, b"payload")
+    data = pack_message(message)
+    assert len(data) == HEADER.size + len(b"payload") + FOOTER.size
+    assert unpack_message(data) == (message, len(data))
+
+
+def test_unpack_retcode() -> None:
+    """Test the return code of device messages is split from the payload."""
+    message = Message(1, Command.STATUS, b'{"dps":{}}', retcode=0)
+    assert unpack_message(pack_message(message))[0] == message
+
+
+def test_unpack_incomplete() -> None:
+    """Test incomplete buffers are not consumed."""
+    data = pack_message(Message(1, Command.HEART_BEAT, b""))
+    assert unpack_message(data[:HEADER.size - 1]) == (None, 0)
+    assert unpack_message(data[:-1]) == (None, 0)
+
+
+def test_unpack_stream() -> None:
+    """Test messages are unpacked one at a time from a buffer."""
+    first = Message(1, Command.STATUS, b"first")
+    second = Message(2, Command.STATUS, b"second")
+    buffer = bytearray(pack_message(first) + pack_message(second))
+
+    message, consumed = unpack_message(buffer)
+    assert message == first
+    del buffer[:consumed]
+    message, consumed = unpack_message(buffer)
+    assert message == second
+    assert consumed == len(buffer)
+
+
+def test_unpack_invalid() -> None:
+    """Test corrupted messages are rejected."""
+    data = bytearray(pack_message(Message(1, Command.STATUS, b"payload")))
+    with pytest.raises(ProtocolError, match="prefix"):
+        unpack_message(b"\xff" + bytes(data[1:]))
+
+    corrupted = bytearray(data)
+    corrupted[HEADER.size] ^= 0xFF
+    with pytest.raises(ProtocolError, match="CRC"):
+        unpack_message(corrupted)
+
+    corrupted = bytearray(data)
+    corrupted[-1] ^= 0xFF
+    with pytest.raises(ProtocolError, match="suffix"):
+        unpack_message(corrupted)
+
+
+def test_payload_roundtrip() -> None:
+    """Test control payloads carry the version header, queries do not."""
+    payload = {"devId": "device", "dps": {"1": True}}
+
+    control = encode_payload(KEY, Command.CONTROL, payload)
+    assert control.startswith(VERSION_HEADER)
+    assert decode_payload(KEY, control) == payload
+
+    query = encode_payload(KEY, Command.DP_QUERY, payload)
+    assert not query.startswith(VERSION_HEADER)
+    assert decode_payload(KEY, query) == payload
+
+
+def test_decode_payload_empty() -> None:
+    """Test empty payloads decode to None."""
+    assert decode_payload(KEY, b"") is None
+    assert decode_payload(KEY, VERSION_HEADER) is None
+
+
+def test_decode_payload_wrong_key() -> None:
+    """Test payloads encrypted with another key are rejected."""
+    data = encode_payload(KEY, Command.DP_QUERY, {"dps": {}})
+    with pytest.raises(ProtocolError):
+        decode_payload(b"fedcba9876543210", data)
+
+
+def test_discovery_roundtrip() -> None:
+    """Test encrypted discovery packets decode."""
+    info = {"gwId": "device", "ip": "192.168.1.2", "version": "3.3"}
+    assert decode_discovery(encode_discovery(info)) == info
+
+
+def test_discovery_plain() -> None:
+    """Test plain discovery packets of older devices decode."""
+    info = {"gwId": "device", "ip": "192.168.1.2"}
+    data = pack_message(
+        Message(0, Command.DISCOVERY, b'{"gwId":"device","ip":"192.168.1.2"}', 0)
+    )
+    assert decode_discovery(data) == info
+
+
+def test_discovery_invalid() -> None:
+    """Test undecodable discovery packets are rejected."""
+    with pytest.raises(ProtocolError):
+        decode_discovery(b"\x00\x00")
+    garbage = pack_message(
+        Message(0, Command.DISCOVERY, encrypt(KEY, b"{}"), retcode=0)
+    )
+    with pytest.raises(ProtocolError):
+        decode_discovery(garbage)
@@ -0,0 +1,83 @@
+"""Tests for the latency histograms and counters."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.smartlife.metrics import (
+    BUCKETS,
+    COUNTERS,
+    LatencyHistogram,
+    Metrics,
+)
+
+
+def test_empty_histogram() -> None:
+    """Test an empty histogram reports zeros."""
+    histogram = LatencyHistogram()
+    assert histogram.percentile(0.5) == 0.0
+    assert histogram.as_dict() == {
+        "count": 0,
+        "mean_ms": 0,
+        "p50_ms": 0.0,
+        "p90_ms": 0.0,
+        "p99_ms": 0.0,
+        "max_ms": 0.0,
+    }
+
+
+def test_linear_buckets_exact() -> None:
+    """Test latencies below the linear buckets are recorded exactly."""
+    histogram = LatencyHistogram()
+    for micros in range(1, 11):
+        histogram.record(micros / 1_000_000)
+    assert histogram.count == 10
+    assert histogram.percentile(0.5) == pytest.approx(5e-6)
+    assert histogram.percentile(1.0) == pytest.approx(10e-6)
+
+
+@pytest.mark.parametrize("seconds", [0.0001, 0.0123, 0.5, 3.7, 120.0])
+def test_percentile_precision(seconds: float) -> None:
+    """Test percentiles are within 12.5% of the recorded latency."""
+    histogram = LatencyHistogram()
+    histogram.record(seconds / 2)
+    histogram.record(seconds)
+    histogram.record(seconds * 2)
+    assert histogram.percentile(0.5) == pytest.approx(seconds, rel=0.125)
+    assert histogram.percentile(1.0) <= histogram.max == seconds * 2
+
+
+def test_percentiles_ordered() -> None:
+    """Test the percentiles of a distribution."""
+    histogram = LatencyHistogram()
+    for millis in range(1, 1001):
+        histogram.record(millis / 1000)
+    data = histogram.as_dict()
+    assert data["count"] == 1000
+    assert data["mean_ms"] == pytest.approx(500.5)
+    assert data["p50_ms"] == pytest.approx(500, rel=0.125)
+    assert data["p90_ms"] == pytest.approx(900, rel=0.125)
+    assert data["p99_ms"] == pytest.approx(990, rel=0.125)
+    assert data["max_ms"] == 1000
+    assert data["p50_ms"] <= data["p90_ms"] <= data["p99_ms"] <= data["max_ms"]
+
+
+def test_out_of_range() -> None:
+    """Test negative and huge latencies land in the outer buckets."""
+    histogram = LatencyHistogram()
+    histogram.record(-1)
+    histogram.record(1e9)
+    assert histogram.counts[0] == 1
+    assert histogram.counts[BUCKETS - 1] == 1
+    assert histogram.max == 1e9
+
+
+def test_metrics_as_dict() -> None:
+    """Test the metrics report their histograms and the shared counters."""
+    metrics = Metrics()
+    metrics.mq_dispatch.record(0.001)
+    metrics.throttled = 2
+    data = metrics.as_dict()
+    assert data["mq_dispatch"]["count"] == 1
+    assert data["command_echo"]["count"] == 0
+    assert data["throttled"] == 2
+    assert data["find_dpcode"] == COUNTERS.find_dpcode
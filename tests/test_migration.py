@@ -0,0 +1,95 @@
+"""Tests for the config entry migrations."""
+from __future__ import annotations
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+
+from custom_components.smartlife.const import DOMAIN
+from custom_components.smartlife.migration import MIGRATIONS, async_migrate_entry
+
+
+def _add_entity(
+        hass: HomeAssistant,
+        entry: MockConfigEntry,
+        domain: str,
+        unique_id: str,
+        device_id: str = "abc",
+) -> er.RegistryEntry:
+    """Register an entity of a device of a config entry."""
+    device = dr.async_get(hass).async_get_or_create(
+        config_entry_id=entry.entry_id, identifiers={(DOMAIN, device_id)}
+    )
+    return er.async_get(hass).async_get_or_create(
+        domain,
+        DOMAIN,
+        unique_id,
+        config_entry=entry,
+        device_id=device.id,
+    )
+
+
+async def test_migrate_unique_ids(hass: HomeAssistant) -> None:
+    """Test old light and switch unique_ids are migrated."""
+    entry = MockConfigEntry(domain=DOMAIN, version=1, minor_version=1)
+    entry.add_to_hass(hass)
+    light = _add_entity(hass, entry, "light", "smartlife.abc")
+    switch = _add_entity(hass, entry, "switch", "smartlife.abc_usb2")
+    current = _add_entity(hass, entry, "switch", "smartlife.abcswitch_1")
+
+    assert await async_migrate_entry(hass, entry)
+
+    entity_registry = er.async_get(hass)
+    assert entity_registry.async_get(light.entity_id).unique_id == (
+        "smartlife.abcswitch_led"
+    )
+    assert entity_registry.async_get(switch.entity_id).unique_id == (
+        "smartlife.abcswitch_usb2"
+    )
+    assert entity_registry.async_get(current.entity_id).unique_id == (
+        "smartlife.abcswitch_1"
+    )
+    assert (entry.version, entry.minor_version) == MIGRATIONS[-1][:2]
+
+
+async def test_migrate_keeps_taken_unique_id(hass: HomeAssistant) -> None:
+    """Test an old unique_id is kept when the new one is taken."""
+    entry = MockConfigEntry(domain=DOMAIN, version=1, minor_version=1)
+    entry.add_to_hass(hass)
+    old = _add_entity(hass, entry, "switch", "smartlife.abc")
+    _add_entity(hass, entry, "switch", "smartlife.abcswitch")
+
+    assert await async_migrate_entry(hass, entry)
+    assert er.async_get(hass).async_get(old.entity_id).unique_id == "smartlife.abc"
+
+
+async def test_migrated_entry_untouched(hass: HomeAssistant) -> None:
+    """Test migrations do not run again."""
+    version, minor_version, _ = MIGRATIONS[-1]
+    entry = MockConfigEntry(
+        domain=DOMAIN, version=version, minor_version=minor_version
+    )
+    entry.add_to_hass(hass)
+    light = _add_entity(hass, entry, "light", "smartlife.abc")
+
+    assert await async_migrate_entry(hass, entry)
+    assert er.async_get(hass).async_get(light.entity_id).unique_id == "smartlife.abc"
+
+
+async def test_newer_minor_version(hass: HomeAssistant) -> None:
+    """Test entries of a newer minor version are accepted."""
+    version, minor_version, _ = MIGRATIONS[-1]
+    entry = MockConfigEntry(
+        domain=DOMAIN, version=version, minor_version=minor_version + 1
+    )
+    entry.add_to_hass(hass)
+    assert await async_migrate_entry(hass, entry)
+    assert entry.minor_version == minor_version + 1
+
+
+async def test_newer_major_version(hass: HomeAssistant) -> None:
+    """Test entries of a newer major version are refused."""
+    entry = MockConfigEntry(domain=DOMAIN, version=MIGRATIONS[-1][0] + 1)
+    entry.add_to_hass(hass)
+    assert not await async_migrate_entry(hass, entry)
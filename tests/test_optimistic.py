@@ -0,0 +1,97 @@
+"""Tests for the optimistic device status."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.smartlife.dispatcher import UpdateDispatcher
+from custom_components.smartlife.optimistic import OptimisticState, ShadowStatus
+
+from .conftest import make_device
+
+
+def test_shadow_confirm() -> None:
+    """Test a reported value matching the optimistic value confirms it."""
+    shadow = ShadowStatus({"switch_1": False})
+    shadow.apply("switch_1", True, 1.0)
+    assert shadow["switch_1"] is True
+    assert shadow.confirmed() == {"switch_1": False}
+
+    shadow["switch_1"] = True
+    assert not shadow.pending
+    assert shadow.confirmed_count == 1
+    assert shadow.confirmed() == {"switch_1": True}
+    assert not shadow.rollback("switch_1")
+
+
+def test_shadow_correct() -> None:
+    """Test a reported value differing from the optimistic value wins."""
+    shadow = ShadowStatus({"bright_value": 10})
+    shadow.apply("bright_value", 500, 1.0)
+    shadow["bright_value"] = 400
+    assert shadow["bright_value"] == 400
+    assert shadow.corrected_count == 1
+
+
+def test_shadow_rollback() -> None:
+    """Test rolling back restores the value replaced by the first command."""
+    shadow = ShadowStatus({"bright_value": 10})
+    shadow.apply("bright_value", 500, 1.0)
+    shadow.apply("bright_value", 600, 2.0)
+    assert not shadow.rollback("bright_value", 1.0)
+    assert shadow.rollback("bright_value", 2.0)
+    assert shadow["bright_value"] == 10
+
+
+def test_shadow_rollback_missing() -> None:
+    """Test rolling back a value that was not reported before removes it."""
+    shadow = ShadowStatus({})
+    shadow.apply("switch_1", True, 1.0)
+    assert shadow.confirmed() == {}
+    assert shadow.rollback("switch_1")
+    assert "switch_1" not in shadow
+
+
+async def test_disabled(hass: HomeAssistant) -> None:
+    """Test nothing is applied without a timeout."""
+    optimistic = OptimisticState(hass, UpdateDispatcher(hass))
+    device = make_device()
+    assert optimistic.async_apply(device, [{"code": "switch_1", "value": True}]) is None
+    assert device.status["switch_1"] is False
+
+
+async def test_apply_and_expire(hass: HomeAssistant) -> None:
+    """Test values not reported in time are rolled back."""
+    optimistic = OptimisticState(hass, UpdateDispatcher(hass), timeout=5)
+    device = make_device()
+    sent_at = optimistic.async_apply(
+        device,
+        [{"code": "switch_1", "value": True}, {"code": "unknown", "value": 1}],
+    )
+    assert sent_at is not None
+    assert device.status["switch_1"] is True
+    assert "unknown" not in device.status
+    assert optimistic.as_dict()["pending"]["device"]["switch_1"]["value"] is True
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=6))
+    await hass.async_block_till_done()
+    assert device.status["switch_1"] is False
+    assert optimistic.rolled_back == 1
+    assert optimistic.as_dict()["pending"] == {}
+
+
+async def test_rollback_failed_command(hass: HomeAssistant) -> None:
+    """Test the values of a failed command are rolled back right away."""
+    optimistic = OptimisticState(hass, UpdateDispatcher(hass), timeout=5)
+    device = make_device()
+    sent_at = optimistic.async_apply(device, [{"code": "bright_value", "value": 50}])
+    optimistic.async_rollback(device, ["bright_value"], sent_at)
+    assert device.status["bright_value"] == 10
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=6))
+    await hass.async_block_till_done()
+    assert optimistic.rolled_back == 1
@@ -0,0 +1,136 @@
+"""Tests for the device snapshot."""
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Any
+
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.smartlife.dispatcher import UpdateDispatcher
+from custom_components.smartlife.optimistic import OptimisticState
+from custom_components.smartlife.snapshot import (
+    DeviceSnapshot,
+    async_reconcile_device_map,
+)
+
+from .conftest import make_device
+
+
+async def test_roundtrip(hass: HomeAssistant) -> None:
+    """Test a saved device list loads back."""
+    snapshot = DeviceSnapshot(hass, "entry")
+    device = make_device(status={"switch_1": True, "bright_value": 500})
+    await snapshot.async_save({device.id: device})
+
+    devices = await snapshot.async_load()
+    loaded = devices[device.id]
+    assert loaded.name == device.name
+    assert loaded.status == {"switch_1": True, "bright_value": 500}
+    assert loaded.function["bright_value"].values == device.function[
+        "bright_value"
+    ].values
+    assert not loaded.set_up
+
+
+async def test_save_pending_optimistic(hass: HomeAssistant) -> None:
+    """Test only the confirmed values of a device with pending values are saved."""
+    optimistic = OptimisticState(hass, UpdateDispatcher(hass), timeout=5)
+    device = make_device(status={"switch_1": False, "bright_value": 10})
+    optimistic.async_apply(
+        device,
+        [
+            {"code": "switch_1", "value": True},
+            {"code": "bright_value", "value": 800},
+        ],
+    )
+    assert device.status == {"switch_1": True, "bright_value": 800}
+    device.status["bright_value"] = 600
+
+    snapshot = DeviceSnapshot(hass, "entry")
+    await snapshot.async_save({device.id: device})
+
+    loaded = (await snapshot.async_load())[device.id]
+    assert loaded.status == {"switch_1": False, "bright_value": 600}
+    assert optimistic.as_dict()["corrected"] == 1
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=6))
+    await hass.async_block_till_done()
+    assert device.status == {"switch_1": False, "bright_value": 600}
+
+
+async def test_load_missing(hass: HomeAssistant) -> None:
+    """Test loading without a snapshot returns no devices."""
+    assert await DeviceSnapshot(hass, "missing").async_load() == {}
+
+
+def test_reconcile() -> None:
+    """Test devices are added, removed, replaced and updated in place."""
+    kept = make_device("kept", status={"switch_1": False, "bright_value": 10})
+    kept.set_up = True
+    updated = make_device("updated")
+    replaced = make_device("replaced")
+    device_map = {
+        "kept": kept,
+        "updated": updated,
+        "replaced": replaced,
+        "removed": make_device("removed"),
+        "added_meanwhile": make_device("added_meanwhile"),
+    }
+    updated.status["switch_1"] = True
+
+    new_replaced = make_device("replaced")
+    new_replaced.function.pop("switch_1")
+    fresh = {
+        "kept": make_device("kept", status={"switch_1": True, "bright_value": 20}),
+        "updated": make_device("updated"),
+        "replaced": new_replaced,
+        "new": make_device("new"),
+    }
+
+    added, removed, replaced_ids = async_reconcile_device_map(
+        device_map,
+        fresh,
+        added_since={"added_meanwhile"},
+        updated_since={"updated"},
+    )
+    assert added == ["new"]
+    assert removed == ["removed"]
+    assert replaced_ids == ["replaced"]
+    assert device_map["kept"] is kept
+    assert kept.set_up
+    assert kept.status == {"switch_1": True, "bright_value": 20}
+    assert device_map["updated"].status["switch_1"] is True
+    assert device_map["replaced"] is new_replaced
+    assert "added_meanwhile" in device_map
+
+
+async def test_local_strategy(hass: HomeAssistant) -> None:
+    """Test the local strategy of local capable devices is restored."""
+    strategy = {
+        1: {"status_code": "switch_1", "value_convert": "default", "config_item": {}}
+    }
+    device = make_device(support_local=True, local_strategy=strategy)
+    snapshot = DeviceSnapshot(hass, "entry")
+    await snapshot.async_save({device.id: device})
+
+    loaded = (await snapshot.async_load())[device.id]
+    assert loaded.support_local
+    assert loaded.local_strategy == strategy
+
+
+async def test_local_strategy_missing(
+        hass: HomeAssistant, hass_storage: dict[str, Any]
+) -> None:
+    """Test devices of snapshots without a local strategy are not local."""
+    device = make_device(support_local=True)
+    snapshot = DeviceSnapshot(hass, "entry")
+    await snapshot.async_save({device.id: device})
+    key = "smartlife.entry.devices"
+    for item in hass_storage[key]["data"]["devices"]:
+        del item["local_strategy"]
+
+    loaded = (await snapshot.async_load())[device.id]
+    assert not loaded.support_local
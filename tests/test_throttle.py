@@ -0,0 +1,91 @@
+"""Tests for the throttling of sensor state writes."""
+from __future__ import annotations
+
+from custom_components.smartlife.throttle import StateThrottle, ThrottleConfig
+
+
+def test_config_enabled() -> None:
+    """Test a config is enabled when any limit is set."""
+    assert not ThrottleConfig().enabled
+    assert ThrottleConfig(max_age=10).enabled
+
+
+def test_config_with_options() -> None:
+    """Test entity options override the limits they set."""
+    config = ThrottleConfig(deadband=1, min_interval=5)
+    config = config.with_options(
+        {
+            "deadband": "0.5",
+            "deadband_relative": 0.02,
+            "min_interval": "invalid",
+            "max_age": -1,
+            "other": 3,
+        }
+    )
+    assert config == ThrottleConfig(
+        deadband=0.5, deadband_relative=0.02, min_interval=5, max_age=0
+    )
+
+
+def test_first_value_published() -> None:
+    """Test the first value is always published."""
+    throttle = StateThrottle(ThrottleConfig(deadband=10, min_interval=60))
+    assert throttle.delay(1, 0) == 0
+
+
+def test_min_interval() -> None:
+    """Test values are held back until the minimum interval passed."""
+    throttle = StateThrottle(ThrottleConfig(min_interval=10))
+    throttle.published(1, 100)
+    assert throttle.delay(2, 104) == 6
+    assert throttle.delay(2, 110) == 0
+    assert throttle.delay("on", 104) == 6
+
+
+def test_deadband() -> None:
+    """Test small changes are held back by the deadband."""
+    throttle = StateThrottle(ThrottleConfig(deadband=0.5))
+    throttle.published(20.0, 0)
+    assert throttle.delay(20.3, 1) is None
+    assert throttle.delay(19.6, 1) is None
+    assert throttle.delay(20.5, 1) == 0
+
+
+def test_deadband_drift() -> None:
+    """Test drifts are compared with the published value."""
+    throttle = StateThrottle(ThrottleConfig(deadband=0.5))
+    throttle.published(20.0, 0)
+    assert throttle.delay(20.3, 1) is None
+    assert throttle.delay(20.6, 2) == 0
+
+
+def test_deadband_relative() -> None:
+    """Test changes are compared relative to the published value."""
+    throttle = StateThrottle(ThrottleConfig(deadband_relative=0.1))
+    throttle.published(200, 0)
+    assert throttle.delay(215, 1) is None
+    assert throttle.delay(180, 1) == 0
+
+    throttle.published(-200, 0)
+    assert throttle.delay(-185, 1) is None
+
+
+def test_max_age() -> None:
+    """Test values held back by the deadband are published after max age."""
+    throttle = StateThrottle(ThrottleConfig(deadband=1, max_age=30))
+    throttle.published(10, 100)
+    assert throttle.delay(10.5, 110) == 20
+    assert throttle.delay(10.5, 140) == 0
+
+
+def test_non_numeric() -> None:
+    """Test non numeric values are published on any change."""
+    throttle = StateThrottle(ThrottleConfig(deadband=5))
+    throttle.published("low", 0)
+    assert throttle.delay("low", 1) is None
+    assert throttle.delay("high", 1) == 0
+    assert throttle.delay(3, 1) == 0
+
+    throttle.published(True, 0)
+    assert throttle.delay(False, 1) == 0
+    assert throttle.delay(True, 1) is None
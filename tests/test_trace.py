@@ -0,0 +1,64 @@
+"""Tests for the capture and replay of device updates."""
+from __future__ import annotations
+
+import gzip
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.smartlife.dispatcher import UpdateDispatcher
+from custom_components.smartlife.trace import ReplayReport, _entry_path, async_replay
+
+from .conftest import make_device
+
+
+def test_entry_path() -> None:
+    """Test the entry id is added before the suffixes of the file name."""
+    assert _entry_path("/config/smartlife_trace.jsonl.gz", "abc") == (
+        "/config/smartlife_trace_abc.jsonl.gz"
+    )
+    assert _entry_path("trace", "abc") == "trace_abc"
+
+
+def test_report() -> None:
+    """Test the report names the dispatch latencies."""
+    report = ReplayReport("trace", 1.0, records=2, latencies=[0.002, 0.001])
+    data = report.as_dict()
+    assert data["dispatched_writes"] == 2
+    assert data["dispatch_latency_p50_ms"] == 2.0
+    assert data["dispatch_latency_max_ms"] == 2.0
+    assert "state_writes" not in data
+
+
+async def test_replay(hass: HomeAssistant, tmp_path: Path) -> None:
+    """Test a replay dispatches into copies of the devices."""
+    path = tmp_path / "trace.jsonl.gz"
+    records = [
+        {"t": 0, "id": "device", "online": True, "status": {"switch_1": True}},
+        {"t": 0, "id": "unknown", "online": True, "status": {"switch_1": True}},
+        {"t": 0, "id": "device", "online": True, "status": {"bright_value": 20}},
+    ]
+    with gzip.open(path, "wt", encoding="utf-8") as file:
+        file.write("\n".join(json.dumps(record) for record in records) + "\n")
+
+    device = make_device()
+    dispatcher = UpdateDispatcher(hass)
+    writes: list[None] = []
+    unsub = dispatcher.async_connect(
+        device.id, lambda: writes.append(None), {"switch_1"}
+    )
+    hass_data = SimpleNamespace(
+        dispatcher=dispatcher,
+        manager=SimpleNamespace(device_map={device.id: device}),
+    )
+
+    report = await async_replay(hass, hass_data, str(path), speed=0)
+
+    assert report.records == 2
+    assert report.skipped == 1
+    assert report.as_dict()["dispatched_writes"] == 1
+    assert device.status == {"switch_1": False, "bright_value": 10}
+    assert not writes
+    unsub()
@@ -0,0 +1,131 @@
+"""Tests for the rolling window statistics."""
+from __future__ import annotations
+
+import math
+import random
+import statistics
+
+import pytest
+
+from custom_components.smartlife.window import RollingWindow, StatisticsWindows
+
+
+def test_empty_window() -> None:
+    """Test an empty window has no statistics."""
+    window = RollingWindow(60)
+    assert len(window) == 0
+    assert window.min is None
+    assert window.max is None
+    assert window.mean is None
+    assert window.stddev is None
+    assert window.last_time is None
+    assert window.oldest_time is None
+
+
+def test_single_sample() -> None:
+    """Test a single sample has no deviation."""
+    window = RollingWindow(60)
+    window.add(0, 5.0)
+    assert window.min == window.max == window.mean == 5.0
+    assert window.stddev is None
+
+
+def test_statistics() -> None:
+    """Test the statistics match those of the samples."""
+    window = RollingWindow(60)
+    values = [3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0, 6.0]
+    for now, value in enumerate(values):
+        window.add(now, value)
+    assert len(window) == len(values)
+    assert window.min == 1.0
+    assert window.max == 9.0
+    assert window.mean == pytest.approx(statistics.mean(values))
+    assert window.stddev == pytest.approx(statistics.stdev(values))
+    assert window.oldest_time == 0
+    assert window.last_time == len(values) - 1
+
+
+def test_expire() -> None:
+    """Test samples older than the window are dropped."""
+    window = RollingWindow(10)
+    window.add(0, 100.0)
+    window.add(5, 1.0)
+    window.add(12, 2.0)
+    assert len(window) == 2
+    assert window.max == 2.0
+    assert window.mean == pytest.approx(1.5)
+
+    window.expire(100)
+    assert len(window) == 0
+    assert window.min is None
+
+
+def test_capacity() -> None:
+    """Test the oldest sample is dropped when the buffer is full."""
+    window = RollingWindow(1000, capacity=4)
+    for now, value in enumerate([10.0, 1.0, 2.0, 3.0, 4.0]):
+        window.add(now, value)
+    assert len(window) == 4
+    assert window.max == 4.0
+    assert window.min == 1.0
+    assert window.mean == pytest.approx(2.5)
+
+
+def test_clear() -> None:
+    """Test clearing a window drops all samples."""
+    window = RollingWindow(60)
+    window.add(0, 1.0)
+    window.add(1, 2.0)
+    window.clear()
+    assert len(window) == 0
+    assert window.max is None
+    window.add(2, 7.0)
+    assert window.min == window.max == window.mean == 7.0
+
+
+def test_long_run_matches_samples() -> None:
+    """Test the running sums stay accurate over many expired samples."""
+    rng = random.Random(1)
+    window = RollingWindow(50, capacity=64)
+    samples: list[tuple[float, float]] = []
+    for now in range(2000):
+        value = 1e6 + rng.uniform(-10, 10)
+        window.add(now, value)
+        samples.append((now, value))
+
+    values = [value for time, value in samples if time >= 2000 - 1 - 50][-64:]
+    assert len(window) == len(values)
+    assert window.min == min(values)
+    assert window.max == max(values)
+    assert window.mean == pytest.approx(statistics.mean(values))
+    assert window.stddev == pytest.approx(statistics.stdev(values), rel=1e-6)
+    assert not math.isnan(window.stddev)
+
+
+def test_statistics_windows_shared() -> None:
+    """Test the sensors of a DPCode share a window until the last is released."""
+    windows = StatisticsWindows(60)
+    first = windows.acquire("device", "temp")
+    second = windows.acquire("device", "temp")
+    other = windows.acquire("device", "humidity")
+    assert first is second
+    assert first is not other
+
+    first.add(0, 1.0)
+    assert windows.as_dict() == {"window": 60, "windows": 2, "samples": 1}
+
+    windows.release("device", "temp")
+    assert windows.acquire("device", "temp") is first
+    windows.release("device", "temp")
+    windows.release("device", "temp")
+    assert windows.acquire("device", "temp") is not first
+    windows.release("device", "unknown")
+
+
+def test_statistics_windows_set_window() -> None:
+    """Test changing the length applies to existing windows."""
+    windows = StatisticsWindows(60)
+    window = windows.acquire("device", "temp")
+    windows.set_window(120)
+    assert window.window == 120
+    assert windows.acquire("device", "power").window == 120
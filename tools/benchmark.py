@@ -0,0 +1,453 @@
+"""Benchmark the hot paths of the integration on a synthetic device fleet.
+
+Devices are generated for every category of the description tables of the
+platforms, with DPCodes typed after the description fields referencing
+them. Devices of the categories of platforms without description tables
+get a fixed set of DPCodes per platform. Entities are created the way the
+platforms create them, without a running Home Assistant instance.
+
+    python tools/benchmark.py --devices 1000 --output benchmark.json
+
+Requires Home Assistant and the tuya-device-sharing-sdk to be installed.
+Results are written as JSON, so they can be compared across releases.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import fields
+import gc
+import importlib
+import itertools
+import json
+from pathlib import Path
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# pylint: disable=wrong-import-position
+from tuya_sharing import CustomerDevice  # noqa: E402
+from tuya_sharing.device import DeviceFunction, DeviceStatusRange  # noqa: E402
+
+from custom_components.smartlife.base import (  # noqa: E402
+    SmartLifeEntity,
+    remove_device_schema,
+)
+from custom_components.smartlife.const import DPCode, DPType  # noqa: E402
+from custom_components.smartlife.dispatcher import UpdateDispatcher  # noqa: E402
+from custom_components.smartlife.metrics import LatencyHistogram  # noqa: E402
+
+# Platform module, description table, entity class and DP type of the key
+PLATFORMS: tuple[tuple[str, str, str, str], ...] = (
+    ("alarm_control_panel", "ALARM", "SmartLifeAlarmEntity", "Enum"),
+    ("binary_sensor", "BINARY_SENSORS", "SmartLifeBinarySensorEntity", "Boolean"),
+    ("button", "BUTTONS", "SmartLifeButtonEntity", "Boolean"),
+    ("cover", "COVERS", "SmartLifeCoverEntity", "Enum"),
+    ("humidifier", "HUMIDIFIERS", "SmartLifeHumidifierEntity", "Boolean"),
+    ("light", "LIGHTS", "SmartLifeLightEntity", "Boolean"),
+    ("number", "NUMBERS", "SmartLifeNumberEntity", "Integer"),
+    ("select", "SELECTS", "SmartLifeSelectEntity", "Enum"),
+    ("sensor", "SENSORS", "SmartLifeSensorEntity", "Integer"),
+    ("siren", "SIRENS", "SmartLifeSirenEntity", "Boolean"),
+    ("switch", "SWITCHES", "SmartLifeSwitchEntity", "Boolean"),
+)
+
+# Platform module, category table, entity class or factory and the DPCodes,
+# with their DP type, of the devices of platforms without description tables
+CATEGORY_PLATFORMS: tuple[tuple[str, str, str, dict[str, str]], ...] = (
+    (
+        "camera",
+        "CAMERAS",
+        "SmartLifeCameraEntity",
+        {DPCode.MOTION_SWITCH: "Boolean", DPCode.RECORD_SWITCH: "Boolean"},
+    ),
+    (
+        "climate",
+        "CLIMATE_DESCRIPTIONS",
+        "_create_entity",
+        {
+            DPCode.SWITCH: "Boolean",
+            DPCode.MODE: "Enum",
+            DPCode.TEMP_CURRENT: "Integer",
+            DPCode.TEMP_SET: "Integer",
+        },
+    ),
+    (
+        "fan",
+        "SMART_LIFE_SUPPORT_TYPE",
+        "_create_entity",
+        {
+            DPCode.SWITCH_FAN: "Boolean",
+            DPCode.FAN_DIRECTION: "Enum",
+            DPCode.FAN_SPEED_PERCENT: "Integer",
+        },
+    ),
+    (
+        "vacuum",
+        "VACUUMS",
+        "SmartLifeVacuumEntity",
+        {
+            DPCode.POWER_GO: "Boolean",
+            DPCode.ELECTRICITY_LEFT: "Integer",
+            DPCode.MODE: "Enum",
+            DPCode.STATUS: "Enum",
+            DPCode.SUCTION: "Enum",
+        },
+    ),
+)
+
+# DP type of DPCodes referenced by other description fields
+FIELD_TYPES = {
+    "brightness": "Integer",
+    "brightness_max": "Integer",
+    "brightness_min": "Integer",
+    "color_temp": "Integer",
+    "color_data": "Json",
+    "color_mode": "Enum",
+    "current_state": "Enum",
+    "current_position": "Integer",
+    "humidity": "Integer",
+    "set_position": "Integer",
+}
+
+TYPE_VALUES = {
+    "Boolean": ("{}", False),
+    "Integer": (
+        json.dumps({"unit": "", "min": 0, "max": 1000, "scale": 1, "step": 1}),
+        500,
+    ),
+    "Enum": (
+        json.dumps({"range": ["open", "close", "stop", "white", "colour"]}),
+        "open",
+    ),
+    "Json": ("{}", json.dumps({"h": 120, "s": 500, "v": 500})),
+}
+
+
+class FakeManager:
+    """Stand-in for the tuya_sharing Manager."""
+
+    def __init__(self, devices: list[CustomerDevice]) -> None:
+        """Init FakeManager."""
+        self.device_map = {device.id: device for device in devices}
+        self.commands: list[tuple[str, list[dict[str, Any]]]] = []
+        self.mq = None
+
+    def send_commands(self, device_id: str, commands: list[dict[str, Any]]) -> None:
+        """Record commands."""
+        self.commands.append((device_id, commands))
+
+
+def load_platforms() -> list[tuple[str, dict[str, tuple[Any, ...]], type, str]]:
+    """Import the platforms and return their description tables."""
+    platforms = []
+    for module_name, table, entity_class, key_type in PLATFORMS:
+        module = importlib.import_module(f"custom_components.smartlife.{module_name}")
+        platforms.append(
+            (
+                module_name,
+                {
+                    category: (
+                        descriptions
+                        if isinstance(descriptions, tuple)
+                        else (descriptions,)
+                    )
+                    for category, descriptions in getattr(module, table).items()
+                },
+                getattr(module, entity_class),
+                key_type,
+            )
+        )
+    return platforms
+
+
+def load_category_platforms() -> list[tuple[str, Any, Any, dict[str, str]]]:
+    """Import the platforms without description tables."""
+    platforms = []
+    for module_name, table, factory, dpcodes in CATEGORY_PLATFORMS:
+        module = importlib.import_module(f"custom_components.smartlife.{module_name}")
+        platforms.append(
+            (module_name, getattr(module, table), getattr(module, factory), dpcodes)
+        )
+    return platforms
+
+
+def category_schemas(
+        platforms: list[Any], category_platforms: list[Any]
+) -> dict[str, dict[str, str]]:
+    """Return the DPCodes, with their DP type, referenced per category."""
+    categories: dict[str, dict[str, str]] = {}
+    for _, table, _, platform_dpcodes in category_platforms:
+        for category in table:
+            categories.setdefault(category, {}).update(platform_dpcodes)
+    for _, table, _, key_type in platforms:
+        for category, descriptions in table.items():
+            dpcodes = categories.setdefault(category, {})
+            for description in descriptions:
+                dpcodes.setdefault(description.key, key_type)
+                for description_field in fields(description):
+                    value = getattr(description, description_field.name)
+                    dptype = FIELD_TYPES.get(description_field.name, "Boolean")
+                    for dpcode in value if isinstance(value, tuple) else (value,):
+                        if isinstance(dpcode, DPCode):
+                            dpcodes.setdefault(dpcode, dptype)
+    return categories
+
+
+def generate_devices(
+        categories: dict[str, dict[str, str]], count: int
+) -> list[CustomerDevice]:
+    """Generate devices, cycling through the categories."""
+    devices = []
+    cycle = itertools.cycle(sorted(categories.items()))
+    for index in range(count):
+        category, dpcodes = next(cycle)
+        devices.append(
+            CustomerDevice(
+                id=f"bench{index:06d}",
+                name=f"Bench {category} {index}",
+                category=category,
+                product_id=f"product_{category}",
+                product_name=f"Product {category}",
+                online=True,
+                support_local=False,
+                set_up=False,
+                function={
+                    code: DeviceFunction(
+                        code=code, type=dptype, values=TYPE_VALUES[dptype][0]
+                    )
+                    for code, dptype in dpcodes.items()
+                },
+                status_range={
+                    code: DeviceStatusRange(
+                        code=code, type=dptype, values=TYPE_VALUES[dptype][0]
+                    )
+                    for code, dptype in dpcodes.items()
+                },
+                status={
+                    code: TYPE_VALUES[dptype][1] for code, dptype in dpcodes.items()
+                },
+            )
+        )
+    return devices
+
+
+def create_entities(
+        platforms: list[Any], category_platforms: list[Any], manager: FakeManager
+) -> dict[str, list[SmartLifeEntity]]:
+    """Create the entities of all devices, like the platforms do."""
+    entities: dict[str, list[SmartLifeEntity]] = {}
+    for module_name, table, entity_class, _ in platforms:
+        created = entities.setdefault(module_name, [])
+        for device in manager.device_map.values():
+            for description in table.get(device.category, ()):
+                if description.key in device.status:
+                    created.append(entity_class(device, manager, description))
+    for module_name, table, factory, _ in category_platforms:
+        created = entities.setdefault(module_name, [])
+        for device in manager.device_map.values():
+            if device.category in table:
+                if (entity := factory(device, manager)) is not None:
+                    created.append(entity)
+    return entities
+
+
+def bench_discovery(
+        platforms: list[Any], category_platforms: list[Any], manager: FakeManager
+) -> tuple[dict[str, Any], dict[str, list[SmartLifeEntity]]]:
+    """Measure entity creation time and, in a second traced pass, memory."""
+    for device_id in manager.device_map:
+        remove_device_schema(device_id)
+    start = time.perf_counter()
+    create_entities(platforms, category_platforms, manager)
+    elapsed = time.perf_counter() - start
+
+    for device_id in manager.device_map:
+        remove_device_schema(device_id)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    entities = create_entities(platforms, category_platforms, manager)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    total = sum(len(created) for created in entities.values())
+    memory = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return {
+        "seconds": round(elapsed, 6),
+        "entities": total,
+        "entities_per_platform": {
+            name: len(created) for name, created in entities.items()
+        },
+        "memory_per_entity_bytes": round(memory / total) if total else 0,
+    }, entities
+
+
+def bench_find_dpcode(
+        entities: dict[str, list[SmartLifeEntity]], iterations: int
+) -> dict[str, Any]:
+    """Measure the cost of find_dpcode lookups."""
+    # Entities of platforms without description tables have no key
+    sample = [
+        (entity, description.key)
+        for created in entities.values()
+        for entity in created
+        if (description := getattr(entity, "entity_description", None))
+    ]
+    results = {}
+    for label, kwargs in (
+            ("plain", {}),
+            ("integer", {"dptype": DPType.INTEGER}),
+            ("enum", {"dptype": DPType.ENUM, "prefer_function": True}),
+    ):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for entity, key in sample:
+                entity.find_dpcode(key, **kwargs)
+        elapsed = time.perf_counter() - start
+        calls = iterations * len(sample)
+        results[label] = {"calls": calls, "ns_per_call": round(elapsed / calls * 1e9)}
+    return results
+
+
+def bench_native_value(
+        entities: dict[str, list[SmartLifeEntity]], iterations: int
+) -> dict[str, Any]:
+    """Measure the throughput of sensor native_value."""
+    sensors = entities.get("sensor", [])
+    if not sensors:
+        return {"calls": 0, "calls_per_second": 0}
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for sensor in sensors:
+            sensor.native_value  # pylint: disable=pointless-statement
+    elapsed = time.perf_counter() - start
+    calls = iterations * len(sensors)
+    return {"calls": calls, "calls_per_second": round(calls / elapsed)}
+
+
+async def bench_dispatch(
+        entities: dict[str, list[SmartLifeEntity]],
+        manager: FakeManager,
+        updates: int,
+) -> dict[str, Any]:
+    """Measure the latency from a device update to the entity callbacks."""
+    loop = asyncio.get_running_loop()
+    dispatcher = UpdateDispatcher(SimpleNamespace(loop=loop))
+    done: asyncio.Future[None] | None = None
+
+    def write_state() -> None:
+        if done is not None and not done.done():
+            done.set_result(None)
+
+    for created in entities.values():
+        for entity in created:
+            dispatcher.async_connect(
+                entity.device.id, write_state, entity.state_dpcodes()
+            )
+
+    # Record the initial status of every device
+    for device in manager.device_map.values():
+        dispatcher.update_device(device)
+    await asyncio.sleep(0)
+
+    devices = [
+        device for device in manager.device_map.values() if device.status
+    ]
+    latencies = []
+    for index in range(updates):
+        device = devices[index % len(devices)]
+        dpcode = next(iter(device.status))
+        value = device.status[dpcode]
+        if isinstance(value, bool):
+            device.status[dpcode] = not value
+        elif isinstance(value, int):
+            device.status[dpcode] = value + 1
+        else:
+            device.status[dpcode] = f"{value}{index}"
+        done = loop.create_future()
+        start = time.perf_counter()
+        dispatcher.update_device(device)
+        await done
+        latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    return {
+        "updates": updates,
+        "p50_us": round(statistics.median(latencies) * 1e6, 1),
+        "p99_us": round(latencies[int(len(latencies) * 0.99) - 1] * 1e6, 1),
+        "max_us": round(latencies[-1] * 1e6, 1),
+        "state_writes": dispatcher.state_writes,
+        "metrics": dispatcher.metrics.as_dict(),
+    }
+
+
+def bench_histogram(iterations: int) -> dict[str, Any]:
+    """Measure the cost of recording a latency."""
+    histogram = LatencyHistogram()
+    samples = [index * 1e-6 for index in range(10_000)]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for sample in samples:
+            histogram.record(sample)
+    elapsed = time.perf_counter() - start
+    return {"ns_per_record": round(elapsed / histogram.count * 1e9)}
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    """Run all benchmarks."""
+    platforms = load_platforms()
+    category_platforms = load_category_platforms()
+    categories = category_schemas(platforms, category_platforms)
+    manager = FakeManager(generate_devices(categories, args.devices))
+
+    discovery, entities = bench_discovery(platforms, category_platforms, manager)
+    manifest = json.loads(
+        (
+            Path(__file__).resolve().parent.parent
+            / "custom_components"
+            / "smartlife"
+            / "manifest.json"
+        ).read_text()
+    )
+    return {
+        "meta": {
+            "version": manifest["version"],
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "devices": args.devices,
+            "categories": len(categories),
+        },
+        "discovery": discovery,
+        "find_dpcode": bench_find_dpcode(entities, args.iterations),
+        "native_value": bench_native_value(entities, args.iterations),
+        "dispatch": asyncio.run(bench_dispatch(entities, manager, args.updates)),
+        "histogram": bench_histogram(args.iterations),
+    }
+
+
+def main() -> None:
+    """Parse the arguments and run the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--output", type=Path, help="write results to this file")
+    args = parser.parse_args()
+
+    results = json.dumps(run(args), indent=2)
+    if args.output:
+        args.output.write_text(results + "\n")
+    else:
+        print(results)
+
+
+if __name__ == "__main__":
+    main()
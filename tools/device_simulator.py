@@ -0,0 +1,203 @@
+"""Stand-in for a Smart Life device speaking the local protocol 3.3.
+
+The simulator broadcasts its presence over UDP, like a real device, and
+accepts TCP connections answering status queries, heart beats and control
+commands. Changed DPs are pushed to all connected clients.
+
+    python tools/device_simulator.py --device-id bf0123 --local-key 0123456789abcdef \
+        --dps '{"1": false, "2": 500}'
+
+Bind to another loopback address (``--host 127.0.0.2``) to run several
+simulated devices on one machine.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import logging
+from pathlib import Path
+import socket
+import sys
+import time
+from typing import Any
+
+_LOGGER = logging.getLogger("device_simulator")
+
+
+def _load_protocol() -> Any:
+    """Load the protocol module without importing the integration."""
+    path = (
+        Path(__file__).resolve().parent.parent
+        / "custom_components"
+        / "smartlife"
+        / "local_protocol.py"
+    )
+    spec = importlib.util.spec_from_file_location("local_protocol", path)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+protocol = _load_protocol()
+
+
+class SimulatedDevice:
+    """Simulated device."""
+
+    def __init__(
+            self,
+            device_id: str,
+            local_key: str,
+            dps: dict[str, Any],
+            host: str,
+            delay: float,
+    ) -> None:
+        """Init SimulatedDevice."""
+        self.device_id = device_id
+        self.local_key = local_key.encode()
+        self.dps = dps
+        self.host = host
+        self.delay = delay
+        self._clients: set[asyncio.StreamWriter] = set()
+
+    async def async_serve(self, port: int) -> None:
+        """Accept client connections."""
+        server = await asyncio.start_server(self._async_handle_client, self.host, port)
+        _LOGGER.info("Listening on %s:%s", self.host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def async_broadcast(self, address: str, interval: float) -> None:
+        """Broadcast the presence of the device."""
+        info = {
+            "gwId": self.device_id,
+            "active": 2,
+            "ability": 0,
+            "mode": 0,
+            "encrypt": True,
+            "productKey": "simulator",
+            "version": protocol.VERSION.decode(),
+        }
+        # Without a bind address, clients use the source of the broadcast
+        if self.host != "0.0.0.0":
+            info["ip"] = self.host
+        packet = protocol.encode_discovery(info)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        try:
+            while True:
+                sock.sendto(packet, (address, protocol.UDP_PORT_ENCRYPTED))
+                await asyncio.sleep(interval)
+        finally:
+            sock.close()
+
+    async def _async_handle_client(
+            self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Answer the messages of a client."""
+        _LOGGER.info("Client %s connected", writer.get_extra_info("peername"))
+        self._clients.add(writer)
+        buffer = bytearray()
+        try:
+            while data := await reader.read(4096):
+                buffer += data
+                while True:
+                    message, consumed = protocol.unpack_message(buffer)
+                    if message is None:
+                        break
+                    del buffer[:consumed]
+                    if self.delay:
+                        await asyncio.sleep(self.delay)
+                    await self._async_handle_message(writer, message)
+        except (OSError, protocol.ProtocolError) as err:
+            _LOGGER.warning("Client failed: %s", err)
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+    async def _async_handle_message(
+            self, writer: asyncio.StreamWriter, message: Any
+    ) -> None:
+        """Answer a single message."""
+        command = protocol.Command
+        if message.cmd == command.HEART_BEAT:
+            self._write(writer, message.seq, command.HEART_BEAT, None)
+        elif message.cmd == command.DP_QUERY:
+            self._write(writer, message.seq, command.DP_QUERY, self._status())
+        elif message.cmd == command.CONTROL:
+            payload = protocol.decode_payload(self.local_key, message.payload) or {}
+            changed = {
+                dp_id: value
+                for dp_id, value in payload.get("dps", {}).items()
+                if self.dps.get(dp_id) != value
+            }
+            self.dps.update(changed)
+            _LOGGER.info("Control %s, changed %s", payload.get("dps"), changed)
+            self._write(writer, message.seq, command.CONTROL, None)
+            if changed:
+                push = {**self._status(), "dps": changed}
+                for client in list(self._clients):
+                    self._write(client, 0, command.STATUS, push)
+        else:
+            _LOGGER.warning("Unsupported command %s", message.cmd)
+        await writer.drain()
+
+    def _status(self) -> dict[str, Any]:
+        """Return the status payload of the device."""
+        return {"devId": self.device_id, "dps": self.dps, "t": int(time.time())}
+
+    def _write(
+            self,
+            writer: asyncio.StreamWriter,
+            seq: int,
+            cmd: int,
+            payload: dict[str, Any] | None,
+    ) -> None:
+        """Write a message to a client."""
+        data = (
+            b""
+            if payload is None
+            else protocol.encode_payload(self.local_key, cmd, payload)
+        )
+        writer.write(protocol.pack_message(protocol.Message(seq, cmd, data, 0)))
+
+
+async def _async_main(args: argparse.Namespace) -> None:
+    """Run the simulator."""
+    device = SimulatedDevice(
+        args.device_id, args.local_key, json.loads(args.dps), args.host, args.delay
+    )
+    await asyncio.gather(
+        device.async_serve(args.port),
+        device.async_broadcast(args.broadcast, args.interval),
+    )
+
+
+def main() -> None:
+    """Parse the arguments and run the simulator."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--device-id", required=True)
+    parser.add_argument("--local-key", required=True, help="16 character local key")
+    parser.add_argument("--dps", default="{}", help="initial DPs, as JSON object")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=protocol.TCP_PORT)
+    parser.add_argument("--broadcast", default="255.255.255.255")
+    parser.add_argument("--interval", type=float, default=5.0)
+    parser.add_argument(
+        "--delay", type=float, default=0.0, help="seconds before each answer"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_async_main(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Generate the category to platform map of the integration.
+
+The device categories handled by each platform are read from the literal
+keys of its description table, without importing Home Assistant, and
+written to ``custom_components/smartlife/categories.py``.
+
+    python tools/platform_categories.py          # regenerate the map
+    python tools/platform_categories.py --check  # fail when it is outdated
+
+Run it after adding a category to a description table.
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+from pathlib import Path
+import sys
+
+PACKAGE = Path(__file__).resolve().parent.parent / "custom_components" / "smartlife"
+OUTPUT = PACKAGE / "categories.py"
+
+# Platform module and the table, or collection, of the categories it handles
+TABLES = {
+    "alarm_control_panel": "ALARM",
+    "binary_sensor": "BINARY_SENSORS",
+    "button": "BUTTONS",
+    "camera": "CAMERAS",
+    "climate": "CLIMATE_DESCRIPTIONS",
+    "cover": "COVERS",
+    "fan": "SMART_LIFE_SUPPORT_TYPE",
+    "humidifier": "HUMIDIFIERS",
+    "light": "LIGHTS",
+    "number": "NUMBERS",
+    "select": "SELECTS",
+    "sensor": "SENSORS",
+    "siren": "SIRENS",
+    "switch": "SWITCHES",
+    "vacuum": "VACUUMS",
+}
+
+# Platforms with entities not tied to a device category
+ALWAYS_LOADED = ("scene", "sensor")
+
+HEADER = '''"""Device categories handled by the platforms.
+
+Generated by tools/platform_categories.py from the description tables of
+the platforms, do not edit.
+"""
+from __future__ import annotations
+
+from homeassistant.const import Platform
+'''
+
+
+def table_categories(module: str, table: str) -> set[str]:
+    """Return the literal categories of a table of a platform module."""
+    tree = ast.parse((PACKAGE / f"{module}.py").read_text())
+    categories: set[str] = set()
+    for node in tree.body:
+        if isinstance(node, ast.AnnAssign):
+            targets, value = [node.target], node.value
+        elif isinstance(node, ast.Assign):
+            targets, value = node.targets, node.value
+        else:
+            continue
+        for target in targets:
+            if isinstance(target, ast.Name) and target.id == table:
+                if isinstance(value, ast.Dict):
+                    elements = value.keys
+                elif isinstance(value, (ast.Tuple, ast.Set, ast.List)):
+                    elements = value.elts
+                else:
+                    raise ValueError(f"{module}.{table} is not a literal")
+                categories.update(
+                    element.value
+                    for element in elements
+                    if isinstance(element, ast.Constant)
+                )
+            # Aliases like `SENSORS["cz"] = SENSORS["kg"]`
+            elif (
+                    isinstance(target, ast.Subscript)
+                    and isinstance(target.value, ast.Name)
+                    and target.value.id == table
+                    and isinstance(target.slice, ast.Constant)
+            ):
+                categories.add(target.slice.value)
+    if not categories:
+        raise ValueError(f"{module}.{table} has no categories")
+    return categories
+
+
+def render() -> str:
+    """Return the source of the categories module."""
+    category_platforms: dict[str, set[str]] = {}
+    for module, table in TABLES.items():
+        for category in table_categories(module, table):
+            category_platforms.setdefault(category, set()).add(module)
+
+    lines = [
+        HEADER,
+        "# Platforms loaded for every config entry",
+        "ALWAYS_LOADED: frozenset[Platform] = frozenset(",
+        "    {",
+        *(f"        Platform.{module.upper()}," for module in ALWAYS_LOADED),
+        "    }",
+        ")",
+        "",
+        "# Platforms handling the devices of a category",
+        "CATEGORY_PLATFORMS: dict[str, frozenset[Platform]] = {",
+    ]
+    for category, modules in sorted(category_platforms.items()):
+        platforms = [f"Platform.{module.upper()}" for module in sorted(modules)]
+        line = f'    "{category}": frozenset({{{", ".join(platforms)}}}),'
+        if len(line) <= 88:
+            lines.append(line)
+            continue
+        lines.append(f'    "{category}": frozenset(')
+        lines.append("        {")
+        lines.extend(f"            {platform}," for platform in platforms)
+        lines.append("        }")
+        lines.append("    ),")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    """Parse the arguments and write or check the map."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--check", action="store_true", help="only check the map is up to date"
+    )
+    args = parser.parse_args()
+
+    source = render()
+    if args.check:
+        if not OUTPUT.exists() or OUTPUT.read_text() != source:
+            sys.exit(f"{OUTPUT} is outdated, run {Path(__file__).name}")
+        return
+    OUTPUT.write_text(source)
+
+
+if __name__ == "__main__":
+    main()